@@ -1,6 +1,7 @@
 import streamlit as st
-import joblib
 import src.ui_components as ui
+from src.artifacts import load_artifacts
+from src.model_registry import resolve_model_dir
 
 # Import Halaman-Halaman Baru
 import src.page_dashboard as page_dashboard
@@ -19,24 +20,34 @@ st.set_page_config(
 ui.inject_custom_css()
 
 # --- 2. GLOBAL RESOURCE LOADER ---
-@st.cache_resource
-def load_resources():
+# Di-cache per versi model: saat pointer CURRENT di registry berpindah, run berikutnya memuat
+# versi baru, sementara run yang sedang berjalan tetap memegang artefak versi lama sampai selesai.
+@st.cache_resource(max_entries=2)
+def load_resources(version_id, model_dir):
     try:
-        return joblib.load('models/recsys_model.pkl')
+        artifacts = load_artifacts(model_dir)
     except FileNotFoundError:
         return None
+    artifacts['manifest'].setdefault('version_id', version_id)
+    return artifacts
 
 # --- 3. MAIN CONTROLLER ---
 def main():
-    # Load Model Sekali Saja di Awal
-    artifacts = load_resources()
+    # Cek versi aktif di tiap run (hot reload tanpa restart server)
+    version_id, model_dir = resolve_model_dir()
+    artifacts = load_resources(version_id, model_dir)
     
     if not artifacts:
         st.error("⚠️ Model artifacts not found. Please run `python src/train_model.py` first.")
         st.stop()
 
+    previous_version = st.session_state.get('model_version')
+    if previous_version and previous_version != version_id:
+        st.toast(f"Model updated: {previous_version} → {version_id}", icon="🔄")
+    st.session_state['model_version'] = version_id
+
     # Render Sidebar & Dapatkan Pilihan User
-    selected_page = ui.render_sidebar()
+    selected_page = ui.render_sidebar(version_id)
 
     # Routing Logic (Pengarah Halaman)
     if "Dashboard" in selected_page:
@@ -0,0 +1,106 @@
+import time
+import numpy as np
+from sklearn.cluster import MiniBatchKMeans
+
+# Index ANN IVF (inverted file) atas faktor item SVD (kolom svd.components_) untuk "produk serupa".
+# Vektor item dinormalisasi (cosine similarity), dikelompokkan ke n_lists centroid kasar, lalu
+# disimpan terurut per list sehingga query cukup memindai n_probe list terdekat.
+ANN_ARRAYS = ('ann_centroids', 'ann_offsets', 'ann_order', 'ann_vectors')
+N_PROBE = 8
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return (vectors / np.maximum(norms, 1e-12)).astype(np.float32)
+
+class IVFIndex:
+    """Index IVF: centroid list, offset tiap list, kode item & vektor item terurut per list."""
+
+    def __init__(self, centroids, offsets, order, vectors):
+        self.centroids = centroids
+        self.offsets = offsets
+        self.order = order
+        self.vectors = vectors
+        # Posisi tiap kode item di dalam array terurut (untuk mengambil vektor query)
+        self.position = np.empty(len(order), dtype=np.int64)
+        self.position[order] = np.arange(len(order))
+
+    @property
+    def n_items(self):
+        return len(self.order)
+
+    def item_vector(self, code):
+        return self.vectors[self.position[code]]
+
+    def search(self, query, k=10, n_probe=N_PROBE, exclude=None):
+        """(kode item, skor cosine) k tetangga terdekat dari vektor ``query`` (sudah dinormalisasi)."""
+        n_probe = min(n_probe, len(self.centroids))
+        lists = np.argpartition(-(self.centroids @ query), n_probe - 1)[:n_probe]
+        rows = np.concatenate([np.arange(self.offsets[l], self.offsets[l + 1]) for l in lists])
+        scores = self.vectors[rows] @ query
+        codes = np.asarray(self.order[rows])
+        if exclude is not None:
+            scores = np.where(codes == exclude, -np.inf, scores)
+        k = min(k, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        top = top[np.isfinite(scores[top])]
+        return codes[top], scores[top]
+
+    def similar(self, code, k=10, n_probe=N_PROBE):
+        return self.search(self.item_vector(code), k, n_probe, exclude=code)
+
+    def to_arrays(self):
+        return dict(zip(ANN_ARRAYS, (self.centroids, self.offsets, self.order, self.vectors)))
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        return cls(*(arrays[name] for name in ANN_ARRAYS))
+
+def build_ivf_index(item_vectors, n_lists=None, sample_per_list=64, batch_size=65_536, random_state=42):
+    """Membangun index IVF; default n_lists ~ 2 * sqrt(n_item).
+
+    Centroid dilatih pada sampel (``sample_per_list`` item per list), lalu semua
+    item di-assign ke centroid dengan cosine terbesar per batch.
+    """
+    vectors = _normalize(np.asarray(item_vectors))
+    n_lists = n_lists or max(1, min(len(vectors), int(2 * np.sqrt(len(vectors)))))
+    rng = np.random.default_rng(random_state)
+    sample = vectors[rng.choice(len(vectors), size=min(len(vectors), n_lists * sample_per_list), replace=False)]
+    quantizer = MiniBatchKMeans(n_clusters=n_lists, batch_size=4096, random_state=random_state, n_init=1)
+    centroids = _normalize(quantizer.fit(sample).cluster_centers_)
+    assignments = np.concatenate([
+        (vectors[start:start + batch_size] @ centroids.T).argmax(axis=1)
+        for start in range(0, len(vectors), batch_size)
+    ])
+    order = np.argsort(assignments, kind='stable').astype(np.int32)
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(assignments, minlength=n_lists))]).astype(np.int64)
+    return IVFIndex(centroids, offsets, order, vectors[order])
+
+def recall_report(index, k=10, n_queries=500, n_probe=N_PROBE, random_state=42):
+    """Recall@k index IVF terhadap brute force eksak + latensi query rata-rata/p95."""
+    rng = np.random.default_rng(random_state)
+    queries = rng.choice(index.n_items, size=min(n_queries, index.n_items), replace=False)
+    exact_vectors = np.empty_like(index.vectors)
+    exact_vectors[index.order] = index.vectors
+
+    hits, latencies = 0, []
+    for code in queries:
+        start = time.perf_counter()
+        approx, _ = index.similar(code, k, n_probe)
+        latencies.append(time.perf_counter() - start)
+
+        scores = exact_vectors @ exact_vectors[code]
+        scores[code] = -np.inf
+        exact = np.argpartition(-scores, k - 1)[:k]
+        hits += len(np.intersect1d(approx, exact))
+    latencies = np.array(latencies) * 1000
+    return {
+        'n_items': int(index.n_items),
+        'n_lists': int(len(index.centroids)),
+        'n_probe': int(n_probe),
+        'k': int(k),
+        'n_queries': int(len(queries)),
+        'recall_at_k': hits / (len(queries) * k),
+        'mean_query_ms': float(latencies.mean()),
+        'p95_query_ms': float(np.percentile(latencies, 95)),
+    }
@@ -0,0 +1,246 @@
+import os
+import json
+import time
+import shutil
+import numpy as np
+from scipy.sparse import csr_matrix, issparse
+
+# Format artefak model berbasis direktori: array numerik .npy (dibuka mmap) + manifest kecil
+ARTIFACT_DIR = 'models/recsys_model'
+MANIFEST_NAME = 'manifest.json'
+FORMAT_VERSION = 1
+# artifact_dir adalah symlink ke snapshot terakhir di <artifact_dir>.snapshots/
+SNAPSHOT_SUFFIX = '.snapshots'
+KEEP_SNAPSHOTS = 2
+CORE_ARRAYS = ('svd_components', 'cluster_centers', 'matrix_data', 'matrix_indices', 'matrix_indptr',
+               'user_ids', 'product_ids', 'top_items', 'svd_components_scale', 'cluster_centers_scale')
+
+# Presisi penyimpanan faktor laten (komponen SVD & centroid). Selain float64, rating disimpan int8;
+# mode int8 menyimpan faktor sebagai int8 dengan skala float32 per baris (x ~ q * scale).
+PRECISIONS = ('float64', 'float32', 'float16', 'int8')
+
+def quantize_rows(values, precision):
+    """(array tersimpan, skala per baris atau None) untuk presisi yang dipilih."""
+    values = np.asarray(values, dtype=np.float64)
+    if precision != 'int8':
+        return values.astype(precision), None
+    scale = np.abs(values).max(axis=1) / 127
+    scale[scale == 0] = 1
+    return np.round(values / scale[:, None]).astype(np.int8), scale.astype(np.float32)
+
+def dequantize_rows(values, scale=None):
+    values = np.asarray(values, dtype=np.float64)
+    return values if scale is None else values * np.asarray(scale, dtype=np.float64)[:, None]
+
+class LatentProjector:
+    """Pengganti ringan TruncatedSVD untuk inferensi: X -> X @ components_.T
+
+    ``components_`` boleh float16/int8 (dengan ``scale`` per komponen); hanya kolom
+    produk yang benar-benar dirating yang di-dequantize saat proyeksi. Komponen
+    float64/float32 dihitung dalam dtype tersimpan; hanya float16/int8 yang
+    dihitung dalam float32.
+    """
+
+    def __init__(self, components, scale=None):
+        self.components_ = components
+        self.dtype_ = components.dtype if components.dtype in (np.float64, np.float32) else np.dtype(np.float32)
+        self.scale_ = None if scale is None else np.asarray(scale, dtype=self.dtype_)
+        self.n_components = components.shape[0]
+        self.n_features = components.shape[1]
+
+    def transform(self, X):
+        # Kolom produk baru (dari update inkremental) di luar ruang SVD diabaikan
+        X = X[:, :self.n_features].tocsr()
+        # X @ C.T hanya butuh kolom C pada nnz X: gather (nnz x r) lalu perkalian sparse-dense
+        gathered = np.asarray(self.components_[:, X.indices], dtype=self.dtype_).T
+        local = csr_matrix((np.asarray(X.data, dtype=self.dtype_), np.arange(X.nnz), X.indptr),
+                           shape=(X.shape[0], X.nnz))
+        projected = np.asarray(local @ gathered, dtype=np.float64)
+        return projected if self.scale_ is None else projected * self.scale_
+
+    def item_factors(self, codes):
+        """Faktor laten (dtype komputasi) untuk array kode produk berbentuk apa pun -> (*codes.shape, r)."""
+        factors = np.moveaxis(np.asarray(self.components_[:, codes], dtype=self.dtype_), 0, -1)
+        return factors if self.scale_ is None else factors * self.scale_
+
+    def dense_components(self):
+        """Komponen penuh float64 (untuk menulis ulang artefak)."""
+        return dequantize_rows(self.components_, self.scale_)
+
+class ClusterAssigner:
+    """Pengganti ringan KMeans.predict: pilih centroid terdekat."""
+
+    def __init__(self, centers, scale=None):
+        # Centroid hanya k x r, jadi langsung di-dequantize ke float64 saat dimuat
+        self.cluster_centers_ = dequantize_rows(centers, scale)
+        self.n_clusters = centers.shape[0]
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        # ||x - c||^2 = ||x||^2 - 2 x.c + ||c||^2, dan ||x||^2 konstan per baris
+        distances = -2 * X @ self.cluster_centers_.T + (self.cluster_centers_ ** 2).sum(axis=1)
+        return distances.argmin(axis=1)
+
+def _pad_top_items(top_items_per_cluster, n_clusters):
+    """Dict cluster -> list kode produk menjadi array 2D int32 (padding -1); array 2D dipakai apa adanya."""
+    if isinstance(top_items_per_cluster, np.ndarray):
+        return top_items_per_cluster.astype(np.int32)
+    top_k = max((len(items) for items in top_items_per_cluster.values()), default=0)
+    table = np.full((n_clusters, top_k), -1, dtype=np.int32)
+    for cluster_id, items in top_items_per_cluster.items():
+        table[cluster_id, :len(items)] = items
+    return table
+
+def decode_products(product_ids, codes):
+    """Kode produk (padding -1 diabaikan) -> list ASIN; dipanggil hanya saat ditampilkan."""
+    codes = np.asarray(codes)
+    return [str(asin) for asin in product_ids[codes[codes >= 0]]]
+
+def save_artifacts(artifact_dir, svd_components, cluster_centers, user_item_matrix, user_ids, product_ids,
+                   top_items_per_cluster, extra_arrays=None, metadata=None, precision='float64'):
+    """Menyimpan artefak model sebagai direktori array .npy + manifest.json.
+
+    ``top_items_per_cluster`` berupa array 2D kode produk (atau dict cluster ->
+    kode). ``extra_arrays`` (opsional) disimpan apa adanya dan dikembalikan oleh
+    ``load_artifacts`` dengan nama yang sama; matrix sparse disimpan sebagai
+    komponen CSR dan dirakit ulang saat dimuat.
+
+    ``precision`` (lihat ``PRECISIONS``) menentukan dtype komponen SVD &
+    centroid; mode selain float64 juga menyimpan rating sebagai int8.
+
+    Ditulis ke snapshot baru di ``<artifact_dir>.snapshots/`` lalu symlink
+    ``artifact_dir`` dipindah atomik ke snapshot itu (lihat ``_flip_pointer``),
+    sehingga pembaca tidak pernah melihat artefak setengah jadi atau direktori
+    yang hilang sesaat.
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"Presisi tidak dikenal: {precision} (pilihan: {', '.join(PRECISIONS)})")
+    svd_components, svd_scale = quantize_rows(svd_components, precision)
+    cluster_centers, centers_scale = quantize_rows(cluster_centers, precision)
+    rating_dtype = np.float32 if precision == 'float64' else np.int8
+    arrays = {
+        'svd_components': svd_components,
+        'cluster_centers': cluster_centers,
+        'matrix_data': np.round(user_item_matrix.data).astype(rating_dtype) if rating_dtype == np.int8
+                       else user_item_matrix.data.astype(rating_dtype),
+        # Dtype index mengikuti scipy (int32/int64) agar csr_matrix tidak menyalin saat dimuat
+        'matrix_indices': user_item_matrix.indices,
+        'matrix_indptr': user_item_matrix.indptr,
+        'user_ids': np.asarray(user_ids, dtype=str),
+        'product_ids': np.asarray(product_ids, dtype=str),
+        'top_items': _pad_top_items(top_items_per_cluster, len(cluster_centers)),
+    }
+    if svd_scale is not None:
+        arrays['svd_components_scale'] = svd_scale
+        arrays['cluster_centers_scale'] = centers_scale
+    sparse_arrays = {}
+    for name, values in (extra_arrays or {}).items():
+        if issparse(values):
+            values = values.tocsr()
+            arrays.update({f'{name}_data': values.data, f'{name}_indices': values.indices,
+                           f'{name}_indptr': values.indptr})
+            sparse_arrays[name] = list(values.shape)
+        else:
+            arrays[name] = values
+
+    artifact_dir = artifact_dir.rstrip('/')
+    snapshot_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{time.perf_counter_ns() % 10 ** 6}"
+    tmp_dir = os.path.join(artifact_dir + SNAPSHOT_SUFFIX, snapshot_id + '.tmp')
+    if os.path.exists(tmp_dir):
+        shutil.rmtree(tmp_dir)
+    os.makedirs(tmp_dir)
+
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'n_users': len(user_ids),
+        'n_products': len(product_ids),
+        'n_clusters': int(len(cluster_centers)),
+        'n_components': int(arrays['svd_components'].shape[0]),
+        'matrix_shape': list(user_item_matrix.shape),
+        'precision': precision,
+        'arrays': {},
+        'sparse_arrays': sparse_arrays,
+    }
+    manifest.update(metadata or {})
+    for name, values in arrays.items():
+        np.save(os.path.join(tmp_dir, f'{name}.npy'), values)
+        manifest['arrays'][name] = {'file': f'{name}.npy', 'dtype': str(values.dtype), 'shape': list(values.shape)}
+    with open(os.path.join(tmp_dir, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    snapshot_dir = os.path.join(artifact_dir + SNAPSHOT_SUFFIX, snapshot_id)
+    os.replace(tmp_dir, snapshot_dir)
+    _flip_pointer(artifact_dir, snapshot_dir)
+    return manifest
+
+def _flip_pointer(artifact_dir, snapshot_dir):
+    """Mengarahkan ``artifact_dir`` (symlink) ke snapshot baru dengan satu rename atomik.
+
+    Seperti pointer CURRENT di model_registry: symlink baru dibuat di samping
+    lalu di-``os.replace`` menimpa yang lama, sehingga ``artifact_dir`` selalu
+    ada dan menunjuk snapshot yang utuh. Direktori artefak lama (bukan symlink)
+    dipindah sekali ke dalam direktori snapshot sebelum pointer pertama dibuat.
+    Snapshot selain ``KEEP_SNAPSHOTS`` terakhir dihapus; pembaca yang masih
+    memegang mmap snapshot terhapus tetap aman sampai file ditutup.
+    """
+    snapshots_root = os.path.dirname(snapshot_dir)
+    if os.path.isdir(artifact_dir) and not os.path.islink(artifact_dir):
+        os.replace(artifact_dir, os.path.join(snapshots_root, f'00000000-000000-legacy-{os.getpid()}'))
+    link_tmp = artifact_dir + '.link.tmp'
+    if os.path.lexists(link_tmp):
+        os.remove(link_tmp)
+    try:
+        os.symlink(os.path.relpath(snapshot_dir, os.path.dirname(artifact_dir) or '.'), link_tmp)
+    except (OSError, NotImplementedError):
+        # Platform tanpa symlink: rename direktori (ada jeda singkat tanpa artefak)
+        if os.path.exists(artifact_dir):
+            shutil.rmtree(artifact_dir)
+        os.replace(snapshot_dir, artifact_dir)
+        return
+    os.replace(link_tmp, artifact_dir)
+
+    current = os.path.basename(snapshot_dir)
+    stale = sorted(name for name in os.listdir(snapshots_root) if name != current and not name.endswith('.tmp'))
+    for name in stale[:max(len(stale) - (KEEP_SNAPSHOTS - 1), 0)]:
+        shutil.rmtree(os.path.join(snapshots_root, name))
+
+def read_manifest(artifact_dir=ARTIFACT_DIR):
+    with open(os.path.join(artifact_dir, MANIFEST_NAME), 'r') as f:
+        return json.load(f)
+
+def load_artifacts(artifact_dir=ARTIFACT_DIR, mmap_mode='r'):
+    """Memuat artefak model; array numerik dibuka memory-mapped (berbagi page OS antar proses).
+
+    Mengembalikan dict berisi ``kmeans``, ``svd``, ``user_ids``, ``product_ids``,
+    ``user_item_matrix``, ``top_items`` (kode produk per cluster, padding -1;
+    decode dengan ``decode_products``) dan ``manifest``.
+    """
+    manifest = read_manifest(artifact_dir)
+    if manifest.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"Versi format artefak tidak didukung: {manifest.get('format_version')}")
+
+    arrays = {
+        name: np.load(os.path.join(artifact_dir, spec['file']), mmap_mode=mmap_mode)
+        for name, spec in manifest['arrays'].items()
+    }
+    user_item_matrix = csr_matrix(
+        (arrays['matrix_data'], arrays['matrix_indices'], arrays['matrix_indptr']),
+        shape=tuple(manifest['matrix_shape']), copy=False
+    )
+    artifacts = {name: values for name, values in arrays.items() if name not in CORE_ARRAYS}
+    for name, shape in manifest.get('sparse_arrays', {}).items():
+        artifacts[name] = csr_matrix(
+            (artifacts.pop(f'{name}_data'), artifacts.pop(f'{name}_indices'), artifacts.pop(f'{name}_indptr')),
+            shape=tuple(shape), copy=False
+        )
+    artifacts.update({
+        'kmeans': ClusterAssigner(arrays['cluster_centers'], arrays.get('cluster_centers_scale')),
+        'svd': LatentProjector(arrays['svd_components'], arrays.get('svd_components_scale')),
+        'user_ids': arrays['user_ids'],
+        'product_ids': arrays['product_ids'],
+        'user_item_matrix': user_item_matrix,
+        'top_items': arrays['top_items'],
+        'manifest': manifest,
+    })
+    return artifacts
@@ -0,0 +1,261 @@
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+from scipy.sparse import csr_matrix, diags, issparse
+from sklearn.metrics import pairwise_distances_argmin
+from threadpoolctl import threadpool_limits
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.evaluate import N_FOLDS, sample_users, build_ground_truth, fold_arrays, split_fold, load_or_fit_fold, fit_fold
+from src.factorization import SVD_BACKENDS
+from src.fold_cache import FIT_PARAMS, model_dir, invalidate
+from src.metrics import METRIC_KS, ranking_metrics, average_metrics, metric_key
+from src.popularity import cluster_popularity, top_k, top_k_scores
+from src.profiling import PipelineProfiler
+from src.ratings_store import load_clean_ratings
+
+# Harness pembanding baseline: beberapa recommender dijalankan pada split KFold yang sama dengan
+# evaluate.py (cache fold) lalu kualitas (metrik ranking) & biaya (waktu training, latensi inferensi
+# per user, ukuran artefak) dilaporkan dalam satu tabel. Semua baseline memakai protokol yang sama:
+# skor per produk untuk tiap user, produk yang sudah dirating di train dibuang, lalu diambil Top-K.
+BASELINES_PATH = 'models/baselines.json'
+BASELINES = ('popularity', 'cluster', 'item_knn', 'svd')
+BASELINE_LABELS = {
+    'popularity': 'Global Popularity',
+    'cluster': 'SVD + K-Means (cluster popularity)',
+    'item_knn': 'Item-kNN (cosine)',
+    'svd': 'Pure SVD (dot product)',
+}
+# User per batch saat scoring agar matrix skor dense (batch x produk) tetap kecil
+BATCH_USERS = 1_024
+# Produk per blok saat membangun similarity item-kNN (memori puncak ~ blok x produk)
+ITEM_BLOCK = 2_048
+
+def _nbytes(state):
+    """Ukuran artefak inferensi: total byte array (dense maupun sparse) di state model."""
+    total = 0
+    for value in state.values():
+        if issparse(value):
+            value = value.tocsr()
+            total += value.data.nbytes + value.indices.nbytes + value.indptr.nbytes
+        elif isinstance(value, np.ndarray):
+            total += value.nbytes
+    return total
+
+def _fit_popularity(matrix_train, models, params):
+    return {'item_scores': np.asarray(matrix_train.sum(axis=0), dtype=np.float32).ravel()}
+
+def _score_popularity(state, user_rows):
+    return np.broadcast_to(state['item_scores'], (user_rows.shape[0], len(state['item_scores'])))
+
+def _fit_cluster(matrix_train, models, params):
+    # Sama dengan evaluate.py / train_model.py: popularitas (SUM rating) per cluster K-Means di ruang SVD
+    popularity = cluster_popularity(matrix_train, models['kmeans'].labels_, params['n_clusters'])
+    return {'components': models['svd'].components_, 'centers': models['kmeans'].cluster_centers_,
+            'popularity': popularity.astype(np.float32)}
+
+def _score_cluster(state, user_rows):
+    labels = pairwise_distances_argmin(user_rows @ state['components'].T, state['centers'])
+    return state['popularity'][labels].toarray()
+
+def _fit_item_knn(matrix_train, models, params):
+    """Similarity cosine item-item, dipangkas ke ``n_neighbors`` tetangga terdekat per produk.
+
+    Dihitung per blok ``ITEM_BLOCK`` produk: similarity (blok x produk) langsung
+    dipangkas dengan top-K sparse, sehingga matrix produk x produk penuh tidak
+    pernah dibentuk.
+    """
+    norms = np.sqrt(np.asarray(matrix_train.multiply(matrix_train).sum(axis=0)).ravel())
+    normalized = (matrix_train @ diags(1 / np.maximum(norms, 1e-12))).tocsc().astype(np.float32)
+    normalized_rows = normalized.tocsr()
+    n_items = matrix_train.shape[1]
+    neighbors = np.full((n_items, min(params['n_neighbors'], n_items)), -1, dtype=np.int32)
+    weights = np.zeros(neighbors.shape, dtype=np.float32)
+    for start in range(0, n_items, ITEM_BLOCK):
+        block = (normalized[:, start:start + ITEM_BLOCK].T @ normalized_rows).tocsr()
+        # Buang similarity produk dengan dirinya sendiri (diagonal blok bergeser sebesar start)
+        block_rows = np.repeat(np.arange(block.shape[0]), np.diff(block.indptr))
+        block.data[block.indices == block_rows + start] = 0
+        block.eliminate_zeros()
+        codes = top_k(block, params['n_neighbors'])
+        neighbors[start:start + block.shape[0]] = codes
+        weights[start:start + block.shape[0]] = top_k_scores(block, codes)
+
+    rows = np.repeat(np.arange(n_items), neighbors.shape[1])
+    keep = neighbors.ravel() >= 0
+    pruned = csr_matrix((weights.ravel()[keep], (rows[keep], neighbors.ravel()[keep])), shape=(n_items, n_items))
+    # Skor user = rating user @ similarity: dibutuhkan kolom tetangga, jadi simpan transpos-nya
+    return {'similarity': pruned.T.tocsr()}
+
+def _score_item_knn(state, user_rows):
+    return (user_rows @ state['similarity']).toarray()
+
+def _fit_svd(matrix_train, models, params):
+    return {'components': models['svd'].components_}
+
+def _score_svd(state, user_rows):
+    return (user_rows @ state['components'].T) @ state['components']
+
+RECOMMENDERS = {
+    'popularity': (_fit_popularity, _score_popularity),
+    'cluster': (_fit_cluster, _score_cluster),
+    'item_knn': (_fit_item_knn, _score_item_knn),
+    'svd': (_fit_svd, _score_svd),
+}
+
+def fit_baseline(name, matrix_train, models, params):
+    """(state inferensi, waktu training detik); waktu SVD/K-Means yang dipakai ikut dihitung."""
+    start = time.perf_counter()
+    state = RECOMMENDERS[name][0](matrix_train, models, params)
+    elapsed = time.perf_counter() - start
+    if name in ('cluster', 'svd'):
+        elapsed += models['svd_stats']['wall_time_s']
+    if name == 'cluster':
+        elapsed += models['kmeans_time_s']
+    return state, elapsed
+
+def recommend_baseline(name, state, user_rows, k):
+    """Kode Top-K (padding -1) per user dari baris rating CSR, tanpa produk yang sudah dirating."""
+    score = RECOMMENDERS[name][1]
+    recommendations = np.full((user_rows.shape[0], k), -1, dtype=np.int32)
+    for start in range(0, user_rows.shape[0], BATCH_USERS):
+        rows = user_rows[start:start + BATCH_USERS]
+        scores = np.array(score(state, rows), dtype=np.float32)
+        seen_rows, seen_cols = rows.nonzero()
+        scores[seen_rows, seen_cols] = -np.inf
+        codes = top_k(scores, k)
+        valid = np.isfinite(np.take_along_axis(scores, codes, axis=1))
+        recommendations[start:start + len(codes), :codes.shape[1]] = np.where(valid, codes, -1)
+    return recommendations
+
+def _evaluate_baselines_fold(arrays, fold, params, baselines, ks, cache_path, n_latency, rng):
+    matrix_train, train_user_ids, train_product_ids, test_data = split_fold(arrays, fold)
+    if cache_path:
+        models, _ = load_or_fit_fold(cache_path, fold, matrix_train, params)
+    else:
+        models = fit_fold(matrix_train, **{name: params[name] for name in FIT_PARAMS})
+    eval_rows, truth, n_relevant = build_ground_truth(test_data, train_user_ids, train_product_ids)
+    user_rows = matrix_train[eval_rows].astype(np.float32)
+    single_rows = rng.choice(len(eval_rows), size=min(n_latency, len(eval_rows)), replace=False)
+    k = max(ks)
+
+    results = {}
+    for name in baselines:
+        state, train_time = fit_baseline(name, matrix_train, models, params)
+
+        start = time.perf_counter()
+        recommendations = recommend_baseline(name, state, user_rows, k)
+        batch_time = time.perf_counter() - start
+        single_ms = []
+        for row in single_rows:
+            start = time.perf_counter()
+            recommend_baseline(name, state, user_rows[row], k)
+            single_ms.append((time.perf_counter() - start) * 1000)
+
+        results[name] = {
+            'train_time_s': train_time,
+            'batch_ms_per_user': batch_time * 1000 / max(len(eval_rows), 1),
+            'single_user_ms': single_ms,
+            'artifact_bytes': _nbytes(state),
+            'metrics': ranking_metrics(recommendations, truth, n_relevant, ks, n_items=matrix_train.shape[1],
+                                       item_vectors=models['svd'].components_.T),
+        }
+    return results
+
+def compare_baselines(baselines=BASELINES, n_components=30, n_clusters=8, svd_backend='truncated', n_iter=5,
+                      n_neighbors=50, max_users=None, n_folds=N_FOLDS, ks=METRIC_KS, n_latency=200,
+                      use_cache=True, invalidate_cache=False, output_path=BASELINES_PATH, random_state=42):
+    """Menjalankan setiap baseline pada fold yang sama lalu menyimpan tabel kualitas & biaya.
+
+    Split KFold dan model SVD/K-Means per fold dibagi dengan ``evaluate.py``
+    lewat cache fold, sehingga sampel & hyperparameter yang sama memakai fold
+    yang persis sama. Latensi diukur satu proses, satu thread BLAS.
+    """
+    print(f"🥊 Memulai Perbandingan Baseline ({', '.join(baselines)}) pada {n_folds} fold...")
+    profiler = PipelineProfiler('baselines')
+    if invalidate_cache:
+        invalidate()
+
+    with profiler.stage('load_ratings') as record:
+        df, _, _ = load_clean_ratings()
+        df_sample = sample_users(df, max_users)
+        record['sample_rows'] = len(df_sample)
+        record['n_users'] = int(df_sample['userId'].nunique())
+
+    params = {'n_components': n_components, 'n_clusters': n_clusters, 'svd_backend': svd_backend, 'n_iter': n_iter,
+              'n_neighbors': n_neighbors}
+    arrays, split_path = fold_arrays(df_sample, n_folds, use_cache)
+    cache_path = model_dir(split_path, params) if use_cache else None
+    rng = np.random.default_rng(random_state)
+
+    folds = []
+    with profiler.stage('folds') as record, threadpool_limits(limits=1):
+        for fold in range(n_folds):
+            start = time.perf_counter()
+            folds.append(_evaluate_baselines_fold(arrays, fold, params, baselines, ks, cache_path, n_latency, rng))
+            print(f"   🔄 Fold {fold + 1}/{n_folds}: {time.perf_counter() - start:.2f}s")
+        record['n_folds'] = n_folds
+
+    rows = []
+    for name in baselines:
+        runs = [fold[name] for fold in folds]
+        single_ms = np.concatenate([run['single_user_ms'] for run in runs])
+        rows.append({
+            'name': name,
+            'label': BASELINE_LABELS[name],
+            'train_time_s': float(np.mean([run['train_time_s'] for run in runs])),
+            'batch_ms_per_user': float(np.mean([run['batch_ms_per_user'] for run in runs])),
+            'single_user_p50_ms': float(np.percentile(single_ms, 50)) if len(single_ms) else None,
+            'single_user_p95_ms': float(np.percentile(single_ms, 95)) if len(single_ms) else None,
+            'artifact_bytes': int(np.mean([run['artifact_bytes'] for run in runs])),
+            'metrics': average_metrics([run['metrics'] for run in runs]),
+        })
+
+    report = {
+        'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'n_folds': n_folds,
+        'n_users': int(df_sample['userId'].nunique()),
+        'ks': sorted(ks),
+        'params': params,
+        'baselines': rows,
+    }
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    with open(output_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    profiler.save()
+
+    k = 10 if 10 in ks else max(ks)
+    print(f"\n   {'baseline':<11} {'train':>8} {'p50 1 user':>11} {'ms/user':>8} {'artefak':>9} "
+          f"{f'P@{k}':>7} {f'R@{k}':>7} {f'NDCG@{k}':>8} {f'Cov@{k}':>7}")
+    for row in rows:
+        metrics = row['metrics']
+        print(f"   {row['name']:<11} {row['train_time_s']:>7.2f}s {row['single_user_p50_ms'] or 0:>9.2f}ms "
+              f"{row['batch_ms_per_user']:>8.3f} {row['artifact_bytes'] / 1024 ** 2:>7.2f}MB "
+              f"{metrics.get(metric_key('precision', k), 0):>7.4f} {metrics.get(metric_key('recall', k), 0):>7.4f} "
+              f"{metrics.get(metric_key('ndcg', k), 0):>8.4f} {metrics.get(metric_key('coverage', k), 0):>7.4f}")
+    print(f"✅ Perbandingan baseline tersimpan di {output_path}")
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bandingkan kualitas & biaya beberapa baseline rekomendasi pada fold yang sama")
+    parser.add_argument('--baselines', nargs='+', choices=BASELINES, default=list(BASELINES),
+                        help="Baseline yang dijalankan")
+    parser.add_argument('--n-components', type=int, default=30, help="Jumlah komponen SVD (cluster & svd)")
+    parser.add_argument('--n-clusters', type=int, default=8, help="Jumlah cluster K-Means")
+    parser.add_argument('--svd-backend', choices=SVD_BACKENDS, default='truncated', help="Backend SVD")
+    parser.add_argument('--n-iter', type=int, default=5, help="Iterasi randomized SVD")
+    parser.add_argument('--n-neighbors', type=int, default=50, help="Jumlah tetangga per produk (item_knn)")
+    parser.add_argument('--max-users', type=int, default=0, help="Batas jumlah user yang dievaluasi (0 = semua user)")
+    parser.add_argument('--n-folds', type=int, default=N_FOLDS, help="Jumlah fold")
+    parser.add_argument('--ks', type=int, nargs='+', default=list(METRIC_KS), help="Nilai K untuk metrik ranking")
+    parser.add_argument('--n-latency', type=int, default=200, help="Jumlah user per fold untuk latensi inferensi 1 user")
+    parser.add_argument('--no-cache', action='store_true', help="Jangan baca/tulis cache split & model fold")
+    parser.add_argument('--invalidate-cache', action='store_true', help="Hapus cache fold sebelum evaluasi")
+    args = parser.parse_args()
+    compare_baselines(baselines=args.baselines, n_components=args.n_components, n_clusters=args.n_clusters,
+                      svd_backend=args.svd_backend, n_iter=args.n_iter, n_neighbors=args.n_neighbors,
+                      max_users=args.max_users or None, n_folds=args.n_folds, ks=args.ks, n_latency=args.n_latency,
+                      use_cache=not args.no_cache, invalidate_cache=args.invalidate_cache)
@@ -0,0 +1,203 @@
+import os
+import sys
+import json
+import time
+import argparse
+import joblib
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.metrics import silhouette_score
+from threadpoolctl import threadpool_limits
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.factorization import iter_row_blocks
+from src.shared_arrays import share_arrays, attach_arrays, release
+
+# Mode clustering untuk train_model:
+# - full      : KMeans biasa pada seluruh fitur SVD di memori (n_init=10)
+# - minibatch : MiniBatchKMeans.partial_fit per batch baris dari fitur SVD memory-mapped,
+#               dengan checkpoint antar batch sehingga training bisa dilanjutkan
+CLUSTER_MODES = ('full', 'minibatch')
+REDUCED_PATH = 'data/matrix_reduced.npy'
+CHECKPOINT_PATH = 'models/kmeans_checkpoint.pkl'
+BENCHMARK_PATH = 'models/clustering_benchmark.json'
+K_RANGE = tuple(range(4, 21, 2))
+
+def load_reduced_features(path=REDUCED_PATH, mmap_mode='r'):
+    """Fitur SVD (n_user x n_komponen) hasil preprocessing, default memory-mapped."""
+    return np.load(path, mmap_mode=mmap_mode)
+
+def assign_clusters(model, features, batch_size=100_000):
+    """Label cluster & inertia dihitung per batch (memori ~ satu batch)."""
+    labels = np.empty(features.shape[0], dtype=np.int32)
+    inertia = 0.0
+    centers = model.cluster_centers_
+    for start, block in iter_row_blocks(features, batch_size):
+        block = np.asarray(block, dtype=np.float64)
+        block_labels = model.predict(block)
+        labels[start:start + len(block)] = block_labels
+        inertia += float(((block - centers[block_labels]) ** 2).sum())
+    return labels, inertia
+
+def fit_full(features, n_clusters, random_state=42):
+    """KMeans full-batch (perilaku lama train_model)."""
+    kmeans = KMeans(n_clusters=n_clusters, random_state=random_state, n_init=10)
+    kmeans.fit(np.asarray(features))
+    return kmeans, kmeans.labels_.astype(np.int32), float(kmeans.inertia_)
+
+def fit_minibatch(features, n_clusters, batch_size=10_000, n_epochs=3, checkpoint_path=CHECKPOINT_PATH,
+                  checkpoint_every=10, resume=False, random_state=42):
+    """MiniBatchKMeans yang membaca fitur per batch (cocok untuk array memory-mapped).
+
+    Urutan batch diacak per epoch (seed tetap) namun tiap batch adalah blok baris
+    kontigu agar akses mmap tetap sekuensial. Sisa baris di ujung (kurang dari
+    ``batch_size``) digabung ke batch sebelumnya, sehingga setiap batch -
+    termasuk batch pertama yang dipakai inisialisasi k-means++ - berisi minimal
+    ``batch_size`` >= ``n_clusters`` baris. Model & posisi (epoch, batch)
+    disimpan ke ``checkpoint_path`` tiap ``checkpoint_every`` batch; dengan
+    ``resume=True`` training dilanjutkan dari checkpoint terakhir.
+    """
+    n_rows = features.shape[0]
+    if batch_size < n_clusters:
+        raise ValueError(f"batch_size ({batch_size}) harus >= n_clusters ({n_clusters})")
+    if n_rows < n_clusters:
+        raise ValueError(f"Jumlah baris ({n_rows}) lebih kecil dari n_clusters ({n_clusters})")
+    starts = np.arange(0, n_rows, batch_size)
+    if len(starts) > 1 and n_rows - starts[-1] < batch_size:
+        starts = starts[:-1]
+    stops = dict(zip(starts, np.append(starts[1:], n_rows)))
+    rng = np.random.default_rng(random_state)
+    orders = [rng.permutation(starts) for _ in range(n_epochs)]
+
+    model, epoch, position = None, 0, 0
+    if resume and checkpoint_path and os.path.exists(checkpoint_path):
+        checkpoint = joblib.load(checkpoint_path)
+        if checkpoint['n_clusters'] == n_clusters and checkpoint['batch_size'] == batch_size:
+            model, epoch, position = checkpoint['model'], checkpoint['epoch'], checkpoint['position']
+            print(f"   ↳ Melanjutkan dari checkpoint (epoch {epoch + 1}, batch {position})")
+    if model is None:
+        # Inisialisasi k-means++ memakai batch pertama (selalu >= batch_size baris, lihat di atas)
+        model = MiniBatchKMeans(n_clusters=n_clusters, batch_size=batch_size, random_state=random_state)
+
+    def save_checkpoint(epoch, position):
+        if checkpoint_path:
+            os.makedirs(os.path.dirname(checkpoint_path) or '.', exist_ok=True)
+            joblib.dump({'model': model, 'epoch': epoch, 'position': position,
+                         'n_clusters': n_clusters, 'batch_size': batch_size}, checkpoint_path + '.tmp')
+            os.replace(checkpoint_path + '.tmp', checkpoint_path)
+
+    n_batches = 0
+    while epoch < n_epochs:
+        while position < len(starts):
+            start = orders[epoch][position]
+            model.partial_fit(np.asarray(features[start:stops[start]], dtype=np.float64))
+            position += 1
+            n_batches += 1
+            if n_batches % checkpoint_every == 0:
+                save_checkpoint(epoch, position)
+        epoch, position = epoch + 1, 0
+        save_checkpoint(epoch, position)
+
+    labels, inertia = assign_clusters(model, features)
+    return model, labels, inertia
+
+def fit_clusters(features, n_clusters, mode='full', **minibatch_kwargs):
+    """Menjalankan mode clustering terpilih; mengembalikan (model, labels, inertia)."""
+    if mode == 'full':
+        return fit_full(features, n_clusters)
+    if mode == 'minibatch':
+        return fit_minibatch(features, n_clusters, **minibatch_kwargs)
+    raise ValueError(f"Mode clustering tidak dikenal: {mode} (pilihan: {', '.join(CLUSTER_MODES)})")
+
+def _score_k(spec, n_clusters, silhouette_size, random_state):
+    """Worker: fit K-Means pada sampel (shared memory) lalu hitung silhouette tersampel & inertia."""
+    handles, arrays = attach_arrays(spec)
+    try:
+        with threadpool_limits(limits=1):
+            sample = arrays['sample']
+            start = time.perf_counter()
+            kmeans = KMeans(n_clusters=n_clusters, random_state=random_state, n_init=3).fit(sample)
+            silhouette = silhouette_score(sample, kmeans.labels_, sample_size=min(silhouette_size, len(sample)),
+                                          random_state=random_state)
+            return {
+                'k': int(n_clusters),
+                'silhouette': float(silhouette),
+                'inertia_per_user': float(kmeans.inertia_ / len(sample)),
+                'fit_time_s': round(time.perf_counter() - start, 4),
+            }
+    finally:
+        del arrays
+        release(handles)
+
+def select_n_clusters(features, k_range=K_RANGE, sample_size=20_000, silhouette_size=5_000, workers=None,
+                      random_state=42):
+    """Memilih jumlah cluster dengan scan k paralel pada sampel user.
+
+    Tiap kandidat k di-fit pada sampel ``sample_size`` user dan dinilai dengan
+    silhouette atas ``silhouette_size`` titik (O(m^2) pada sampel kecil, bukan
+    seluruh user). k dengan silhouette tertinggi dipilih. Mengembalikan
+    (k terpilih, dict hasil scan berisi kurva silhouette & inertia per k).
+    """
+    n_sample = min(sample_size, features.shape[0])
+    valid = [k for k in k_range if 2 <= k < n_sample]
+    if not valid:
+        raise ValueError(f"Tidak ada kandidat k yang valid di k_range={list(k_range)}: "
+                         f"k harus 2 <= k < ukuran sampel ({n_sample})")
+    k_range = valid
+    rng = np.random.default_rng(random_state)
+    rows = np.sort(rng.choice(features.shape[0], size=n_sample, replace=False))
+    sample = np.asarray(features[rows], dtype=np.float64)
+    workers = min(workers or os.cpu_count(), len(k_range))
+
+    handles, spec = share_arrays({'sample': sample})
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            curve = list(pool.map(_score_k, [spec] * len(k_range), k_range,
+                                  [silhouette_size] * len(k_range), [random_state] * len(k_range)))
+    finally:
+        release(handles, unlink=True)
+
+    best = max(curve, key=lambda point: (point['silhouette'], -point['k']))
+    return best['k'], {
+        'method': 'sampled_silhouette',
+        'chosen_k': best['k'],
+        'sample_size': int(len(sample)),
+        'silhouette_size': int(min(silhouette_size, len(sample))),
+        'curve': curve,
+    }
+
+def benchmark_clustering(n_clusters=10, batch_sizes=(2_000, 10_000), n_epochs=3, features_path=REDUCED_PATH,
+                         output_path=BENCHMARK_PATH):
+    """Membandingkan waktu & inertia full-batch KMeans vs MiniBatchKMeans pada fitur SVD yang sama."""
+    print("⏱️ Benchmark Clustering (full vs mini-batch)...")
+    features = load_reduced_features(features_path)
+    runs = [('full', {})] + [('minibatch', {'batch_size': size, 'n_epochs': n_epochs, 'checkpoint_path': None})
+                             for size in batch_sizes]
+
+    results = []
+    for mode, kwargs in runs:
+        start = time.perf_counter()
+        _, _, inertia = fit_clusters(features, n_clusters, mode, **kwargs)
+        results.append(dict(mode=mode, n_clusters=n_clusters, fit_time_s=round(time.perf_counter() - start, 4),
+                            inertia=inertia, **{k: v for k, v in kwargs.items() if k != 'checkpoint_path'}))
+    full_inertia = results[0]['inertia']
+    for result in results:
+        result['inertia_vs_full'] = result['inertia'] / full_inertia
+        print(f"   {result['mode']:<9} batch {result.get('batch_size', '-'):>6} | "
+              f"{result['fit_time_s']:.2f}s | inertia {result['inertia']:.4g} ({result['inertia_vs_full']:.3f}x full)")
+
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    with open(output_path, 'w') as f:
+        json.dump({'n_users': int(features.shape[0]), 'n_components': int(features.shape[1]),
+                   'runs': results}, f, indent=2)
+    print(f"✅ Hasil benchmark tersimpan di {output_path}")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark KMeans full-batch vs mini-batch pada fitur SVD")
+    parser.add_argument('--n-clusters', type=int, default=10)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[2_000, 10_000])
+    parser.add_argument('--epochs', type=int, default=3)
+    args = parser.parse_args()
+    benchmark_clustering(args.n_clusters, args.batch_sizes, args.epochs)
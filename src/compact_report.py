@@ -0,0 +1,176 @@
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.artifacts import ARTIFACT_DIR, CORE_ARRAYS, PRECISIONS, load_artifacts, save_artifacts
+from src.ranking import BLEND_ALPHA, rank_candidates
+from src.evaluate import N_FOLDS, build_ground_truth, fold_arrays, split_fold, load_or_fit_fold
+from src.fold_cache import model_dir
+from src.metrics import ranking_metrics, metric_key
+from src.popularity import TOP_K, cluster_popularity, top_k, top_k_scores
+from src.ratings_store import load_clean_ratings
+
+# Laporan artefak ringkas: artefak aktif ditulis ulang pada tiap presisi, lalu inferensi
+# (proyeksi SVD -> assign cluster -> re-ranking) dijalankan langsung pada bentuk ringkasnya.
+# Dua ukuran kualitas: overlap top-k dengan hasil float64 (seberapa mirip), dan precision/recall
+# terhadap rating held-out (fold pertama split evaluate.py) untuk model fold yang dikuantisasi sama.
+COMPACT_DIR = 'models/compact'
+COMPACT_REPORT_PATH = 'models/compact_report.json'
+# Array yang ikut menentukan memori inferensi (faktor laten + matrix rating)
+INFERENCE_ARRAYS = ('svd_components', 'svd_components_scale', 'cluster_centers', 'cluster_centers_scale',
+                    'matrix_data', 'matrix_indices', 'matrix_indptr')
+
+def _dir_bytes(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+def _inference_bytes(artifact_dir, manifest):
+    return sum(os.path.getsize(os.path.join(artifact_dir, manifest['arrays'][name]['file']))
+               for name in INFERENCE_ARRAYS if name in manifest['arrays'])
+
+def _infer(artifacts, rows, k, alpha):
+    """Inferensi penuh seperti user baru di Dashboard: (label cluster, kode top-k)."""
+    labels = artifacts['kmeans'].predict(artifacts['svd'].transform(rows)).astype(np.int32)
+    codes, _ = rank_candidates(rows, labels, artifacts['top_items'], artifacts['top_scores'],
+                               artifacts['svd'], k, alpha)
+    return labels, codes
+
+def _resave(artifacts, output_dir, precision):
+    """Menulis ulang artefak (faktor dalam float64 penuh) ke ``output_dir`` pada presisi tertentu."""
+    manifest = artifacts['manifest']
+    extra_arrays = {name: artifacts[name] for name in manifest['sparse_arrays']}
+    extra_arrays.update({name: artifacts[name] for name in manifest['arrays']
+                         if name not in CORE_ARRAYS and name in artifacts})
+    return save_artifacts(
+        output_dir,
+        svd_components=artifacts['svd'].dense_components(),
+        cluster_centers=artifacts['kmeans'].cluster_centers_,
+        user_item_matrix=artifacts['user_item_matrix'],
+        user_ids=artifacts['user_ids'],
+        product_ids=artifacts['product_ids'],
+        top_items_per_cluster=np.asarray(artifacts['top_items']),
+        extra_arrays=extra_arrays,
+        precision=precision,
+    )
+
+def _heldout_split(n_components, n_clusters, n_folds=N_FOLDS):
+    """Fold pertama split KFold evaluate.py + model SVD/K-Means fold itu (cache fold) berukuran sama dengan artefak."""
+    df, _, _ = load_clean_ratings()
+    arrays, split_path = fold_arrays(df, n_folds)
+    matrix_train, train_user_ids, train_product_ids, test_data = split_fold(arrays, 0)
+    params = {'n_components': n_components, 'n_clusters': n_clusters, 'svd_backend': 'truncated', 'n_iter': 5}
+    models, _ = load_or_fit_fold(model_dir(split_path, params), 0, matrix_train, params)
+    eval_rows, truth, n_relevant = build_ground_truth(test_data, train_user_ids, train_product_ids)
+    return matrix_train, train_user_ids, train_product_ids, models, eval_rows, truth, n_relevant
+
+def _heldout_quality(split, precision, output_dir, users, k, alpha):
+    """Precision/recall/NDCG@k model fold pada ``precision`` terhadap rating held-out (metrik evaluate.py)."""
+    matrix_train, train_user_ids, train_product_ids, models, eval_rows, truth, n_relevant = split
+    popularity = cluster_popularity(matrix_train, models['kmeans'].labels_, models['kmeans'].n_clusters)
+    top_items = top_k(popularity, TOP_K)
+    save_artifacts(output_dir, svd_components=models['svd'].components_,
+                   cluster_centers=models['kmeans'].cluster_centers_, user_item_matrix=matrix_train,
+                   user_ids=train_user_ids, product_ids=train_product_ids, top_items_per_cluster=top_items,
+                   extra_arrays={'top_scores': top_k_scores(popularity, top_items)}, precision=precision)
+    artifacts = load_artifacts(output_dir)
+    _, codes = _infer(artifacts, artifacts['user_item_matrix'][eval_rows[users]], k, alpha)
+    metrics = ranking_metrics(codes, truth[users], n_relevant[users], ks=(k,), n_items=matrix_train.shape[1])
+    return {f'heldout_{name}_at_{k}': metrics[metric_key(name, k)] for name in ('precision', 'recall', 'ndcg')}
+
+def compact_report(artifact_dir=ARTIFACT_DIR, precisions=PRECISIONS, n_users=2_000, k=10, n_single=200,
+                   output_dir=COMPACT_DIR, output_path=COMPACT_REPORT_PATH, random_state=42):
+    """Membandingkan memori, latensi inferensi & kualitas tiap presisi.
+
+    ``overlap_at_k`` = irisan top-k tiap presisi dengan top-k presisi acuan
+    (float64) pada user yang sama; ini kemiripan, bukan akurasi.
+    ``heldout_*_at_k`` = precision/recall/NDCG@k terhadap rating held-out:
+    model fold pertama split ``evaluate.py`` (ukuran SVD & cluster sama dengan
+    artefak) dikuantisasi pada presisi tersebut lalu dinilai dengan
+    ``src.metrics``. Artefak sumber harus float64; artefak yang sudah
+    terkuantisasi tidak bisa menjadi acuan.
+    """
+    print("📦 Laporan Artefak Ringkas (float64 vs presisi rendah)...")
+    source = load_artifacts(artifact_dir)
+    if 'top_scores' not in source:
+        print("❌ Artefak belum menyimpan skor top-list. Jalankan 'python src/train_model.py' ulang.")
+        return
+    if source['manifest'].get('precision', 'float64') != 'float64':
+        print(f"❌ Artefak di {artifact_dir}/ sudah terkuantisasi ({source['manifest']['precision']}); "
+              f"acuan harus float64. Jalankan 'python src/train_model.py --precision float64' ulang.")
+        return
+    alpha = source['manifest'].get('ranking', {}).get('blend_alpha', BLEND_ALPHA)
+    rng = np.random.default_rng(random_state)
+    users = np.sort(rng.choice(len(source['user_ids']), size=min(n_users, len(source['user_ids'])), replace=False))
+
+    print("   ↳ Menyiapkan split held-out (fold 1 evaluate.py)...")
+    split = _heldout_split(source['svd'].dense_components().shape[0], len(source['kmeans'].cluster_centers_))
+    n_eval = len(split[4])
+    heldout_users = np.sort(rng.choice(n_eval, size=min(n_users, n_eval), replace=False))
+
+    reference, results = None, []
+    for precision in precisions:
+        target_dir = os.path.join(output_dir, precision)
+        _resave(source, target_dir, precision)
+        artifacts = load_artifacts(target_dir)
+        manifest = artifacts['manifest']
+        rows = artifacts['user_item_matrix'][users]
+
+        start = time.perf_counter()
+        labels, codes = _infer(artifacts, rows, k, alpha)
+        batch_ms = (time.perf_counter() - start) * 1000
+        single_ms = []
+        for row in range(min(n_single, len(users))):
+            start = time.perf_counter()
+            _infer(artifacts, rows[row], k, alpha)
+            single_ms.append((time.perf_counter() - start) * 1000)
+
+        if reference is None:
+            # Presisi pertama (default float64) menjadi acuan
+            reference = (precision, labels, codes)
+        hits = np.array([len(np.intersect1d(got[got >= 0], ref[ref >= 0])) for got, ref in zip(codes, reference[2])])
+        n_got, n_ref = (codes >= 0).sum(axis=1), (reference[2] >= 0).sum(axis=1)
+        # User tanpa kandidat tersisa di kedua versi dihitung cocok sempurna
+        both_empty = (n_got == 0) & (n_ref == 0)
+        n_longest = np.maximum(np.maximum(n_got, n_ref), 1)
+        results.append({
+            'precision': precision,
+            'disk_bytes': _dir_bytes(target_dir),
+            'inference_bytes': _inference_bytes(target_dir, manifest),
+            'batch_users': int(len(users)),
+            'batch_ms_per_user': batch_ms / len(users),
+            'single_user_p50_ms': float(np.percentile(single_ms, 50)),
+            'single_user_p95_ms': float(np.percentile(single_ms, 95)),
+            'cluster_agreement': float((labels == reference[1]).mean()),
+            f'overlap_at_{k}': float(np.mean(np.where(both_empty, 1.0, hits / n_longest))),
+            **_heldout_quality(split, precision, os.path.join(output_dir, 'heldout', precision), heldout_users, k, alpha),
+        })
+
+    base = results[0]
+    print(f"   {'presisi':<8} {'disk':>9} {'inferensi':>10} {'ms/user':>8} {'p50 1 user':>11} "
+          f"{'cluster':>8} {'overlap':>8} {f'P@{k}':>7} {f'R@{k}':>7} {f'NDCG@{k}':>8}")
+    for result in results:
+        result['inference_bytes_vs_reference'] = result['inference_bytes'] / base['inference_bytes']
+        print(f"   {result['precision']:<8} {result['disk_bytes'] / 1024 ** 2:>7.1f}MB "
+              f"{result['inference_bytes'] / 1024 ** 2:>8.1f}MB {result['batch_ms_per_user']:>8.3f} "
+              f"{result['single_user_p50_ms']:>9.2f}ms {result['cluster_agreement']:>8.3f} "
+              f"{result[f'overlap_at_{k}']:>8.3f} {result[f'heldout_precision_at_{k}']:>7.4f} "
+              f"{result[f'heldout_recall_at_{k}']:>7.4f} {result[f'heldout_ndcg_at_{k}']:>8.4f}")
+
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    with open(output_path, 'w') as f:
+        json.dump({'reference': reference[0], 'k': k, 'heldout': {'fold': 1, 'n_folds': N_FOLDS,
+                   'n_users': int(len(heldout_users))}, 'runs': results}, f, indent=2)
+    print(f"✅ Laporan tersimpan di {output_path} (artefak ringkas di {output_dir}/)")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bandingkan artefak ringkas (float32/float16/int8) dengan float64")
+    parser.add_argument('--precisions', nargs='+', choices=PRECISIONS, default=list(PRECISIONS),
+                        help="Presisi yang dibandingkan; yang pertama menjadi acuan")
+    parser.add_argument('--n-users', type=int, default=2_000, help="Jumlah user sampel untuk inferensi")
+    parser.add_argument('--k', type=int, default=10, help="Panjang daftar rekomendasi untuk overlap & precision/recall held-out")
+    args = parser.parse_args()
+    compact_report(precisions=args.precisions, n_users=args.n_users, k=args.k)
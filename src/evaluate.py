@@ -1,109 +1,452 @@
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import KFold
-from scipy.sparse import csr_matrix
-from sklearn.decomposition import TruncatedSVD
 from sklearn.cluster import KMeans
 import json
 import os
+import sys
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from scipy.sparse import csr_matrix
+from threadpoolctl import threadpool_limits
 
-def evaluate_model_cv():
-    print("📈 Memulai Evaluasi 5-Fold Cross Validation...")
-    
-    df = pd.read_csv('data/clean_ratings.csv')
-    
-    # Sampling user agar tidak terlalu lama (1000 user cukup untuk estimasi)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.preprocessing import build_user_item_matrix
+from src.popularity import cluster_popularity, top_k
+from src.ratings_store import load_clean_ratings
+from src.factorization import SVD_BACKENDS, factorize
+from src.profiling import PipelineProfiler, describe_matrix
+from src.shared_arrays import share_arrays, attach_arrays, release
+from src.fold_cache import (FIT_PARAMS, data_fingerprint, split_dir, model_dir, load_splits, save_splits,
+                            has_fold_models, load_fold_models, save_fold_models, invalidate)
+from src.metrics import METRIC_KS, ranking_metrics, hit_matrix, average_metrics, split_metric_key
+
+N_FOLDS = 5
+
+def sample_users(df, max_users=1000):
+    """Sampling user agar tidak terlalu lama; ``max_users=None`` memakai semua user."""
     unique_users = df['userId'].unique()
-    if len(unique_users) > 1000:
-        sampled_users = unique_users[:1000]
-    else:
-        sampled_users = unique_users
-        
-    df_sample = df[df['userId'].isin(sampled_users)]
-    
-    kf = KFold(n_splits=5, shuffle=True, random_state=42)
-    
-    fold_precision = []
-    fold_recall = []
-    fold_f1 = []
+    if max_users and len(unique_users) > max_users:
+        return df[df['userId'].isin(unique_users[:max_users])]
+    return df
+
+def stratified_user_order(df, n_strata=4, random_state=42):
+    """Urutan user acak terstratifikasi menurut aktivitas (jumlah rating).
+
+    User dibagi ke ``n_strata`` kuantil aktivitas berukuran sama; tiap prefiks
+    urutan berisi jumlah user yang (hampir) sama dari setiap strata, jadi
+    sampel bisa diperbesar bertahap tanpa kehilangan stratifikasi.
+    Mengembalikan (array userId terurut, array id strata sejajar).
+    """
+    counts = df['userId'].value_counts()
+    n_strata = max(1, min(n_strata, len(counts)))
+    strata = pd.qcut(counts.rank(method='first'), n_strata, labels=False).values
+    rng = np.random.default_rng(random_state)
+    position = np.empty(len(counts))
+    for stratum in range(n_strata):
+        members = np.flatnonzero(strata == stratum)
+        position[rng.permutation(members)] = (np.arange(len(members)) + rng.random()) / len(members)
+    order = np.argsort(position, kind='stable')
+    return counts.index.values[order], strata[order]
+
+def bootstrap_ci(user_precision, user_recall, strata, n_boot=1_000, confidence=0.95, random_state=42,
+                 chunk_size=100):
+    """Interval kepercayaan bootstrap (persentil) precision/recall/F1 rata-rata per user.
+
+    Resampling dilakukan di dalam tiap strata aktivitas (bootstrap terstratifikasi).
+    """
+    rng = np.random.default_rng(random_state)
+    sums = np.zeros((2, n_boot))
+    for stratum in np.unique(strata):
+        values = np.vstack([user_precision, user_recall])[:, strata == stratum]
+        for start in range(0, n_boot, chunk_size):
+            size = min(chunk_size, n_boot - start)
+            picks = rng.integers(0, values.shape[1], size=(size, values.shape[1]))
+            sums[:, start:start + size] = sums[:, start:start + size] + values[:, picks].sum(axis=2)
+    precision, recall = sums / len(strata)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+
+    tail = (1 - confidence) / 2 * 100
+    point_precision, point_recall = float(np.mean(user_precision)), float(np.mean(user_recall))
+    point_f1 = 2 * point_precision * point_recall / (point_precision + point_recall) if point_precision + point_recall > 0 else 0.0
+    return {
+        name: {'mean': point, 'low': float(np.percentile(samples, tail)), 'high': float(np.percentile(samples, 100 - tail))}
+        for name, point, samples in (('precision', point_precision, precision), ('recall', point_recall, recall),
+                                     ('f1_score', point_f1, f1))
+    }
+
+def build_ground_truth(test_data, train_user_ids, train_product_ids, min_rating=4):
+    """Ground truth test sebagai matrix sparse, tanpa filter DataFrame per user.
+
+    Mengembalikan (baris train user yang dinilai, matrix biner CSR user x produk
+    train berisi produk yang disukai, jumlah produk disukai per user). Produk
+    yang tidak ada di train tetap dihitung di penyebut recall meski tidak
+    mungkin direkomendasikan.
+    """
+    liked = test_data[test_data['rating'] >= min_rating]
+    user_rows = pd.Index(train_user_ids).get_indexer(liked['userId'].values)
+    in_train = user_rows >= 0
+    user_rows = user_rows[in_train]
+    product_codes = pd.Index(train_product_ids).get_indexer(liked['productId'].values[in_train])
+
+    eval_rows, eval_index = np.unique(user_rows, return_inverse=True)
+    n_relevant = np.bincount(eval_index, minlength=len(eval_rows))
+    known = product_codes >= 0
+    truth = csr_matrix((np.ones(known.sum(), dtype=np.float32), (eval_index[known], product_codes[known])),
+                       shape=(len(eval_rows), len(train_product_ids)))
+    truth.sum_duplicates()
+    truth.data[:] = 1
+    return eval_rows, truth, n_relevant
+
+def fit_fold(matrix_train, n_components=30, n_clusters=8, svd_backend='truncated', n_iter=5):
+    """Fit SVD + K-Means untuk satu fold; hasilnya (dict) bisa disimpan di cache fold."""
+    svd, matrix_reduced, svd_stats = factorize(matrix_train, n_components=n_components, backend=svd_backend, n_iter=n_iter)
+
+    kmeans_start = time.perf_counter()
+    kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=5)
+    kmeans.fit(matrix_reduced)
+    kmeans_time = time.perf_counter() - kmeans_start
+    return {'svd': svd, 'matrix_reduced': matrix_reduced, 'svd_stats': svd_stats, 'kmeans': kmeans,
+            'kmeans_time_s': round(kmeans_time, 4)}
+
+def evaluate_fold(matrix_train, train_user_ids, train_product_ids, test_data, n_components=30, n_clusters=8,
+                  svd_backend='truncated', n_iter=5, top_n=10, per_user=False, ks=METRIC_KS, models=None,
+                  score_users=None):
+    """Melatih SVD + K-Means pada matrix train lalu menghitung Precision/Recall@top_n pada data test.
+
+    ``models`` (hasil ``fit_fold``, mis. dari cache fold) melewati tahap fit.
+    ``score_users`` (array userId) membatasi scoring ke user tersebut tanpa
+    mengubah data train.
+
+    Top-K tiap cluster dihitung sekali per fold, cluster semua user test
+    diprediksi dalam satu panggilan, dan hit dihitung dengan operasi sparse.
+    Mengembalikan dict metrik fold (precision/recall/f1 bernilai None bila tidak
+    ada user yang bisa dinilai), ``metrics`` berisi metrik ranking @K untuk
+    setiap K di ``ks`` (lihat ``src.metrics``), beserta waktu SVD & K-Means; dengan
+    ``per_user=True`` juga array ``user_ids``/``user_precision``/``user_recall``.
+    """
+    models = models or fit_fold(matrix_train, n_components, n_clusters, svd_backend, n_iter)
+    svd, matrix_reduced, svd_stats, kmeans = (models[key] for key in ('svd', 'matrix_reduced', 'svd_stats', 'kmeans'))
+
+    # Evaluation Logic (Test)
+    if score_users is not None:
+        test_data = test_data[test_data['userId'].isin(score_users)]
+    # Ground Truth: Barang yang user beri rating >= 4 di data Test
+    eval_rows, truth, n_relevant = build_ground_truth(test_data, train_user_ids, train_product_ids)
+
+    # Top Items per Cluster (SUM/Popularity, konsisten dengan train_model.py), sekali per fold
+    popularity = cluster_popularity(matrix_train, kmeans.labels_, n_clusters)
+    top_items = top_k(popularity, max(top_n, *ks))
+
+    # Cluster semua user test sekaligus, lalu ambil top-list cluster-nya
+    user_clusters = kmeans.predict(matrix_reduced[eval_rows])
+    recommendations = top_items[user_clusters]
+    hits = hit_matrix(recommendations[:, :top_n], truth).sum(axis=1)
+
+    result = {'precision': None, 'recall': None, 'f1_score': None, 'n_users': int(len(eval_rows)),
+              'svd_time_s': svd_stats['wall_time_s'], 'svd_peak_memory_mb': svd_stats['peak_memory_mb'],
+              'explained_variance_ratio': svd_stats['explained_variance_ratio'],
+              'kmeans_time_s': models['kmeans_time_s'],
+              'metrics': ranking_metrics(recommendations, truth, n_relevant, ks, n_items=matrix_train.shape[1],
+                                         item_vectors=svd.components_.T)}
+    if len(eval_rows):
+        precision, recall = np.mean(hits / float(top_n)), np.mean(hits / n_relevant)
+        result['precision'] = float(precision)
+        result['recall'] = float(recall)
+        result['f1_score'] = float(2 * (precision * recall) / (precision + recall)) if (precision + recall) > 0 else 0.0
+    if per_user:
+        result['user_ids'] = np.asarray(train_user_ids)[eval_rows]
+        result['user_precision'] = hits / float(top_n)
+        result['user_recall'] = hits / n_relevant
+    return result
+
+def split_fold(arrays, fold):
+    """(matrix train, userId train, productId train, DataFrame test) fold ``fold`` dari array rating ter-encode."""
+    is_test = arrays['fold_ids'] == fold
+    columns = {'userId': arrays['user_codes'], 'productId': arrays['product_codes'], 'rating': arrays['ratings']}
+    train_data = pd.DataFrame({name: values[~is_test] for name, values in columns.items()})
+    test_data = pd.DataFrame({name: values[is_test] for name, values in columns.items()})
+    matrix_train, train_user_ids, train_product_ids = build_user_item_matrix(train_data)
+    return matrix_train, train_user_ids, train_product_ids, test_data
+
+def load_or_fit_fold(cache_path, fold, matrix_train, params):
+    """(model fold, dari cache?): dimuat dari cache fold bila ada, jika tidak di-fit lalu disimpan."""
+    models = load_fold_models(cache_path, fold)
+    if models is not None:
+        return models, True
+    models = fit_fold(matrix_train, **{name: params[name] for name in FIT_PARAMS if name in params})
+    save_fold_models(cache_path, fold, models)
+    return models, False
+
+def _evaluate_fold_arrays(arrays, fold, params, cache_path=None):
+    """Membangun split train/test fold ``fold`` dari array rating ter-encode lalu mengevaluasinya.
+
+    Dengan ``cache_path`` model fold dimuat dari cache bila ada, jika tidak di-fit lalu disimpan.
+    """
+    start = time.perf_counter()
+    matrix_train, train_user_ids, train_product_ids, test_data = split_fold(arrays, fold)
+    build_time = time.perf_counter() - start
+
+    models, cached = load_or_fit_fold(cache_path, fold, matrix_train, params) if cache_path else (None, False)
+
+    result = evaluate_fold(matrix_train, train_user_ids, train_product_ids, test_data, models=models, **params)
+    result.update(describe_matrix(matrix_train))
+    result['fold'] = fold + 1
+    result['cached'] = cached
+    result['build_matrix_time_s'] = round(build_time, 4)
+    result['fold_time_s'] = round(time.perf_counter() - start, 4)
+    return result
+
+def _run_fold(spec, fold, params, cache_path=None):
+    """Worker: buka rating dari shared memory lalu evaluasi satu fold."""
+    handles, arrays = attach_arrays(spec)
+    try:
+        # Satu thread BLAS/OpenMP per worker agar fold paralel tidak oversubscribe core
+        with threadpool_limits(limits=1):
+            return _evaluate_fold_arrays(arrays, fold, params, cache_path)
+    finally:
+        del arrays
+        release(handles)
+
+def fold_arrays(df_sample, n_folds=N_FOLDS, use_cache=True, seed=42):
+    """Array rating ter-encode + id fold KFold per baris; mengembalikan (array, direktori split di cache).
+
+    Dengan ``use_cache`` id fold dibaca/ditulis di cache fold (kunci fingerprint
+    data, seed & jumlah fold) sehingga semua pemakai mendapat split yang sama.
+    """
+    arrays = {
+        'user_codes': df_sample['userId'].values,
+        'product_codes': df_sample['productId'].values,
+        'ratings': df_sample['rating'].values,
+    }
+    split_path = split_dir(data_fingerprint(arrays), seed, n_folds) if use_cache else None
+    fold_ids = load_splits(split_path) if use_cache else None
+    if fold_ids is None:
+        kf = KFold(n_splits=n_folds, shuffle=True, random_state=seed)
+        fold_ids = np.empty(len(df_sample), dtype=np.int8)
+        for fold, (_, test_index) in enumerate(kf.split(df_sample)):
+            fold_ids[test_index] = fold
+        if use_cache:
+            save_splits(split_path, fold_ids)
+    arrays['fold_ids'] = fold_ids
+    return arrays, split_path
+
+def run_folds(df_sample, params, workers=None, n_folds=N_FOLDS, use_cache=True, seed=42):
+    """Menjalankan seluruh fold KFold atas ``df_sample``; mengembalikan (hasil per fold, jumlah worker).
+
+    Dengan ``use_cache`` split & model fold dibaca/ditulis di cache fold
+    (lihat ``src.fold_cache``) dengan kunci fingerprint data, seed & hyperparameter.
+    """
+    arrays, split_path = fold_arrays(df_sample, n_folds, use_cache, seed)
+    cache_path = model_dir(split_path, params) if use_cache else None
+
+    # Semua model fold sudah ada di cache: tinggal scoring, tidak perlu process pool
+    n_cached = sum(has_fold_models(cache_path, fold) for fold in range(n_folds)) if use_cache else 0
+    workers = 1 if n_cached == n_folds else max(1, min(workers or os.cpu_count(), n_folds - n_cached))
+
+    # Build Model (Train) & Evaluasi per fold
+    cache_note = f" ({n_cached} model fold dari cache)" if n_cached else ""
+    print(f"   ⚙️ Menjalankan {n_folds} fold pada {workers} worker{cache_note}...")
+    if workers == 1:
+        with threadpool_limits(limits=1):
+            return [_evaluate_fold_arrays(arrays, fold, params, cache_path) for fold in range(n_folds)], workers
+    handles, spec = share_arrays(arrays)
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(_run_fold, [spec] * n_folds, range(n_folds), [params] * n_folds,
+                                 [cache_path] * n_folds)), workers
+    finally:
+        release(handles, unlink=True)
+
+def print_metrics_table(metrics):
+    """Tabel ringkas metrik ranking: satu baris per metrik, satu kolom per K."""
+    table = {}
+    for key, value in metrics.items():
+        name, k = split_metric_key(key)
+        table.setdefault(name, {})[k] = value
+    ks = sorted({k for values in table.values() for k in values})
+    print(f"   {'metrik':<10}" + ''.join(f"{f'@{k}':>9}" for k in ks))
+    for name, values in table.items():
+        print(f"   {name:<10}" + ''.join(f"{values[k]:>9.4f}" if k in values else f"{'-':>9}" for k in ks))
+
+def evaluate_model_cv(svd_backend='truncated', n_iter=5, n_components=30, n_clusters=8, max_users=None,
+                      workers=None, n_folds=N_FOLDS, ks=METRIC_KS, use_cache=True, invalidate_cache=False):
+    """Evaluasi K-Fold; fold dijalankan paralel di process pool.
+
+    Rating ter-encode & id fold tiap baris dibagikan ke worker lewat shared
+    memory (tanpa salinan per worker). Split KFold dibuat sekali di proses
+    utama dengan seed tetap, dan tiap fold memakai thread BLAS tunggal baik
+    paralel maupun serial (``workers=1``), sehingga hasilnya identik.
+    Split & model fold di-cache (``use_cache``); ``invalidate_cache`` menghapus
+    cache sebelum evaluasi.
+    """
+    print(f"📈 Memulai Evaluasi {n_folds}-Fold Cross Validation...")
     
-    fold_idx = 1
+    profiler = PipelineProfiler('evaluate')
+    if invalidate_cache:
+        invalidate()
+
+    # Store biner memory-mapped: userId/productId berupa kode int32
+    with profiler.stage('load_ratings') as record:
+        df, _, _ = load_clean_ratings()
+        df_sample = sample_users(df, max_users)
+        record['rows'] = len(df)
+        record['sample_rows'] = len(df_sample)
+        record['n_users'] = int(df_sample['userId'].nunique())
     
-    for train_index, test_index in kf.split(df_sample):
-        print(f"   🔄 Processing Fold {fold_idx}/5...")
-        
-        train_data = df_sample.iloc[train_index]
-        test_data = df_sample.iloc[test_index]
-        
-        # Build Model (Train)
-        pivot_train = train_data.pivot_table(index='userId', columns='productId', values='rating').fillna(0)
-        matrix_train = csr_matrix(pivot_train.values)
-        
-        svd = TruncatedSVD(n_components=30, random_state=42)
-        matrix_reduced = svd.fit_transform(matrix_train)
-        
-        kmeans = KMeans(n_clusters=8, random_state=42, n_init=5)
-        kmeans.fit(matrix_reduced)
-        
-        # Evaluation Logic (Test)
-        test_users_in_train = [u for u in test_data['userId'].unique() if u in pivot_train.index]
-        
-        precisions = []
-        recalls = []
-        
-        for user in test_users_in_train:
-            # Ground Truth: Barang yang user ini beri rating >= 4 di data Test
-            actual_liked = test_data[(test_data['userId'] == user) & (test_data['rating'] >= 4)]['productId'].values
-            
-            if len(actual_liked) == 0: continue
-            
-            # 1. Tentukan Cluster User
-            user_idx = pivot_train.index.get_loc(user)
-            user_vector = matrix_reduced[user_idx].reshape(1, -1)
-            cluster_id = kmeans.predict(user_vector)[0]
-            
-            # 2. Cari Top Items di Cluster (Pakai SUM/Popularity)
-            cluster_users_idx = np.where(kmeans.labels_ == cluster_id)[0]
-            
-            # Menggunakan .sum() agar konsisten dengan train_model.py
-            # Kita ambil langsung dari matrix sparse agar cepat
-            cluster_submatrix = matrix_train[cluster_users_idx]
-            cluster_scores = np.array(cluster_submatrix.sum(axis=0)).flatten()
-            
-            # Ambil Top 10 Index
-            top_indices = cluster_scores.argsort()[::-1][:10]
-            rec_items = [pivot_train.columns[i] for i in top_indices]
-            
-            # 3. Hitung Metrik
-            hits = len(set(actual_liked).intersection(rec_items))
-            p = hits / 10.0
-            r = hits / len(actual_liked)
-            
-            precisions.append(p)
-            recalls.append(r)
-            
-        if precisions:
-            fold_precision.append(np.mean(precisions))
-            fold_recall.append(np.mean(recalls))
-            f1 = 2 * (np.mean(precisions) * np.mean(recalls)) / (np.mean(precisions) + np.mean(recalls)) if (np.mean(precisions) + np.mean(recalls)) > 0 else 0
-            fold_f1.append(f1)
-            
-        fold_idx += 1
+    params = {'n_components': n_components, 'n_clusters': n_clusters, 'svd_backend': svd_backend, 'n_iter': n_iter,
+              'ks': tuple(ks)}
+    with profiler.stage('folds') as record:
+        folds, record['workers'] = run_folds(df_sample, params, workers, n_folds, use_cache)
+        record['cached_folds'] = sum(fold['cached'] for fold in folds)
+        record['folds'] = [{key: fold[key] for key in ('fold', 'fold_time_s', 'build_matrix_time_s', 'svd_time_s',
+                                                      'kmeans_time_s', 'n_users')} for fold in folds]
+
+    for fold in folds:
+        if fold['cached']:
+            print(f"   ♻️ Fold {fold['fold']}/{n_folds}: {fold['fold_time_s']:.2f}s (model dari cache, hanya scoring)")
+            continue
+        print(f"   🔄 Fold {fold['fold']}/{n_folds}: {fold['fold_time_s']:.2f}s "
+              f"(matrix {fold['build_matrix_time_s']:.2f}s | SVD {fold['svd_time_s']:.2f}s | "
+              f"K-Means {fold['kmeans_time_s']:.2f}s) | explained variance {fold['explained_variance_ratio']:.2%}")
+    scored = [fold for fold in folds if fold['precision'] is not None]
 
     final_metrics = {
-        "precision": float(np.mean(fold_precision)),
-        "recall": float(np.mean(fold_recall)),
-        "f1_score": float(np.mean(fold_f1)),
-        "n_folds": 5
+        "precision": float(np.mean([fold['precision'] for fold in scored])),
+        "recall": float(np.mean([fold['recall'] for fold in scored])),
+        "f1_score": float(np.mean([fold['f1_score'] for fold in scored])),
+        "n_folds": n_folds,
+        "n_users": int(df_sample['userId'].nunique()),
+        "fold_times_s": [fold['fold_time_s'] for fold in folds],
+        "metrics": average_metrics([fold['metrics'] for fold in scored])
     }
 
     with open('models/metrics.json', 'w') as f:
         json.dump(final_metrics, f)
+    profiler.save()
 
     print("\n✅ Evaluasi Selesai & Disimpan.")
     print(f"Precision : {final_metrics['precision']:.4f}")
     print(f"Recall    : {final_metrics['recall']:.4f}")
     print(f"F1-Score  : {final_metrics['f1_score']:.4f}")
+    print_metrics_table(final_metrics['metrics'])
+    return final_metrics
+
+def evaluate_sampled_cv(svd_backend='truncated', n_iter=5, n_components=30, n_clusters=8, budget=20_000,
+                        start_users=1_000, growth=2.0, ci_tolerance=0.1, n_strata=4, n_boot=1_000,
+                        confidence=0.95, workers=None, n_folds=N_FOLDS, ks=METRIC_KS, use_cache=True,
+                        invalidate_cache=False):
+    """Evaluasi K-Fold atas sampel user terstratifikasi aktivitas dengan early stopping.
+
+    Model tiap fold selalu dilatih pada rating semua user (sama seperti
+    ``evaluate_model_cv`` tanpa ``max_users``), jadi CI menggambarkan model
+    produksi; yang di-sample hanya user yang dinilai. Mulai dari
+    ``start_users`` user, sampel diperbesar ``growth`` kali per ronde (maksimal
+    ``budget``). Tiap ronde menilai user tersampel di data test seluruh fold,
+    lalu menghitung CI bootstrap dari metrik per user (rata-rata antar fold).
+    Berhenti bila lebar setengah CI F1 <= ``ci_tolerance`` x F1. Model fold
+    di-fit sekali lalu dipakai ulang antar ronde lewat cache fold (tanpa
+    ``use_cache`` model di-fit ulang setiap ronde).
+    """
+    print(f"📈 Memulai Evaluasi {n_folds}-Fold Terstratifikasi (budget {budget:,} user, "
+          f"toleransi CI ±{ci_tolerance:.0%})...")
+    profiler = PipelineProfiler('evaluate')
+    if invalidate_cache:
+        invalidate()
+
+    with profiler.stage('load_ratings') as record:
+        df, _, _ = load_clean_ratings()
+        user_order, user_strata = stratified_user_order(df, n_strata)
+        record['rows'] = len(df)
+        record['n_users'] = int(len(user_order))
+
+    params = {'n_components': n_components, 'n_clusters': n_clusters, 'svd_backend': svd_backend, 'n_iter': n_iter,
+              'per_user': True, 'ks': tuple(ks)}
+    budget = min(budget or len(user_order), len(user_order))
+    n_users, rounds = min(start_users, budget), []
+    while True:
+        with profiler.stage(f'round_{len(rounds) + 1}') as record:
+            start = time.perf_counter()
+            sampled = user_order[:n_users]
+            folds, _ = run_folds(df, dict(params, score_users=sampled), workers, n_folds, use_cache)
+
+            # Metrik per user dirata-rata antar fold tempat user muncul di data test
+            per_user = pd.DataFrame({
+                'userId': np.concatenate([fold['user_ids'] for fold in folds]),
+                'precision': np.concatenate([fold['user_precision'] for fold in folds]),
+                'recall': np.concatenate([fold['user_recall'] for fold in folds]),
+            }).groupby('userId').mean()
+            strata = pd.Series(user_strata[:n_users], index=sampled).reindex(per_user.index).values
+            intervals = bootstrap_ci(per_user['precision'].values, per_user['recall'].values, strata,
+                                     n_boot, confidence)
+            f1 = intervals['f1_score']
+            half_width = (f1['high'] - f1['low']) / 2
+            round_info = {'sampled_users': int(n_users), 'scored_users': int(len(per_user)),
+                          'f1_score': f1['mean'], 'f1_half_width': half_width,
+                          'time_s': round(time.perf_counter() - start, 4)}
+            record.update(round_info)
+        rounds.append(round_info)
+        print(f"   🎯 Ronde {len(rounds)}: {n_users:,} user ({len(per_user):,} dinilai) | F1 {f1['mean']:.4f} "
+              f"[{f1['low']:.4f}, {f1['high']:.4f}] | {round_info['time_s']:.2f}s")
+
+        converged = half_width <= ci_tolerance * f1['mean']
+        if converged or n_users >= budget:
+            break
+        n_users = min(int(np.ceil(n_users * growth)), budget)
+
+    final_metrics = {
+        "precision": intervals['precision']['mean'],
+        "recall": intervals['recall']['mean'],
+        "f1_score": intervals['f1_score']['mean'],
+        "n_folds": n_folds,
+        "n_users": int(n_users),
+        "confidence_intervals": dict(intervals, level=confidence),
+        "sampling": {'method': 'stratified_activity', 'scope': 'scored_users', 'train_users': int(len(user_order)),
+                     'n_strata': int(n_strata), 'population_users': int(len(user_order)),
+                     'budget': int(budget), 'ci_tolerance': ci_tolerance, 'converged': bool(converged),
+                     'rounds': rounds},
+        "metrics": average_metrics([fold['metrics'] for fold in folds if fold['precision'] is not None]),
+    }
+    with open('models/metrics.json', 'w') as f:
+        json.dump(final_metrics, f)
+    profiler.save()
+
+    status = "CI cukup sempit" if converged else "budget habis"
+    print(f"\n✅ Evaluasi Selesai & Disimpan ({status}, {n_users:,} dari {len(user_order):,} user).")
+    for name, label in (('precision', 'Precision'), ('recall', 'Recall   '), ('f1_score', 'F1-Score ')):
+        interval = intervals[name]
+        print(f"{label} : {interval['mean']:.4f}  ({confidence:.0%} CI {interval['low']:.4f} – {interval['high']:.4f})")
+    print_metrics_table(final_metrics['metrics'])
+    return final_metrics
 
 if __name__ == "__main__":
-    evaluate_model_cv()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Evaluasi K-Fold Cross Validation (fold paralel)")
+    parser.add_argument('--svd-backend', choices=SVD_BACKENDS, default='truncated', help="Solver SVD per fold")
+    parser.add_argument('--n-iter', type=int, default=5, help="Jumlah power iteration (randomized/out_of_core)")
+    parser.add_argument('--n-components', type=int, default=30, help="Jumlah komponen SVD per fold")
+    parser.add_argument('--n-clusters', type=int, default=8, help="Jumlah cluster K-Means per fold")
+    parser.add_argument('--max-users', type=int, default=0, help="Batasi jumlah user yang dievaluasi (0 = semua user)")
+    parser.add_argument('--workers', type=int, default=None, help="Jumlah proses worker fold (1 = serial)")
+    parser.add_argument('--n-folds', type=int, default=N_FOLDS, help="Jumlah fold")
+    parser.add_argument('--ks', type=int, nargs='+', default=list(METRIC_KS), help="Nilai K untuk metrik ranking")
+    parser.add_argument('--no-cache', action='store_true', help="Jangan baca/tulis cache split & model fold")
+    parser.add_argument('--invalidate-cache', action='store_true', help="Hapus cache fold sebelum evaluasi")
+    parser.add_argument('--sampled', action='store_true',
+                        help="Sampling user terstratifikasi aktivitas + CI bootstrap dengan early stopping")
+    parser.add_argument('--budget', type=int, default=20_000, help="Maksimal user tersampel (mode --sampled)")
+    parser.add_argument('--start-users', type=int, default=1_000, help="Jumlah user ronde pertama (mode --sampled)")
+    parser.add_argument('--ci-tolerance', type=float, default=0.1,
+                        help="Berhenti bila setengah lebar CI F1 <= toleransi x F1 (mode --sampled)")
+    args = parser.parse_args()
+    if args.sampled:
+        evaluate_sampled_cv(svd_backend=args.svd_backend, n_iter=args.n_iter, n_components=args.n_components,
+                            n_clusters=args.n_clusters, budget=args.budget, start_users=args.start_users,
+                            ci_tolerance=args.ci_tolerance, workers=args.workers, n_folds=args.n_folds, ks=args.ks,
+                            use_cache=not args.no_cache, invalidate_cache=args.invalidate_cache)
+    else:
+        evaluate_model_cv(svd_backend=args.svd_backend, n_iter=args.n_iter, n_components=args.n_components,
+                          n_clusters=args.n_clusters, max_users=args.max_users or None,
+                          workers=args.workers, n_folds=args.n_folds, ks=args.ks,
+                          use_cache=not args.no_cache, invalidate_cache=args.invalidate_cache)
\ No newline at end of file
@@ -0,0 +1,130 @@
+import os
+import json
+import time
+import tracemalloc
+import numpy as np
+from sklearn.decomposition import TruncatedSVD
+from sklearn.utils import check_random_state
+
+# Backend SVD yang tersedia untuk tahap Feature Extraction
+# - truncated   : TruncatedSVD default (solver lama)
+# - arpack      : TruncatedSVD ARPACK (lebih presisi, lebih lambat)
+# - randomized  : TruncatedSVD randomized dengan jumlah power iteration yang bisa diatur
+# - out_of_core : randomized SVD yang membaca CSR per blok baris (memori ~ blok + faktor)
+SVD_BACKENDS = ('truncated', 'arpack', 'randomized', 'out_of_core')
+FACTORIZATION_LOG_PATH = 'models/factorization_runs.json'
+
+def iter_row_blocks(matrix, block_size):
+    """Iterasi (start, blok CSR) per blok baris."""
+    for start in range(0, matrix.shape[0], block_size):
+        yield start, matrix[start:start + block_size]
+
+def _block_randomized_svd(matrix, n_components, n_iter, n_oversamples, block_size, random_state):
+    """Randomized SVD sisi fitur: A^T A Q dihitung per blok baris, tanpa memuat A utuh."""
+    n_features = matrix.shape[1]
+    n_random = min(n_components + n_oversamples, n_features)
+    rng = check_random_state(random_state)
+    Q, _ = np.linalg.qr(rng.normal(size=(n_features, n_random)))
+
+    # Power iteration: satu pass blok per iterasi
+    for _ in range(n_iter):
+        Z = np.zeros_like(Q)
+        for _, block in iter_row_blocks(matrix, block_size):
+            Z += block.T @ (block @ Q)
+        Q, _ = np.linalg.qr(Z)
+
+    # Proyeksi ke subruang Q: Gram kecil (n_random x n_random) -> SVD eksak di subruang
+    gram = np.zeros((n_random, n_random))
+    for _, block in iter_row_blocks(matrix, block_size):
+        BQ = block @ Q
+        gram += BQ.T @ BQ
+    eigvals, eigvecs = np.linalg.eigh(gram)
+    order = np.argsort(eigvals)[::-1][:n_components]
+    singular_values = np.sqrt(np.clip(eigvals[order], 0, None))
+    components = (Q @ eigvecs[:, order]).T
+
+    # Tanda deterministik: elemen absolut terbesar tiap komponen positif
+    signs = np.sign(components[np.arange(len(components)), np.abs(components).argmax(axis=1)])
+    components *= signs[:, None]
+    return components, singular_values
+
+def _fit_out_of_core(matrix, n_components, n_iter, n_oversamples, block_size, random_state):
+    components, singular_values = _block_randomized_svd(
+        matrix, n_components, n_iter, n_oversamples, block_size, random_state
+    )
+    n_rows, n_features = matrix.shape
+    matrix_reduced = np.empty((n_rows, n_components))
+    col_sum = np.zeros(n_features)
+    col_sq_sum = np.zeros(n_features)
+    for start, block in iter_row_blocks(matrix, block_size):
+        matrix_reduced[start:start + block.shape[0]] = block @ components.T
+        col_sum += np.asarray(block.sum(axis=0)).ravel()
+        col_sq_sum += np.asarray(block.multiply(block).sum(axis=0)).ravel()
+    full_var = (col_sq_sum / n_rows - (col_sum / n_rows) ** 2).sum()
+
+    # Bungkus sebagai TruncatedSVD agar transform()/components_ tetap kompatibel
+    svd = TruncatedSVD(n_components=n_components, n_iter=n_iter, n_oversamples=n_oversamples,
+                       random_state=random_state)
+    svd.components_ = components
+    svd.singular_values_ = singular_values
+    svd.explained_variance_ = matrix_reduced.var(axis=0)
+    svd.explained_variance_ratio_ = svd.explained_variance_ / full_var
+    svd.n_features_in_ = n_features
+    return svd, matrix_reduced
+
+def factorize(matrix, n_components=50, backend='truncated', n_iter=5, n_oversamples=10,
+              block_size=50_000, random_state=42):
+    """Menjalankan SVD dengan backend terpilih.
+
+    Mengembalikan (svd, matrix_reduced, stats); stats berisi waktu wall-clock,
+    memori puncak (tracemalloc) dan total explained variance.
+    """
+    if backend not in SVD_BACKENDS:
+        raise ValueError(f"Backend SVD tidak dikenal: {backend}. Pilihan: {', '.join(SVD_BACKENDS)}")
+
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    mem_before = tracemalloc.get_traced_memory()[0]
+    start_time = time.perf_counter()
+
+    if backend == 'out_of_core':
+        svd, matrix_reduced = _fit_out_of_core(matrix, n_components, n_iter, n_oversamples, block_size, random_state)
+    else:
+        if backend == 'truncated':
+            svd = TruncatedSVD(n_components=n_components, random_state=random_state)
+        elif backend == 'arpack':
+            svd = TruncatedSVD(n_components=n_components, algorithm='arpack', random_state=random_state)
+        else:
+            svd = TruncatedSVD(n_components=n_components, algorithm='randomized', n_iter=n_iter,
+                               n_oversamples=n_oversamples, random_state=random_state)
+        matrix_reduced = svd.fit_transform(matrix)
+
+    wall_time = time.perf_counter() - start_time
+    peak_memory = tracemalloc.get_traced_memory()[1] - mem_before
+    if started_tracing:
+        tracemalloc.stop()
+
+    stats = {
+        'backend': backend,
+        'n_components': n_components,
+        'n_iter': n_iter if backend in ('randomized', 'out_of_core') else None,
+        'block_size': block_size if backend == 'out_of_core' else None,
+        'shape': list(matrix.shape),
+        'nnz': int(matrix.nnz),
+        'wall_time_s': round(wall_time, 4),
+        'peak_memory_mb': round(peak_memory / 1024 ** 2, 2),
+        'explained_variance_ratio': float(np.sum(svd.explained_variance_ratio_)),
+    }
+    return svd, matrix_reduced, stats
+
+def log_factorization_run(stats, log_path=FACTORIZATION_LOG_PATH):
+    """Menambahkan hasil satu run SVD ke log JSON (untuk membandingkan backend)."""
+    runs = []
+    if os.path.exists(log_path):
+        with open(log_path, 'r') as f:
+            runs = json.load(f)
+    runs.append(dict(stats, timestamp=time.strftime('%Y-%m-%d %H:%M:%S')))
+    with open(log_path, 'w') as f:
+        json.dump(runs, f, indent=2)
@@ -0,0 +1,66 @@
+import os
+import json
+import shutil
+import hashlib
+import joblib
+import numpy as np
+
+# Cache artefak fold evaluasi: split KFold & model SVD/K-Means hasil fit per fold.
+# Kunci split = fingerprint data + seed + jumlah fold; kunci model = kunci split + hyperparameter fit.
+# Perubahan yang hanya menyentuh scoring (metrik, K, top-N) memakai ulang model yang sama.
+FOLD_CACHE_DIR = 'models/fold_cache'
+# Parameter evaluate_fold yang memengaruhi hasil fit (sisanya hanya memengaruhi scoring)
+FIT_PARAMS = ('n_components', 'n_clusters', 'svd_backend', 'n_iter')
+
+def _digest(payload):
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()[:16]
+
+def data_fingerprint(arrays):
+    """SHA-256 isi array (dtype, shape & byte) sebagai identitas data evaluasi."""
+    digest = hashlib.sha256()
+    for name in sorted(arrays):
+        values = np.ascontiguousarray(arrays[name])
+        digest.update(f'{name}:{values.dtype.str}:{values.shape}'.encode())
+        digest.update(memoryview(values).cast('B'))
+    return digest.hexdigest()[:16]
+
+def split_dir(fingerprint, seed, n_folds, cache_dir=FOLD_CACHE_DIR):
+    return os.path.join(cache_dir, _digest({'data': fingerprint, 'seed': seed, 'n_folds': n_folds}))
+
+def model_dir(split_path, params):
+    return os.path.join(split_path, _digest({name: params[name] for name in FIT_PARAMS if name in params}))
+
+def load_splits(split_path):
+    """Id fold per baris yang tersimpan, atau None bila belum ada."""
+    path = os.path.join(split_path, 'fold_ids.npy')
+    return np.load(path) if os.path.exists(path) else None
+
+def save_splits(split_path, fold_ids):
+    os.makedirs(split_path, exist_ok=True)
+    np.save(os.path.join(split_path, 'fold_ids.tmp.npy'), fold_ids)
+    os.replace(os.path.join(split_path, 'fold_ids.tmp.npy'), os.path.join(split_path, 'fold_ids.npy'))
+
+def _fold_path(models_path, fold):
+    return os.path.join(models_path, f'fold_{fold + 1}.pkl')
+
+def has_fold_models(models_path, fold):
+    return os.path.exists(_fold_path(models_path, fold))
+
+def load_fold_models(models_path, fold):
+    """Model fold (dict dari ``evaluate.fit_fold``) yang tersimpan, atau None."""
+    if not has_fold_models(models_path, fold):
+        return None
+    return joblib.load(_fold_path(models_path, fold))
+
+def save_fold_models(models_path, fold, models):
+    """Ditulis ke file sementara lalu di-rename agar worker paralel tidak membaca file setengah jadi."""
+    os.makedirs(models_path, exist_ok=True)
+    path = _fold_path(models_path, fold)
+    joblib.dump(models, path + '.tmp')
+    os.replace(path + '.tmp', path)
+
+def invalidate(cache_dir=FOLD_CACHE_DIR):
+    """Menghapus seluruh cache fold."""
+    if os.path.exists(cache_dir):
+        shutil.rmtree(cache_dir)
+        print(f"🗑️ Cache fold di {cache_dir}/ dihapus.")
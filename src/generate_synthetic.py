@@ -0,0 +1,211 @@
+import os
+import json
+import argparse
+import numpy as np
+import pandas as pd
+
+# Generator rating sintetis (layout ratings_Electronics.csv: userId,productId,rating,timestamp tanpa header)
+# untuk benchmark skala produksi tanpa dump asli. Derajat user & produk mengikuti power-law,
+# dan user/produk ditanam ke dalam cluster sehingga struktur komunitas bisa ditemukan K-Means.
+OUTPUT_PATH = 'data/synthetic_ratings.csv'
+BASE36 = np.array(list('0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'))
+
+# Distribusi rating 1-5: item dalam cluster sendiri cenderung dinilai lebih tinggi
+IN_CLUSTER_RATING_P = [0.03, 0.03, 0.08, 0.24, 0.62]
+OUT_CLUSTER_RATING_P = [0.12, 0.08, 0.15, 0.22, 0.43]
+TIMESTAMP_RANGE = (946684800, 1406073600)  # 2000-01-01 .. 2014-07-23 (rentang dump asli)
+
+def make_ids(n, prefix, width):
+    """ID unik bergaya Amazon: index diacak bijektif (mod 36^width) lalu ditulis base36."""
+    # Pengali ~ rasio emas dari ruang ID dan koprima dengan 36 -> perkalian modular bijektif
+    multiplier = int(36 ** width * 0.6180339887) | 1
+    while multiplier % 3 == 0:
+        multiplier += 2
+    codes = (np.arange(n, dtype=object) * multiplier) % (36 ** width)
+    digits = np.empty((n, width), dtype='<U1')
+    for position in range(width - 1, -1, -1):
+        digits[:, position] = BASE36[(codes % 36).astype(np.int64)]
+        codes //= 36
+    return np.char.add(prefix, digits.view(f'<U{width}').ravel())
+
+def power_law_weights(n, exponent, rng):
+    """Bobot Zipf (rank^-exponent) dengan urutan rank diacak."""
+    weights = np.arange(1, n + 1, dtype=np.float64) ** -exponent
+    return rng.permutation(weights / weights.sum())
+
+def _cluster_cdf(item_clusters, item_weights, n_clusters):
+    """CDF item per cluster, digeser ke [c, c+1) agar bisa di-sample vektor dengan satu searchsorted."""
+    order = np.lexsort((np.arange(len(item_clusters)), item_clusters))
+    sorted_clusters = item_clusters[order]
+    sorted_weights = item_weights[order]
+    cluster_totals = np.bincount(sorted_clusters, weights=sorted_weights, minlength=n_clusters)
+    within = np.cumsum(sorted_weights) - np.repeat(np.cumsum(cluster_totals) - cluster_totals,
+                                                   np.bincount(sorted_clusters, minlength=n_clusters))
+    cdf = sorted_clusters + within / cluster_totals[sorted_clusters]
+    return cdf, order
+
+def user_quotas(user_weights, n_ratings, n_items):
+    """Jumlah rating per user: proporsional bobot power-law, dibatasi ``n_items`` (tanpa pasangan berulang).
+
+    Kelebihan user yang terpotong dibagi ulang ke user lain sesuai bobotnya,
+    lalu dibulatkan ke integer dengan metode sisa terbesar.
+    """
+    n_ratings = min(n_ratings, len(user_weights) * n_items)
+    quota = user_weights / user_weights.sum() * n_ratings
+    while (quota > n_items).any():
+        capped = quota >= n_items
+        excess = (quota[capped] - n_items).sum()
+        quota[capped] = n_items
+        free = user_weights * ~capped
+        quota += free / free.sum() * excess
+    counts = np.floor(quota).astype(np.int64)
+    remainder = n_ratings - counts.sum()
+    counts[np.argsort(counts - quota, kind='stable')[:remainder]] += 1
+    return counts
+
+def _sample_user_items(users, counts, user_clusters, item_cdf, cluster_cdf, cluster_order, item_weights,
+                       item_clusters, n_items, affinity, rng, max_rounds=8):
+    """Item unik per user untuk satu blok user: (user, item) di-sample lalu duplikat dibuang.
+
+    Sampling diulang untuk kekurangan tiap user; user yang setelah
+    ``max_rounds`` putaran masih kurang (user sangat aktif di ekor power-law)
+    dilengkapi dengan sampling tanpa pengembalian atas item yang belum dirating.
+    """
+    accepted = np.empty(0, dtype=np.int64)
+    missing = counts.copy()
+    for _ in range(max_rounds):
+        if not missing.any():
+            break
+        draw_users = np.repeat(users, missing)
+        size = len(draw_users)
+        # Dengan peluang `affinity` item diambil dari cluster user, selain itu dari distribusi global
+        in_cluster = rng.random(size) < affinity
+        items = np.minimum(np.searchsorted(item_cdf, rng.random(size) * item_cdf[-1]), n_items - 1)
+        targets = user_clusters[draw_users[in_cluster]] + rng.random(in_cluster.sum())
+        items[in_cluster] = cluster_order[np.minimum(np.searchsorted(cluster_cdf, targets), n_items - 1)]
+
+        # Kunci terurut = terurut per user; duplikat dibuang lewat sort, bukan hash
+        keys = np.sort(draw_users.astype(np.int64) * n_items + items)
+        keys = keys[np.concatenate([[True], keys[1:] != keys[:-1]])]
+        if len(accepted):
+            position = np.minimum(np.searchsorted(accepted, keys), len(accepted) - 1)
+            keys = keys[accepted[position] != keys]
+        # Pasangan baru per user dipotong sampai kekurangannya saja
+        key_users = keys // n_items
+        rank = np.arange(len(keys)) - np.searchsorted(key_users, key_users)
+        local = np.searchsorted(users, key_users)
+        keep = rank < missing[local]
+        keys = keys[keep]
+        missing -= np.bincount(local[keep], minlength=len(users))
+        accepted = np.sort(np.concatenate([accepted, keys]))
+
+    # accepted terurut, jadi item milik satu user adalah satu slice kontigu
+    extras = []
+    for position in np.flatnonzero(missing):
+        user = np.int64(users[position])
+        mix = (1 - affinity) * item_weights / item_weights.sum()
+        own = item_clusters == user_clusters[user]
+        mix[own] += affinity * item_weights[own] / item_weights[own].sum()
+        seen = accepted[np.searchsorted(accepted, user * n_items):np.searchsorted(accepted, (user + 1) * n_items)]
+        mix[seen % n_items] = 0
+        extras.append(user * n_items + rng.choice(n_items, missing[position], replace=False, p=mix / mix.sum()))
+    return rng.permutation(np.concatenate([accepted] + extras))
+
+def generate_ratings(n_users=200_000, n_items=50_000, n_ratings=2_000_000, density=None, n_clusters=10,
+                     user_exponent=0.8, item_exponent=1.0, affinity=0.7, seed=42,
+                     chunksize=1_000_000, output_path=OUTPUT_PATH):
+    """Menulis file rating sintetis secara bertahap (memori ~ chunk + jumlah user/item).
+
+    Seperti dump asli, setiap pasangan (user, produk) muncul paling banyak
+    sekali: jumlah rating per user ditentukan di awal (dibatasi ``n_items``)
+    lalu item tiap user di-sample tanpa duplikat. Deterministik untuk
+    kombinasi parameter, seed & chunksize yang sama.
+    """
+    if density is not None:
+        n_ratings = int(density * n_users * n_items)
+    requested = n_ratings
+    print(f"🧪 Membuat {n_ratings:,} rating sintetis ({n_users:,} user × {n_items:,} produk, "
+          f"{n_clusters} cluster, seed {seed})...")
+
+    rng = np.random.default_rng(seed)
+    user_ids = make_ids(n_users, 'A', 13)
+    item_ids = make_ids(n_items, 'B0', 8)
+
+    # Derajat power-law & cluster yang ditanam
+    counts = user_quotas(power_law_weights(n_users, user_exponent, rng), n_ratings, n_items)
+    n_ratings = int(counts.sum())
+    item_weights = power_law_weights(n_items, item_exponent, rng)
+    item_cdf = np.cumsum(item_weights)
+    user_clusters = rng.integers(0, n_clusters, n_users)
+    item_clusters = rng.integers(0, n_clusters, n_items)
+    cluster_cdf, cluster_order = _cluster_cdf(item_clusters, item_weights, n_clusters)
+    if n_ratings < requested:
+        print(f"   ⚠️ Dibatasi ke {n_ratings:,} rating (maksimal satu rating per pasangan user-produk)")
+
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    if os.path.exists(output_path):
+        os.remove(output_path)
+
+    # Blok user berurutan dengan total kuota ~ chunksize; duplikat hanya mungkin di dalam satu user
+    block_ends = np.searchsorted(np.cumsum(counts), np.arange(chunksize, n_ratings, chunksize), side='right')
+    bounds = np.unique(np.concatenate([[0], block_ends, [n_users]]))
+    written = 0
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        users = np.arange(start, end)
+        users = users[counts[users] > 0]
+        if not len(users):
+            continue
+        keys = _sample_user_items(users, counts[users], user_clusters, item_cdf, cluster_cdf, cluster_order,
+                                  item_weights, item_clusters, n_items, affinity, rng)
+        block_users, items = keys // n_items, keys % n_items
+        size = len(keys)
+
+        in_cluster = item_clusters[items] == user_clusters[block_users]
+        ratings = np.where(
+            in_cluster,
+            rng.choice(5, size, p=IN_CLUSTER_RATING_P),
+            rng.choice(5, size, p=OUT_CLUSTER_RATING_P)
+        ) + 1
+        timestamps = rng.integers(*TIMESTAMP_RANGE, size)
+
+        pd.DataFrame({
+            'userId': user_ids[block_users],
+            'productId': item_ids[items],
+            'rating': ratings.astype(np.float32),
+            'timestamp': timestamps,
+        }).to_csv(output_path, mode='a', header=False, index=False, float_format='%.1f')
+        written += size
+        print(f"   ↳ {written:,}/{n_ratings:,} baris ditulis")
+
+    # Metadata & cluster tertanam (ground truth untuk mengecek hasil clustering)
+    base_path = os.path.splitext(output_path)[0]
+    np.save(f'{base_path}.user_clusters.npy', user_clusters.astype(np.int32))
+    with open(f'{base_path}.meta.json', 'w') as f:
+        json.dump({
+            'n_users': n_users, 'n_items': n_items, 'n_clusters': n_clusters,
+            'requested_n_ratings': requested, 'n_ratings': written, 'nnz': written,
+            'density': written / (n_users * n_items), 'n_active_users': int((counts > 0).sum()),
+            'max_user_ratings': int(counts.max()),
+            'user_exponent': user_exponent, 'item_exponent': item_exponent, 'affinity': affinity,
+            'seed': seed, 'chunksize': chunksize,
+        }, f, indent=2)
+    print(f"✅ Rating sintetis tersimpan di {output_path}")
+    return output_path
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generator rating sintetis untuk benchmark skala")
+    parser.add_argument('--n-users', type=int, default=200_000)
+    parser.add_argument('--n-items', type=int, default=50_000)
+    parser.add_argument('--n-ratings', type=int, default=2_000_000)
+    parser.add_argument('--density', type=float, default=None, help="Kepadatan matrix (menggantikan --n-ratings)")
+    parser.add_argument('--n-clusters', type=int, default=10, help="Jumlah cluster yang ditanam")
+    parser.add_argument('--user-exponent', type=float, default=0.8, help="Eksponen power-law aktivitas user")
+    parser.add_argument('--item-exponent', type=float, default=1.0, help="Eksponen power-law popularitas produk")
+    parser.add_argument('--affinity', type=float, default=0.7, help="Peluang rating jatuh di cluster user sendiri")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--chunksize', type=int, default=1_000_000)
+    parser.add_argument('--output', default=OUTPUT_PATH)
+    args = parser.parse_args()
+    generate_ratings(args.n_users, args.n_items, args.n_ratings, args.density, args.n_clusters,
+                     args.user_exponent, args.item_exponent, args.affinity, args.seed,
+                     args.chunksize, args.output)
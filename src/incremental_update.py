@@ -0,0 +1,254 @@
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix, issparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.artifacts import ARTIFACT_DIR, load_artifacts, save_artifacts
+from src.preprocessing import (MIN_USER_RATINGS, MIN_PRODUCT_RATINGS, RAW_COLUMNS, drop_invalid_ratings,
+                               matrix_from_codes, merge_ids, merge_into_store)
+from src.ratings_store import STORE_DIR, store_exists, load_ratings_store, read_store_filters
+from src.popularity import TOP_K, cluster_indicator, top_k, top_k_scores
+from src.ranking import BLEND_ALPHA, rank_users
+from src.ann_index import ANN_ARRAYS
+from src.model_registry import publish_version
+from src.pipeline import record_incremental_update
+
+DRIFT_HISTORY_PATH = 'models/drift_history.json'
+
+# Batas drift; bila salah satu terlampaui, full retrain (preprocessing + train_model) disarankan
+DRIFT_THRESHOLDS = {
+    'new_user_share': 0.10,               # User baru sejak full retrain / user saat retrain
+    'new_product_share': 0.05,            # Produk baru (di luar ruang SVD) / produk saat retrain
+    'unseen_product_rating_share': 0.20,  # Porsi rating delta pada produk yang tidak dikenal SVD
+    'inertia_ratio': 1.5,                 # Jarak rata-rata ke centroid vs baseline training
+    'reassigned_share': 0.25,             # Porsi user lama yang pindah cluster
+}
+
+def _resize_csr(matrix, shape):
+    """Memperbesar CSR (baris & kolom baru kosong) tanpa menyalin ke dense."""
+    indptr = np.concatenate([matrix.indptr, np.full(shape[0] - matrix.shape[0], matrix.indptr[-1])])
+    return csr_matrix((np.asarray(matrix.data), np.asarray(matrix.indices), indptr), shape=shape)
+
+def store_filters(store_dir=STORE_DIR, min_ratings=None, min_product_ratings=None, k_core=None):
+    """Threshold filter untuk delta: argumen eksplisit, lalu catatan store, lalu default preprocessing."""
+    recorded = read_store_filters(store_dir) or {}
+    return (
+        min_ratings if min_ratings is not None else recorded.get('min_ratings', MIN_USER_RATINGS),
+        min_product_ratings if min_product_ratings is not None else recorded.get('min_product_ratings', MIN_PRODUCT_RATINGS),
+        k_core if k_core is not None else recorded.get('k_core', False),
+    )
+
+def append_to_store(delta, store_dir=STORE_DIR, min_ratings=None, min_product_ratings=None, k_core=None):
+    """Menambahkan rating delta ke store biner agar ikut pada full retrain berikutnya.
+
+    Semua baris valid disimpan: baris yang user/produknya belum lolos threshold
+    saat store dibangun (lihat ``store_filters``) menunggu sebagai rating
+    tertunda dan masuk store begitu aktivitasnya cukup (lihat
+    ``preprocessing.merge_into_store``), sehingga store tetap sejalan dengan
+    artefak yang memuat seluruh delta. Mengembalikan (perubahan jumlah baris
+    store, jumlah baris tertunda).
+    """
+    if not store_exists(store_dir):
+        return 0, 0
+    n_before = len(load_ratings_store(store_dir)['ratings'])
+    n_rows, n_pending = merge_into_store(delta, store_dir, *store_filters(store_dir, min_ratings, min_product_ratings, k_core))
+    if n_rows == 0:
+        print("   ⚠️ Tidak ada rating yang lolos filter, store tidak diubah.")
+        return 0, n_pending
+    if n_pending:
+        print(f"   ↳ {n_pending:,} rating tertunda menunggu user/produknya lolos threshold")
+    return n_rows - n_before, n_pending
+
+def incremental_update(delta_path, artifact_dir=ARTIFACT_DIR, update_store=True, publish=True,
+                       min_ratings=None, min_product_ratings=None, k_core=None):
+    """Memasukkan rating baru ke model yang ada tanpa full preprocess/train.
+
+    User baru/terdampak diproyeksikan dengan SVD yang ada, di-assign ke cluster
+    dengan centroid K-Means yang ada, lalu popularitas per cluster diperbarui
+    secara inkremental. Rating delta untuk sel yang sudah ada menimpa rating lama.
+    Rating tidak valid dibuang; threshold ``min_ratings``/``min_product_ratings``/
+    ``k_core`` (default: yang tercatat saat store dibangun) menentukan baris
+    mana yang langsung masuk store dan mana yang tertunda. Update dicatat di state pipeline (lihat
+    ``pipeline.record_incremental_update``). Mengembalikan laporan drift.
+    """
+    print("🔁 Memulai Update Inkremental...")
+    if not os.path.exists(delta_path):
+        print(f"❌ Error: File delta {delta_path} tidak ditemukan.")
+        return
+
+    artifacts = load_artifacts(artifact_dir)
+    manifest = artifacts['manifest']
+    if 'cluster_popularity' not in artifacts:
+        print("❌ Artefak belum menyimpan popularitas per cluster. Jalankan 'python src/train_model.py' ulang.")
+        return
+
+    svd, kmeans = artifacts['svd'], artifacts['kmeans']
+    n_clusters = kmeans.n_clusters
+    n_svd_features = svd.n_features
+    old_matrix = artifacts['user_item_matrix']
+    old_n_users, old_n_products = old_matrix.shape
+
+    # 1. Load & encode delta terhadap tabel ID yang ada
+    delta = pd.read_csv(delta_path, names=RAW_COLUMNS,
+                        dtype={'userId': str, 'productId': str, 'rating': 'float32', 'timestamp': 'int64'})
+    print(f"📥 {len(delta):,} rating baru dimuat dari {delta_path}")
+    n_loaded = len(delta)
+    delta = drop_invalid_ratings(delta).reset_index(drop=True)
+    if len(delta) < n_loaded:
+        print(f"   ↳ {n_loaded - len(delta):,} rating tidak valid dibuang")
+    if not len(delta):
+        print("❌ Error: Tidak ada rating valid di file delta.")
+        return
+    user_codes, user_ids, n_new_users = merge_ids(artifacts['user_ids'], delta['userId'].values)
+    product_codes, product_ids, n_new_products = merge_ids(artifacts['product_ids'], delta['productId'].values)
+    shape = (len(user_ids), len(product_ids))
+
+    # 2. Gabungkan delta ke matrix user-item (sel yang sama ditimpa rating delta)
+    old_resized = _resize_csr(old_matrix, shape)
+    delta_matrix = matrix_from_codes(user_codes, product_codes, delta['rating'].values, shape)
+    delta_mask = delta_matrix.copy()
+    delta_mask.data[:] = 1
+    new_matrix = (old_resized - old_resized.multiply(delta_mask) + delta_matrix).tocsr()
+    new_matrix.eliminate_zeros()
+    new_matrix.sort_indices()
+
+    # 3. Proyeksi SVD & assign cluster untuk user terdampak
+    print("🧭 Memproyeksikan user terdampak ke ruang SVD & cluster yang ada...")
+    affected = np.unique(user_codes)
+    is_existing = affected < old_n_users
+    new_rows = new_matrix[affected]
+    vectors = svd.transform(new_rows[:, :n_svd_features])
+    new_labels = kmeans.predict(vectors).astype(np.int32)
+
+    user_clusters = np.concatenate([
+        np.asarray(artifacts['user_clusters']), np.full(shape[0] - old_n_users, -1, dtype=np.int32)
+    ])
+    old_labels = user_clusters[affected]
+    user_clusters[affected] = new_labels
+
+    # 4. Update popularitas per cluster: kurangi kontribusi lama, tambah kontribusi baru
+    print("⚡ Memperbarui popularitas per cluster...")
+    old_popularity = artifacts['cluster_popularity']
+    if not issparse(old_popularity):  # artefak lama menyimpan popularitas dense
+        old_popularity = csr_matrix(old_popularity)
+    cluster_popularity = _resize_csr(old_popularity, (n_clusters, shape[1]))
+    existing = affected[is_existing]
+    cluster_popularity = (
+        cluster_popularity
+        - cluster_indicator(old_labels[is_existing], n_clusters) @ old_resized[existing]
+        + cluster_indicator(new_labels, n_clusters) @ new_rows
+    ).tocsr()
+    cluster_popularity.eliminate_zeros()
+
+    # Kode produk lama tetap stabil (produk baru ditambahkan di akhir), jadi top-list dibandingkan per kode
+    old_top = [set(row[row >= 0]) for row in np.asarray(artifacts['top_items'])]
+    top_codes = top_k(cluster_popularity, TOP_K)
+
+    # 5. Laporan drift (kumulatif sejak full retrain terakhir)
+    history = manifest.get('incremental', {})
+    trained_n_users = history.get('trained_n_users', old_n_users)
+    trained_n_products = history.get('trained_n_products', old_n_products)
+    distances = ((vectors - kmeans.cluster_centers_[new_labels]) ** 2).sum(axis=1)
+    baseline = manifest.get('baseline_inertia_per_user') or np.nan
+    new_top = [set(row[row >= 0]) for row in top_codes]
+    jaccard = [
+        len(old_top[c] & new_top[c]) / max(len(old_top[c] | new_top[c]), 1)
+        for c in range(n_clusters)
+    ]
+    drift = {
+        'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'delta_ratings': int(len(delta)),
+        'new_users': int(n_new_users),
+        'updated_users': int(is_existing.sum()),
+        'new_products': int(n_new_products),
+        'new_user_share': (shape[0] - trained_n_users) / trained_n_users,
+        'new_product_share': (shape[1] - trained_n_products) / trained_n_products,
+        'unseen_product_rating_share': float((product_codes >= n_svd_features).mean()),
+        'inertia_ratio': float(distances.mean() / baseline),
+        'reassigned_share': float((old_labels[is_existing] != new_labels[is_existing]).mean()) if is_existing.any() else 0.0,
+        'top_list_jaccard': float(np.mean(jaccard)),
+        'updates_since_retrain': history.get('updates_since_retrain', 0) + 1,
+    }
+    reasons = [name for name, limit in DRIFT_THRESHOLDS.items() if drift[name] > limit]
+    drift['retrain_recommended'] = bool(reasons)
+    drift['retrain_reasons'] = reasons
+
+    top_scores = top_k_scores(cluster_popularity, top_codes)
+    extra_arrays = {'user_clusters': user_clusters, 'cluster_popularity': cluster_popularity, 'top_scores': top_scores}
+    # SVD tidak berubah, jadi index ANN atas faktor item dipakai apa adanya
+    extra_arrays.update({name: artifacts[name] for name in ANN_ARRAYS if name in artifacts})
+    if 'user_top_items' in artifacts:
+        # Top-list cluster berubah untuk semua user, jadi tabel lookup disusun ulang seluruhnya
+        alpha = manifest.get('ranking', {}).get('blend_alpha', BLEND_ALPHA)
+        extra_arrays['user_top_items'], extra_arrays['user_top_scores'] = rank_users(
+            new_matrix, user_clusters, top_codes, top_scores, svd,
+            artifacts['user_top_items'].shape[1], alpha
+        )
+
+    # 6. Simpan artefak baru (swap atomik) + catat drift
+    print("💾 Menyimpan Model Terbarui...")
+    metadata = {key: value for key, value in manifest.items()
+                if key not in ('arrays', 'format_version', 'created', 'n_users', 'n_products',
+                               'n_clusters', 'n_components', 'matrix_shape', 'sparse_arrays', 'precision')}
+    metadata['incremental'] = {
+        'trained_n_users': trained_n_users,
+        'trained_n_products': trained_n_products,
+        'updates_since_retrain': drift['updates_since_retrain'],
+        'last_drift': drift,
+    }
+    save_artifacts(
+        artifact_dir,
+        svd_components=svd.dense_components(),
+        cluster_centers=kmeans.cluster_centers_,
+        user_item_matrix=new_matrix,
+        user_ids=user_ids,
+        product_ids=product_ids,
+        top_items_per_cluster=top_codes,
+        extra_arrays=extra_arrays,
+        metadata=metadata,
+        precision=manifest.get('precision', 'float64')  # Presisi artefak dipertahankan
+    )
+    store_rows, pending_rows = append_to_store(delta, min_ratings=min_ratings, min_product_ratings=min_product_ratings,
+                                               k_core=k_core) if update_store else (0, 0)
+    if publish:
+        publish_version(artifact_dir)
+    record_incremental_update({'timestamp': drift['timestamp'], 'delta_path': delta_path,
+                               'delta_ratings': drift['delta_ratings'], 'store_rows': store_rows,
+                               'pending_rows': pending_rows})
+
+    drift_history = []
+    if os.path.exists(DRIFT_HISTORY_PATH):
+        with open(DRIFT_HISTORY_PATH, 'r') as f:
+            drift_history = json.load(f)
+    drift_history.append(drift)
+    with open(DRIFT_HISTORY_PATH, 'w') as f:
+        json.dump(drift_history, f, indent=2)
+
+    print(f"✅ Update selesai: {drift['new_users']:,} user baru, {drift['updated_users']:,} user diperbarui, "
+          f"{drift['new_products']:,} produk baru.")
+    print(f"📐 Drift: inertia ratio {drift['inertia_ratio']:.2f} | reassigned {drift['reassigned_share']:.1%} | "
+          f"Jaccard top-list {drift['top_list_jaccard']:.2f}")
+    if drift['retrain_recommended']:
+        print(f"⚠️ Full retrain disarankan (melewati batas: {', '.join(reasons)})")
+    return drift
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Update inkremental model dari file rating baru")
+    parser.add_argument('delta_path', help="CSV rating baru (format ratings_Electronics.csv, tanpa header)")
+    parser.add_argument('--no-store', action='store_true', help="Jangan tambahkan delta ke store rating bersih")
+    parser.add_argument('--no-publish', action='store_true', help="Jangan publikasikan ke registry model")
+    parser.add_argument('--min-user-ratings', type=int, default=None,
+                        help="Minimal rating per user untuk masuk store (default: threshold saat store dibangun)")
+    parser.add_argument('--min-product-ratings', type=int, default=None,
+                        help="Minimal rating per produk untuk masuk store (default: threshold saat store dibangun)")
+    parser.add_argument('--k-core', action='store_true', default=None,
+                        help="Filter k-core untuk delta (default: mengikuti store)")
+    args = parser.parse_args()
+    incremental_update(args.delta_path, update_store=not args.no_store, publish=not args.no_publish,
+                       min_ratings=args.min_user_ratings, min_product_ratings=args.min_product_ratings,
+                       k_core=args.k_core)
@@ -0,0 +1,108 @@
+import numpy as np
+
+# Metrik ranking untuk matrix rekomendasi (user x K, kode produk dengan padding -1) terhadap
+# ground truth sparse (user x produk, biner). Semua K dihitung dalam satu pass: hit tiap posisi
+# dicari sekali, lalu metrik @K diambil dari jumlah kumulatif sepanjang posisi.
+METRIC_KS = (5, 10, 20, 50)
+METRIC_NAMES = ('precision', 'recall', 'f1_score', 'ndcg', 'map', 'mrr', 'hit_rate', 'coverage', 'diversity')
+# User per batch untuk diversity: tensor (batch x K x r) float32 ~ 4096 x 50 x 50 x 4 byte = 40 MB
+DIVERSITY_BATCH = 4_096
+
+def metric_key(name, k):
+    return f'{name}@{k}'
+
+def hit_matrix(recommendations, truth):
+    """Mask (user x K): apakah item di tiap posisi ada di ground truth user tersebut.
+
+    Dicek lewat kunci (baris, produk) terhadap nnz CSR yang sudah terurut (searchsorted).
+    """
+    truth = truth.tocsr()
+    truth.sort_indices()
+    n_cols = np.int64(truth.shape[1])
+    truth_keys = np.repeat(np.arange(truth.shape[0], dtype=np.int64), np.diff(truth.indptr)) * n_cols + truth.indices
+    keys = np.arange(recommendations.shape[0], dtype=np.int64)[:, None] * n_cols + np.maximum(recommendations, 0)
+    position = np.minimum(np.searchsorted(truth_keys, keys), max(len(truth_keys) - 1, 0))
+    found = truth_keys[position] == keys if len(truth_keys) else np.zeros(keys.shape, dtype=bool)
+    return found & (recommendations >= 0)
+
+def _intra_list_diversity(recommendations, item_vectors, batch_users=DIVERSITY_BATCH):
+    """Diversity kumulatif per posisi: rata-rata (1 - cosine) antar pasangan item dalam list.
+
+    Untuk vektor ternormalisasi, jumlah cosine antar pasangan = (||sum v||^2 - n) / 2,
+    sehingga cukup jumlah kumulatif vektor sepanjang posisi. Dihitung per
+    ``batch_users`` user agar tensor (user x K x r) tetap berukuran tetap.
+    """
+    vectors = np.asarray(item_vectors, dtype=np.float32)
+    vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    diversity = np.full(recommendations.shape, np.nan)
+    for start in range(0, len(recommendations), batch_users):
+        batch = recommendations[start:start + batch_users]
+        valid = batch >= 0
+        stacked = np.where(valid[..., None], vectors[np.maximum(batch, 0)], 0)
+        sums = np.cumsum(stacked, axis=1)
+        counts = np.cumsum(valid, axis=1)
+        pairs = counts * (counts - 1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean_cosine = ((sums ** 2).sum(axis=2) - counts) / pairs
+        diversity[start:start + len(batch)] = np.where(pairs > 0, 1 - mean_cosine, np.nan)
+    return diversity
+
+def ranking_metrics(recommendations, truth, n_relevant=None, ks=METRIC_KS, n_items=None, item_vectors=None):
+    """Precision, recall, F1, NDCG, MAP, MRR, hit rate, coverage & diversity @K untuk semua K sekaligus.
+
+    ``n_relevant`` (opsional) adalah jumlah item relevan per user termasuk yang
+    tidak mungkin direkomendasikan (default: nnz ground truth). Coverage =
+    produk unik yang direkomendasikan / ``n_items``; diversity butuh
+    ``item_vectors`` (faktor laten per produk). Mengembalikan dict datar
+    ``{'ndcg@10': ..., ...}`` berisi rata-rata antar user.
+    """
+    recommendations = np.asarray(recommendations)
+    n_users, max_k = recommendations.shape
+    ks = [k for k in sorted(ks) if k <= max_k] or [max_k]
+    if n_relevant is None:
+        n_relevant = np.diff(truth.tocsr().indptr)
+    n_relevant = np.asarray(n_relevant, dtype=np.float64)
+    n_items = n_items or truth.shape[1]
+    if n_users == 0:
+        return {}
+
+    hits = hit_matrix(recommendations, truth)
+    ranks = np.arange(1, max_k + 1)
+    discounts = 1 / np.log2(ranks + 1)
+    cum_hits = np.cumsum(hits, axis=1)
+    cum_dcg = np.cumsum(hits * discounts, axis=1)
+    cum_ideal = np.concatenate([[0], np.cumsum(discounts)])
+    # Average precision: presisi di tiap posisi hit, dijumlah kumulatif
+    cum_precision_at_hits = np.cumsum(np.where(hits, cum_hits / ranks, 0), axis=1)
+    first_hit = np.where(hits.any(axis=1), hits.argmax(axis=1) + 1, max_k + 1)
+    diversity = _intra_list_diversity(recommendations, item_vectors) if item_vectors is not None else None
+
+    results = {}
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for k in ks:
+            hits_at_k = cum_hits[:, k - 1]
+            precision = hits_at_k.mean() / k
+            recall = np.mean(np.where(n_relevant > 0, hits_at_k / n_relevant, 0))
+            ideal = cum_ideal[np.minimum(n_relevant, k).astype(int)]
+            results[metric_key('precision', k)] = float(precision)
+            results[metric_key('recall', k)] = float(recall)
+            results[metric_key('f1_score', k)] = float(2 * precision * recall / (precision + recall)) if precision + recall > 0 else 0.0
+            results[metric_key('ndcg', k)] = float(np.mean(np.where(ideal > 0, cum_dcg[:, k - 1] / ideal, 0)))
+            results[metric_key('map', k)] = float(np.mean(np.where(n_relevant > 0, cum_precision_at_hits[:, k - 1] / np.minimum(n_relevant, k), 0)))
+            results[metric_key('mrr', k)] = float(np.mean(np.where(first_hit <= k, 1 / first_hit, 0)))
+            results[metric_key('hit_rate', k)] = float((hits_at_k > 0).mean())
+            top = recommendations[:, :k]
+            results[metric_key('coverage', k)] = float(len(np.unique(top[top >= 0])) / n_items)
+            if diversity is not None:
+                results[metric_key('diversity', k)] = float(np.nanmean(diversity[:, k - 1])) if np.isfinite(diversity[:, k - 1]).any() else 0.0
+    return results
+
+def average_metrics(results):
+    """Rata-rata dict metrik antar fold (kunci yang tidak ada di sebuah fold diabaikan)."""
+    keys = list(dict.fromkeys(key for result in results for key in result))
+    return {key: float(np.mean([result[key] for result in results if key in result])) for key in keys}
+
+def split_metric_key(key):
+    """'ndcg@10' -> ('ndcg', 10); kunci tanpa @K -> (key, None)."""
+    name, _, k = key.partition('@')
+    return name, int(k) if k.isdigit() else None
@@ -0,0 +1,118 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.artifacts import ARTIFACT_DIR, MANIFEST_NAME, read_manifest
+
+# Registry model berversi: tiap versi adalah salinan direktori artefak yang tidak pernah diubah lagi,
+# dan file pointer CURRENT (ditulis atomik) menunjuk versi yang dilayani aplikasi.
+REGISTRY_DIR = 'models/registry'
+VERSIONS_DIR = os.path.join(REGISTRY_DIR, 'versions')
+CURRENT_PATH = os.path.join(REGISTRY_DIR, 'CURRENT')
+KEEP_VERSIONS = 5
+
+def _link_or_copy(src, dst):
+    # Hardlink cukup aman: save_artifacts selalu menulis file baru lalu swap direktori, tidak menimpa isi file
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+def version_dir(version_id):
+    return os.path.join(VERSIONS_DIR, version_id)
+
+def list_versions():
+    if not os.path.exists(VERSIONS_DIR):
+        return []
+    return sorted(name for name in os.listdir(VERSIONS_DIR) if not name.endswith('.tmp'))
+
+def current_version():
+    """ID versi yang sedang aktif, atau None bila registry masih kosong."""
+    try:
+        with open(CURRENT_PATH, 'r') as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+def set_current(version_id):
+    """Memindahkan pointer CURRENT secara atomik (tulis file sementara lalu os.replace)."""
+    if not os.path.exists(version_dir(version_id)):
+        raise ValueError(f"Versi model tidak ditemukan: {version_id}")
+    tmp_path = CURRENT_PATH + '.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(version_id)
+    os.replace(tmp_path, CURRENT_PATH)
+
+def publish_version(artifact_dir=ARTIFACT_DIR, activate=True):
+    """Membekukan artefak saat ini sebagai versi baru di registry lalu (opsional) mengaktifkannya."""
+    version_id = time.strftime('v%Y%m%d-%H%M%S')
+    suffix = 1
+    while os.path.exists(version_dir(version_id)):
+        version_id = f"{time.strftime('v%Y%m%d-%H%M%S')}-{suffix}"
+        suffix += 1
+
+    tmp_dir = version_dir(version_id) + '.tmp'
+    if os.path.exists(tmp_dir):
+        shutil.rmtree(tmp_dir)
+    shutil.copytree(artifact_dir, tmp_dir, copy_function=_link_or_copy, ignore=shutil.ignore_patterns(MANIFEST_NAME))
+
+    # Manifest ditulis ulang (bukan hardlink) karena menyimpan ID versi
+    manifest = read_manifest(artifact_dir)
+    manifest['version_id'] = version_id
+    manifest['published'] = time.strftime('%Y-%m-%d %H:%M:%S')
+    with open(os.path.join(tmp_dir, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_dir, version_dir(version_id))
+
+    if activate:
+        set_current(version_id)
+    print(f"📦 Model dipublikasikan sebagai versi {version_id}" + (" (aktif)" if activate else ""))
+    prune_versions()
+    return version_id
+
+def resolve_model_dir():
+    """(ID versi, direktori) yang harus dilayani; fallback ke direktori artefak kerja bila registry kosong."""
+    version_id = current_version()
+    if version_id and os.path.exists(version_dir(version_id)):
+        return version_id, version_dir(version_id)
+    # Tanpa registry, waktu pembuatan manifest dipakai sebagai ID agar perubahan tetap terdeteksi
+    try:
+        return f"local@{read_manifest(ARTIFACT_DIR).get('created', '')}", ARTIFACT_DIR
+    except FileNotFoundError:
+        return 'local', ARTIFACT_DIR
+
+def prune_versions(keep=KEEP_VERSIONS):
+    """Menghapus versi lama (versi aktif tidak pernah dihapus).
+
+    Proses yang masih memegang versi terhapus tetap aman: file .npy yang
+    sudah di-mmap tetap valid sampai ditutup.
+    """
+    current = current_version()
+    for version_id in list_versions()[:-keep]:
+        if version_id != current:
+            shutil.rmtree(version_dir(version_id))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Registry versi model (publish / rollback / list)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('list', help="Tampilkan semua versi")
+    subparsers.add_parser('publish', help=f"Publikasikan {ARTIFACT_DIR} sebagai versi baru & aktifkan")
+    rollback = subparsers.add_parser('rollback', help="Aktifkan versi tertentu")
+    rollback.add_argument('version_id')
+    args = parser.parse_args()
+
+    if args.command == 'list':
+        current = current_version()
+        for version_id in list_versions():
+            manifest = read_manifest(version_dir(version_id))
+            marker = '⬅️ aktif' if version_id == current else ''
+            print(f"{version_id}  {manifest.get('n_users', 0):>9,} user  {manifest.get('n_clusters')} cluster  {marker}")
+    elif args.command == 'publish':
+        publish_version()
+    elif args.command == 'rollback':
+        set_current(args.version_id)
+        print(f"↩️ Versi aktif sekarang {args.version_id}")
@@ -1,10 +1,13 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import time
 import requests
 import random
 from bs4 import BeautifulSoup
 import src.ui_components as ui
+from src.artifacts import decode_products
+from src.recommender import recommend, similar_items
 
 # --- HELPER: ROBUST LIVE SCRAPING V3 (MAXIMIZED) ---
 @st.cache_data(show_spinner=False)
@@ -155,7 +158,8 @@ def render(artifacts):
     </style>
     """, unsafe_allow_html=True)
     
-    pivot_table = artifacts['user_item_pivot']
+    user_ids = artifacts['user_ids']
+    product_ids = artifacts['product_ids']
     
     # Ultra Premium Hero Header
     st.markdown("""
@@ -190,7 +194,7 @@ def render(artifacts):
             <div style="position: relative; z-index: 1;">
                 <i class="ph-duotone ph-users-three metric-icon" style="font-size: 56px; color: #3b82f6; display: block; margin-bottom: 15px;"></i>
                 <div style="color: #848991; font-size: 11px; text-transform: uppercase; letter-spacing: 2px; font-weight: 800; margin-bottom: 10px;">Active Users</div>
-                <div style="color: #3b82f6; font-size: 42px; font-weight: 900; font-family: 'Inter', monospace; line-height: 1;">{pivot_table.shape[0]:,}</div>
+                <div style="color: #3b82f6; font-size: 42px; font-weight: 900; font-family: 'Inter', monospace; line-height: 1;">{len(user_ids):,}</div>
                 <div style="color: #555; font-size: 10px; margin-top: 8px; text-transform: uppercase; letter-spacing: 1px;">Registered Profiles</div>
             </div>
         </div>
@@ -205,14 +209,17 @@ def render(artifacts):
             <div style="position: relative; z-index: 1;">
                 <i class="ph-duotone ph-package metric-icon" style="font-size: 56px; color: #10B981; display: block; margin-bottom: 15px;"></i>
                 <div style="color: #848991; font-size: 11px; text-transform: uppercase; letter-spacing: 2px; font-weight: 800; margin-bottom: 10px;">Product Catalog</div>
-                <div style="color: #10B981; font-size: 42px; font-weight: 900; font-family: 'Inter', monospace; line-height: 1;">{pivot_table.shape[1]:,}</div>
+                <div style="color: #10B981; font-size: 42px; font-weight: 900; font-family: 'Inter', monospace; line-height: 1;">{len(product_ids):,}</div>
                 <div style="color: #555; font-size: 10px; margin-top: 8px; text-transform: uppercase; letter-spacing: 1px;">Unique Items</div>
             </div>
         </div>
         ''', unsafe_allow_html=True)
     
     with c3:
-        st.markdown('''
+        n_clusters = artifacts['kmeans'].n_clusters
+        selection = artifacts['manifest'].get('model_selection')
+        cluster_caption = 'Auto-selected (Silhouette)' if selection else 'User Segments'
+        st.markdown(f'''
         <div class="metric-card" style="background: linear-gradient(135deg, #2a3038 0%, #1f2630 100%); padding: 30px; border-radius: 14px; border: 2px solid #8b5cf6; text-align: center; position: relative; overflow: hidden;">
             <div style="position: absolute; top: -20px; right: -20px; opacity: 0.1;">
                 <i class="ph-duotone ph-graph" style="font-size: 120px; color: #8b5cf6;"></i>
@@ -220,8 +227,8 @@ def render(artifacts):
             <div style="position: relative; z-index: 1;">
                 <i class="ph-duotone ph-graph metric-icon" style="font-size: 56px; color: #8b5cf6; display: block; margin-bottom: 15px;"></i>
                 <div style="color: #848991; font-size: 11px; text-transform: uppercase; letter-spacing: 2px; font-weight: 800; margin-bottom: 10px;">AI Clusters</div>
-                <div style="color: #8b5cf6; font-size: 42px; font-weight: 900; font-family: 'Inter', monospace; line-height: 1;">10</div>
-                <div style="color: #555; font-size: 10px; margin-top: 8px; text-transform: uppercase; letter-spacing: 1px;">User Segments</div>
+                <div style="color: #8b5cf6; font-size: 42px; font-weight: 900; font-family: 'Inter', monospace; line-height: 1;">{n_clusters}</div>
+                <div style="color: #555; font-size: 10px; margin-top: 8px; text-transform: uppercase; letter-spacing: 1px;">{cluster_caption}</div>
             </div>
         </div>
         ''', unsafe_allow_html=True)
@@ -243,8 +250,7 @@ def render(artifacts):
     
     with col_input:
         st.markdown('<div style="margin-bottom: 8px;"><i class="ph-fill ph-user-circle-gear" style="color: #3b82f6; font-size: 18px; margin-right: 8px;"></i><strong style="color: white; font-size: 14px;">Target User Profile</strong></div>', unsafe_allow_html=True)
-        all_users = pivot_table.index.tolist()
-        user_id = st.selectbox("Select Active User ID", all_users[:20], label_visibility="collapsed")
+        user_id = st.selectbox("Select Active User ID", list(user_ids[:20]), label_visibility="collapsed")
     
     with col_param:
         st.markdown('<div style="margin-bottom: 8px;"><i class="ph-fill ph-list-numbers" style="color: #10B981; font-size: 18px; margin-right: 8px;"></i><strong style="color: white; font-size: 14px;">Recommendation Limit</strong></div>', unsafe_allow_html=True)
@@ -268,6 +274,66 @@ def render(artifacts):
     if button_clicked:
         _run_inference(artifacts, user_id, top_n, use_live_fetch)
 
+    _render_similar_items(artifacts)
+
+def _render_similar_items(artifacts):
+    """Panel produk serupa dari index ANN atas faktor item SVD."""
+    if 'ann_centroids' not in artifacts:
+        return
+
+    st.markdown("<br>", unsafe_allow_html=True)
+    st.markdown('''
+    <div style="display: flex; align-items: center; gap: 12px; margin-bottom: 20px;">
+        <i class="ph-duotone ph-squares-four" style="font-size: 28px; color: #8b5cf6;"></i>
+        <h3 style="margin: 0; color: white; font-size: 20px; font-weight: 700;">Similar Products</h3>
+        <div style="flex: 1; height: 2px; background: linear-gradient(90deg, #8b5cf6 0%, transparent 100%);"></div>
+    </div>
+    ''', unsafe_allow_html=True)
+
+    # Pilihan ASIN: produk teratas tiap cluster (kode di-decode hanya untuk yang ditampilkan)
+    top_items = np.asarray(artifacts['top_items'])[:, :5]
+    options = decode_products(artifacts['product_ids'], pd.unique(top_items.ravel()))
+
+    col_item, col_k = st.columns([3, 1])
+    with col_item:
+        asin = st.selectbox("Reference Product (ASIN)", options)
+    with col_k:
+        k = st.number_input("Neighbours", 5, 20, 10)
+
+    # Hanya query yang dipilih user (ASIN/k berubah) yang dicatat di log inferensi, bukan tiap rerun halaman
+    query = (asin, int(k))
+    requested = st.session_state.get('similar_items_query') not in (None, query)
+    st.session_state['similar_items_query'] = query
+
+    start = time.perf_counter()
+    neighbours = similar_items(artifacts, asin, k, log=requested)
+    query_ms = (time.perf_counter() - start) * 1000
+
+    ann = artifacts['manifest'].get('ann', {})
+    st.markdown(f'''
+    <div style="display: inline-flex; align-items: center; gap: 10px; background: rgba(139, 92, 246, 0.12); padding: 8px 16px; border-radius: 20px; border: 2px solid #8b5cf6; margin-bottom: 15px;">
+        <i class="ph-fill ph-lightning" style="color: #8b5cf6; font-size: 18px;"></i>
+        <span style="color: #ccc; font-size: 13px;">IVF query <strong style="color: white; font-family: monospace;">{query_ms:.2f} ms</strong>
+        · recall@{ann.get('k', 10)} vs brute force <strong style="color: white; font-family: monospace;">{ann.get('recall_at_k', float('nan')):.1%}</strong></span>
+    </div>
+    ''', unsafe_allow_html=True)
+
+    st.dataframe(
+        pd.DataFrame([
+            {"ASIN": item, "Similarity": score, "Link": f"https://www.amazon.com/dp/{item}"}
+            for item, score in neighbours
+        ], columns=["ASIN", "Similarity", "Link"]),
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "Similarity": st.column_config.ProgressColumn(
+                "Similarity", format="%.2f", min_value=0, max_value=1,
+                help="Cosine similarity of SVD item factors"
+            ),
+            "Link": st.column_config.LinkColumn("Action", display_text="View on Amazon")
+        }
+    )
+
 def _run_inference(artifacts, user_id, top_n, use_live_fetch):
     # Create placeholder for progress
     progress_placeholder = st.empty()
@@ -291,23 +357,18 @@ def _run_inference(artifacts, user_id, top_n, use_live_fetch):
         
         my_bar.progress(20, text="Vectorizing User Profile (SVD Transformation)...")
     
-    pivot_table = artifacts['user_item_pivot']
-    model = artifacts['kmeans']
-    svd = artifacts['svd']
-    top_items_map = artifacts['top_items_per_cluster']
-    
     try:
-        user_idx = pivot_table.index.get_loc(user_id)
-        user_vector = svd.transform(pivot_table.iloc[user_idx].values.reshape(1, -1))
+        # User yang dikenal: lookup tabel hasil training; SVD + K-Means hanya untuk user baru
+        result = recommend(artifacts, user_id=user_id, top_n=top_n)
+        cluster_id = result['cluster_id']
         
         with progress_placeholder.container():
             my_bar = st.progress(50, text="Identifying User Cluster (K-Means Prediction)...")
         
-        cluster_id = model.predict(user_vector)[0]
-        recommendations = top_items_map[cluster_id][:top_n]
+        # Top-list disimpan sebagai kode produk; ASIN baru di-decode untuk yang ditampilkan
+        recommendations = decode_products(artifacts['product_ids'], result['items'])
         
         results = []
-        score_start = 0.98
         
         total = len(recommendations)
         for i, asin in enumerate(recommendations):
@@ -325,10 +386,9 @@ def _run_inference(artifacts, user_id, top_n, use_live_fetch):
             results.append({
                 "ASIN": asin,
                 "Product Name": name,
-                "Relevance Score": score_start,
+                "Relevance Score": float(result['scores'][i]),
                 "Link": product_url
             })
-            score_start -= 0.03
 
         end_time = time.time()
         execution_time = end_time - start_time
@@ -359,8 +419,8 @@ def _run_inference(artifacts, user_id, top_n, use_live_fetch):
                         <p style="font-size: 15px; color: #ccc; line-height: 1.8; margin: 0;">
                             User <strong style="color: white; background: rgba(255, 255, 255, 0.1); padding: 2px 8px; border-radius: 4px; font-family: monospace;">{user_id}</strong> has been classified into 
                             <strong style="color: #3b82f6;">Cluster #{cluster_id}</strong>. 
-                            The <strong style="color: #FF9900;">{top_n} recommendations</strong> below are ranked by 
-                            <strong style="color: #10B981;">Top-Sum Popularity</strong> within this community cluster.
+                            The <strong style="color: #FF9900;">{len(results)} recommendations</strong> below are re-ranked by 
+                            <strong style="color: #10B981;">SVD Affinity × Top-Sum Popularity</strong> within this community cluster, excluding items already rated.
                         </p>
                     </div>
                     <div style="background: rgba(255, 153, 0, 0.15); padding: 15px 20px; border-radius: 10px; text-align: center; border: 2px solid #FF9900;">
@@ -376,7 +436,7 @@ def _run_inference(artifacts, user_id, top_n, use_live_fetch):
         st.markdown(f'''
         <div style="display: inline-flex; align-items: center; gap: 10px; background: linear-gradient(135deg, rgba(255, 215, 0, 0.15) 0%, rgba(255, 153, 0, 0.1) 100%); padding: 10px 18px; border-radius: 20px; border: 2px solid #FFD700; margin-bottom: 20px;">
             <i class="ph-fill ph-lightning" style="color: #FFD700; font-size: 22px;"></i>
-            <span style="color: #ccc; font-size: 14px;">Inference completed in <strong style="color: #FFD700; font-family: monospace; font-size: 16px;">{execution_time:.3f}s</strong></span>
+            <span style="color: #ccc; font-size: 14px;">Inference completed in <strong style="color: #FFD700; font-family: monospace; font-size: 16px;">{execution_time:.3f}s</strong> ({'precomputed lookup' if result['source'] == 'lookup' else 'SVD + K-Means'}) · model <strong style="color: #8b5cf6; font-family: monospace;">{result['model_version']}</strong></span>
         </div>
         ''', unsafe_allow_html=True)
         
@@ -400,7 +460,7 @@ def _run_inference(artifacts, user_id, top_n, use_live_fetch):
                     format="%.2f", 
                     min_value=0, 
                     max_value=1,
-                    help="AI-computed relevance score"
+                    help="Blend of latent-factor affinity and in-cluster popularity (0-1)"
                 ),
                 "Link": st.column_config.LinkColumn(
                     "Action", 
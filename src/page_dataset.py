@@ -88,15 +88,17 @@ def render(artifacts):
     </style>
     """, unsafe_allow_html=True)
     
-    pivot_table = artifacts['user_item_pivot']
+    user_ids = artifacts['user_ids']
+    product_ids = artifacts['product_ids']
+    user_item_matrix = artifacts['user_item_matrix']
     
     # Header
     st.markdown("<h1>Dataset Overview</h1>", unsafe_allow_html=True)
     
     # Hitung Statistik
-    n_users = pivot_table.shape[0]
-    n_items = pivot_table.shape[1]
-    n_ratings = pivot_table.astype(bool).sum().sum()
+    n_users = len(user_ids)
+    n_items = len(product_ids)
+    n_ratings = user_item_matrix.nnz
     matrix_size = n_users * n_items
     sparsity = 100 * (1 - (n_ratings / matrix_size))
     
@@ -124,7 +126,12 @@ def render(artifacts):
 
     with col_data:
         st.markdown("**Data Snapshot (Pivot)**")
-        st.dataframe(pivot_table.iloc[:10, :10], use_container_width=True, height=300)
+        snapshot = pd.DataFrame(
+            user_item_matrix[:10, :10].toarray(),
+            index=pd.Index(user_ids[:10], name='userId'),
+            columns=pd.Index(product_ids[:10], name='productId')
+        )
+        st.dataframe(snapshot, use_container_width=True, height=300)
 
     st.markdown("---")
     st.markdown("### Preprocessing Pipeline")
@@ -1,7 +1,24 @@
 import streamlit as st
 import json
+import numpy as np
+import pandas as pd
 import plotly.graph_objects as go
 import src.ui_components as ui
+from src.profiling import load_profile_history
+from src.metrics import split_metric_key
+
+# Tampilan tiap metrik: (label, warna, ikon, keterangan); metrik lain memakai gaya default
+METRIC_STYLES = {
+    'precision': ('Precision', '#3b82f6', 'ph-crosshair', 'Akurasi Rekomendasi'),
+    'recall': ('Recall', '#10b981', 'ph-magnifying-glass-plus', 'Cakupan Rekomendasi'),
+    'f1_score': ('F1-Score', '#8b5cf6', 'ph-function', 'Harmonic Mean'),
+    'ndcg': ('NDCG', '#f59e0b', 'ph-ranking', 'Kualitas Urutan'),
+    'map': ('MAP', '#ec4899', 'ph-stack', 'Mean Average Precision'),
+    'mrr': ('MRR', '#06b6d4', 'ph-number-circle-one', 'Posisi Hit Pertama'),
+    'hit_rate': ('Hit Rate', '#22c55e', 'ph-check-circle', 'User dengan ≥ 1 Hit'),
+    'coverage': ('Coverage', '#a855f7', 'ph-grid-four', 'Cakupan Katalog'),
+    'diversity': ('Diversity', '#ef4444', 'ph-shapes', 'Intra-List Diversity'),
+}
 
 def load_metrics():
     try:
@@ -10,11 +27,53 @@ def load_metrics():
     except FileNotFoundError:
         return None
 
-def render_performance_chart(metrics):
-    """Membuat Bar Chart Modern dengan Gradient Effects"""
-    labels = ['Precision@10', 'Recall@10', 'F1-Score']
-    values = [metrics['precision'], metrics['recall'], metrics['f1_score']]
-    colors = ['#3b82f6', '#10b981', '#8b5cf6']
+def load_baselines():
+    try:
+        with open('models/baselines.json', 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def metric_style(name):
+    return METRIC_STYLES.get(name, (name.replace('_', ' ').title(), '#FF9900', 'ph-chart-bar', ''))
+
+def report_metrics(metrics):
+    """Metrik laporan sebagai {nama: {K: nilai}}; laporan lama (tanpa ``metrics``) berisi P/R/F1 @10."""
+    if 'metrics' not in metrics:
+        return {name: {10: metrics[name]} for name in ('precision', 'recall', 'f1_score') if name in metrics}
+    table = {}
+    for key, value in metrics['metrics'].items():
+        name, k = split_metric_key(key)
+        table.setdefault(name, {})[k] = value
+    return table
+
+def render_metric_card(name, k, value, interval=None):
+    label, color, icon, caption = metric_style(name)
+    title = f"{label}@{k}" if k is not None else label
+    if interval:
+        caption = f"{caption} · CI {interval['low']:.4f} – {interval['high']:.4f}"
+    st.markdown(f'''
+    <div class="metric-card-animated" style="background: linear-gradient(135deg, #2a3038 0%, #1f2630 100%); padding: 20px 22px; border-radius: 12px; margin-bottom: 14px; border: 2px solid {color}; position: relative; overflow: hidden;">
+        <div style="position: absolute; top: 14px; right: 14px; opacity: 0.15;">
+            <i class="ph-duotone {icon} icon-pulse" style="font-size: 56px; color: {color};"></i>
+        </div>
+        <div style="position: relative; z-index: 1;">
+            <div style="display: flex; align-items: center; gap: 8px; margin-bottom: 10px;">
+                <i class="ph-fill {icon}" style="color: {color}; font-size: 18px;"></i>
+                <span style="color: #848991; font-size: 11px; text-transform: uppercase; letter-spacing: 1.5px; font-weight: 700;">{title}</span>
+            </div>
+            <div style="color: {color}; font-size: 30px; font-weight: 900; line-height: 1; font-family: 'Inter', monospace;">{value:.4f}</div>
+            <div style="color: #848991; font-size: 11px; margin-top: 8px;">{caption}</div>
+        </div>
+    </div>
+    ''', unsafe_allow_html=True)
+
+def render_performance_chart(table, k):
+    """Membuat Bar Chart Modern dengan Gradient Effects untuk semua metrik pada K terpilih"""
+    names = [name for name, values in table.items() if k in values]
+    labels = [f"{metric_style(name)[0]}@{k}" for name in names]
+    values = [table[name][k] for name in names]
+    colors = [metric_style(name)[1] for name in names]
     
     fig = go.Figure()
     
@@ -40,7 +99,7 @@ def render_performance_chart(metrics):
         plot_bgcolor='rgba(0,0,0,0)',
         paper_bgcolor='rgba(0,0,0,0)',
         font=dict(color='white', family="Inter", size=14),
-        height=300,
+        height=max(300, 45 * len(values)),
         margin=dict(l=20, r=80, t=30, b=30),
         xaxis=dict(
             showgrid=True, 
@@ -67,6 +126,107 @@ def render_performance_chart(metrics):
     
     return fig
 
+def baseline_table(report, k):
+    """Tabel kualitas & biaya tiap baseline pada K terpilih."""
+    rows = []
+    for baseline in report['baselines']:
+        row = {
+            "Model": baseline['label'],
+            "Train (s)": round(baseline['train_time_s'], 3),
+            "Latensi p50 (ms)": round(baseline['single_user_p50_ms'] or 0, 3),
+            "Batch (ms/user)": round(baseline['batch_ms_per_user'], 4),
+            "Artefak (MB)": round(baseline['artifact_bytes'] / 1024 ** 2, 2),
+        }
+        for key, value in baseline['metrics'].items():
+            name, metric_k = split_metric_key(key)
+            if metric_k == k:
+                row[f"{metric_style(name)[0]}@{k}"] = round(value, 4)
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+def render_baseline_chart(report, k, metric='ndcg', cost='train_time_s'):
+    """Scatter kualitas vs biaya: satu titik per baseline, ukuran titik = ukuran artefak."""
+    label, color = metric_style(metric)[:2]
+    cost_labels = {'train_time_s': "Train time (s)", 'single_user_p50_ms': "Latensi p50 / user (ms)"}
+    fig = go.Figure()
+    for baseline in report['baselines']:
+        value = baseline['metrics'].get(f"{metric}@{k}", 0)
+        size_mb = baseline['artifact_bytes'] / 1024 ** 2
+        fig.add_trace(go.Scatter(
+            x=[baseline[cost] or 0], y=[value], mode='markers+text', name=baseline['label'],
+            text=[baseline['label']], textposition='top center', textfont=dict(size=11, color='#ccc'),
+            marker=dict(size=14 + 6 * np.sqrt(size_mb), color=color, opacity=0.8, line=dict(color='white', width=1)),
+            hovertemplate=f"<b>{baseline['label']}</b><br>{label}@{k}: %{{y:.4f}}<br>"
+                          f"{cost_labels[cost]}: %{{x:.3f}}<br>Artefak: {size_mb:.2f} MB<extra></extra>",
+            showlegend=False
+        ))
+
+    fig.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white', family="Inter", size=12),
+        height=360,
+        margin=dict(l=20, r=20, t=30, b=30),
+        xaxis=dict(title=cost_labels[cost], showgrid=True, gridcolor='#2A3038', tickfont=dict(size=11, color='#848991')),
+        yaxis=dict(title=f"{label}@{k}", showgrid=True, gridcolor='#2A3038', tickfont=dict(size=11, color='#848991')),
+        hoverlabel=dict(bgcolor="#1A1F26", font_size=13, font_family="Inter", bordercolor='#FF9900')
+    )
+    return fig
+
+def latest_stage_table(history):
+    """Tabel biaya tiap tahap dari run terakhir setiap script pipeline."""
+    latest = {}
+    for run in history:
+        latest[run['script']] = run
+
+    rows = []
+    for script, run in latest.items():
+        for stage in run['stages']:
+            shape = next((stage[key] for key in stage if key.endswith('_shape')), None)
+            nnz = next((stage[key] for key in stage if key.endswith('_nnz')), None)
+            rows.append({
+                "Script": script,
+                "Stage": stage['stage'],
+                "Wall (s)": stage['wall_time_s'],
+                "CPU (s)": stage['cpu_time_s'],
+                "CPU anak (s)": stage.get('child_cpu_time_s', '-'),
+                "Peak RSS (MB)": stage['peak_rss_mb'],
+                "Shape": " × ".join(str(dim) for dim in shape) if shape else "-",
+                "nnz": f"{nnz:,}" if nnz is not None else "-",
+                "Run": run['timestamp'],
+            })
+    return pd.DataFrame(rows)
+
+def render_stage_history_chart(history, metric='wall_time_s'):
+    """Line chart biaya tiap tahap lintas run agar regresi terlihat."""
+    fig = go.Figure()
+    series = {}
+    for run in history:
+        for stage in run['stages']:
+            key = f"{run['script']} · {stage['stage']}"
+            series.setdefault(key, ([], []))
+            series[key][0].append(run['timestamp'])
+            series[key][1].append(stage[metric])
+
+    for key, (timestamps, values) in series.items():
+        fig.add_trace(go.Scatter(
+            x=timestamps, y=values, mode='lines+markers', name=key,
+            hovertemplate=f'<b>{key}</b><br>%{{x}}<br>%{{y:.3f}}<extra></extra>'
+        ))
+
+    fig.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white', family="Inter", size=12),
+        height=340,
+        margin=dict(l=20, r=20, t=30, b=30),
+        xaxis=dict(showgrid=False, tickfont=dict(size=11, color='#848991')),
+        yaxis=dict(showgrid=True, gridcolor='#2A3038', tickfont=dict(size=11, color='#848991')),
+        legend=dict(font=dict(size=10, color='#ccc'), orientation='h', y=-0.25),
+        hoverlabel=dict(bgcolor="#1A1F26", font_size=13, font_family="Inter", bordercolor='#FF9900')
+    )
+    return fig
+
 def render():
     # Load Phosphor Icons & Animations
     st.markdown("""
@@ -119,71 +279,38 @@ def render():
         st.warning("⚠️ Metrics file not found. Please run `src/evaluate.py` first.")
         return
 
+    # Semua metrik yang ada di laporan, dipilih per K
+    table = report_metrics(metrics)
+    ks = sorted({k for values in table.values() for k in values})
+    selected_k = st.radio("K", ks, index=ks.index(10) if 10 in ks else 0, horizontal=True,
+                          format_func=lambda k: f"@{k}")
+    intervals = metrics.get('confidence_intervals', {}) if selected_k == 10 else {}
+
     # Main Content Split
     col_metrics, col_viz = st.columns([1.2, 1.8], gap="large")
 
     with col_metrics:
         st.markdown("##### <i class='ph-bold ph-faders-horizontal'></i> Performance Metrics", unsafe_allow_html=True)
         st.markdown("<br>", unsafe_allow_html=True)
-        
-        # Precision Card
-        st.markdown(f'''
-        <div class="metric-card-animated" style="background: linear-gradient(135deg, #2a3038 0%, #1f2630 100%); padding: 30px 25px; border-radius: 12px; margin-bottom: 18px; border: 2px solid #3b82f6; position: relative; overflow: hidden;">
-            <div style="position: absolute; top: 20px; right: 20px; opacity: 0.15;">
-                <i class="ph-duotone ph-target icon-pulse" style="font-size: 80px; color: #3b82f6;"></i>
-            </div>
-            <div style="position: relative; z-index: 1;">
-                <div style="display: flex; align-items: center; gap: 10px; margin-bottom: 12px;">
-                    <i class="ph-fill ph-crosshair" style="color: #3b82f6; font-size: 20px;"></i>
-                    <span style="color: #848991; font-size: 12px; text-transform: uppercase; letter-spacing: 1.5px; font-weight: 700;">Precision@10</span>
-                </div>
-                <div style="color: #3b82f6; font-size: 42px; font-weight: 900; line-height: 1; font-family: 'Inter', monospace;">{metrics["precision"]:.4f}</div>
-                <div style="color: #848991; font-size: 11px; margin-top: 8px;">Akurasi Rekomendasi</div>
-            </div>
-        </div>
-        ''', unsafe_allow_html=True)
-        
-        # Recall Card
-        st.markdown(f'''
-        <div class="metric-card-animated" style="background: linear-gradient(135deg, #2a3038 0%, #1f2630 100%); padding: 30px 25px; border-radius: 12px; margin-bottom: 18px; border: 2px solid #10b981; position: relative; overflow: hidden;">
-            <div style="position: absolute; top: 20px; right: 20px; opacity: 0.15;">
-                <i class="ph-duotone ph-binoculars icon-pulse" style="font-size: 80px; color: #10b981;"></i>
-            </div>
-            <div style="position: relative; z-index: 1;">
-                <div style="display: flex; align-items: center; gap: 10px; margin-bottom: 12px;">
-                    <i class="ph-fill ph-magnifying-glass-plus" style="color: #10b981; font-size: 20px;"></i>
-                    <span style="color: #848991; font-size: 12px; text-transform: uppercase; letter-spacing: 1.5px; font-weight: 700;">Recall@10</span>
-                </div>
-                <div style="color: #10b981; font-size: 42px; font-weight: 900; line-height: 1; font-family: 'Inter', monospace;">{metrics["recall"]:.4f}</div>
-                <div style="color: #848991; font-size: 11px; margin-top: 8px;">Cakupan Rekomendasi</div>
-            </div>
-        </div>
-        ''', unsafe_allow_html=True)
-        
-        # F1 Score Card
-        st.markdown(f'''
-        <div class="metric-card-animated" style="background: linear-gradient(135deg, #2a3038 0%, #1f2630 100%); padding: 30px 25px; border-radius: 12px; border: 2px solid #8b5cf6; position: relative; overflow: hidden;">
-            <div style="position: absolute; top: 20px; right: 20px; opacity: 0.15;">
-                <i class="ph-duotone ph-equals icon-pulse" style="font-size: 80px; color: #8b5cf6;"></i>
-            </div>
-            <div style="position: relative; z-index: 1;">
-                <div style="display: flex; align-items: center; gap: 10px; margin-bottom: 12px;">
-                    <i class="ph-fill ph-function" style="color: #8b5cf6; font-size: 20px;"></i>
-                    <span style="color: #848991; font-size: 12px; text-transform: uppercase; letter-spacing: 1.5px; font-weight: 700;">F1-Score</span>
-                </div>
-                <div style="color: #8b5cf6; font-size: 42px; font-weight: 900; line-height: 1; font-family: 'Inter', monospace;">{metrics["f1_score"]:.4f}</div>
-                <div style="color: #848991; font-size: 11px; margin-top: 8px;">Harmonic Mean</div>
-            </div>
-        </div>
-        ''', unsafe_allow_html=True)
+
+        card_cols = st.columns(2)
+        names = [name for name, values in table.items() if selected_k in values]
+        for i, name in enumerate(names):
+            with card_cols[i % 2]:
+                render_metric_card(name, selected_k, table[name][selected_k], intervals.get(name))
 
     with col_viz:
         st.markdown("##### <i class='ph-bold ph-chart-bar-horizontal'></i> Comparative Visualization", unsafe_allow_html=True)
         st.markdown("<br>", unsafe_allow_html=True)
         
         # Chart
-        chart = render_performance_chart(metrics)
+        chart = render_performance_chart(table, selected_k)
         st.plotly_chart(chart, use_container_width=True, config={'displayModeBar': False})
+
+        # Tabel lengkap metrik x K
+        st.dataframe(pd.DataFrame({
+            metric_style(name)[0]: {f"@{k}": value for k, value in values.items()} for name, values in table.items()
+        }).T, use_container_width=True)
         
         st.markdown("<br>", unsafe_allow_html=True)
         
@@ -206,6 +333,48 @@ def render():
         </div>
         ''', unsafe_allow_html=True)
 
+    # Baseline Comparison (kualitas vs biaya beberapa recommender pada fold yang sama)
+    st.markdown("<br><br>", unsafe_allow_html=True)
+    st.markdown("---")
+    st.markdown("##### <i class='ph-bold ph-scales'></i> Baseline Comparison", unsafe_allow_html=True)
+
+    baselines = load_baselines()
+    if not baselines:
+        st.info("Belum ada perbandingan baseline. Jalankan `src/baselines.py`.")
+    else:
+        baseline_k = selected_k if selected_k in baselines['ks'] else max(baselines['ks'])
+        st.caption(f"{baselines['n_folds']}-fold, {baselines['n_users']:,} user · metrik @{baseline_k} · "
+                   f"run {baselines['timestamp']}")
+        st.dataframe(baseline_table(baselines, baseline_k), use_container_width=True, hide_index=True)
+
+        metric_names = list(dict.fromkeys(split_metric_key(key)[0] for key in baselines['baselines'][0]['metrics']))
+        col_metric, col_cost = st.columns(2)
+        with col_metric:
+            chart_metric = st.selectbox("Metrik kualitas", metric_names,
+                                        index=metric_names.index('ndcg') if 'ndcg' in metric_names else 0,
+                                        format_func=lambda name: metric_style(name)[0])
+        with col_cost:
+            chart_cost = st.radio("Biaya", ['train_time_s', 'single_user_p50_ms'], horizontal=True,
+                                  format_func=lambda cost: "Train time" if cost == 'train_time_s' else "Latensi / user")
+        baseline_chart = render_baseline_chart(baselines, baseline_k, chart_metric, chart_cost)
+        st.plotly_chart(baseline_chart, use_container_width=True, config={'displayModeBar': False})
+
+    # Pipeline Cost Profile (waktu & memori tiap tahap, plus history lintas run)
+    st.markdown("<br><br>", unsafe_allow_html=True)
+    st.markdown("---")
+    st.markdown("##### <i class='ph-bold ph-timer'></i> Pipeline Cost Profile", unsafe_allow_html=True)
+
+    history = load_profile_history()
+    if not history:
+        st.info("Belum ada profil pipeline. Jalankan `src/preprocessing.py`, `src/train_model.py` dan `src/evaluate.py`.")
+    else:
+        st.dataframe(latest_stage_table(history), use_container_width=True, hide_index=True)
+
+        metric_labels = {"Wall time (s)": 'wall_time_s', "CPU time (s)": 'cpu_time_s', "Peak RSS (MB)": 'peak_rss_mb'}
+        selected_metric = st.radio("History metric", list(metric_labels), horizontal=True, label_visibility="collapsed")
+        history_chart = render_stage_history_chart(history, metric_labels[selected_metric])
+        st.plotly_chart(history_chart, use_container_width=True, config={'displayModeBar': False})
+
     # Technical Methodology
     st.markdown("<br><br>", unsafe_allow_html=True)
     st.markdown("---")
@@ -233,4 +402,10 @@ def render():
         - **<span style="color: #3b82f6;">Precision@10</span>:** Dari 10 barang yang direkomendasikan, berapa persen yang relevan/dibeli user?
         - **<span style="color: #10b981;">Recall@10</span>:** Dari seluruh barang yang disukai user, berapa persen yang berhasil ditemukan sistem?
         - **<span style="color: #8b5cf6;">F1-Score</span>:** Harmonic mean dari Precision dan Recall (mengukur keseimbangan keduanya).
+        - **<span style="color: #f59e0b;">NDCG@K</span>:** Hit di posisi atas diberi bobot lebih besar (dinormalisasi terhadap urutan ideal).
+        - **<span style="color: #ec4899;">MAP@K</span>:** Rata-rata precision di setiap posisi hit.
+        - **<span style="color: #06b6d4;">MRR@K</span>:** Kebalikan posisi hit pertama.
+        - **<span style="color: #22c55e;">Hit Rate@K</span>:** Persentase user dengan minimal satu hit.
+        - **<span style="color: #a855f7;">Coverage@K</span>:** Persentase katalog yang pernah direkomendasikan.
+        - **<span style="color: #ef4444;">Diversity@K</span>:** Rata-rata jarak cosine antar item dalam satu daftar (faktor SVD).
         """, unsafe_allow_html=True)
\ No newline at end of file
@@ -0,0 +1,253 @@
+import os
+import sys
+import json
+import shutil
+import hashlib
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.preprocessing import MIN_USER_RATINGS, MIN_PRODUCT_RATINGS, process_data
+from src.train_model import train_model
+from src.evaluate import evaluate_model_cv
+from src.factorization import SVD_BACKENDS
+from src.artifacts import ARTIFACT_DIR
+from src.ratings_store import STORE_DIR
+from src.clustering import REDUCED_PATH
+from src.model_registry import publish_version
+
+# Pipeline preprocess -> train -> evaluate dengan cache per tahap berbasis fingerprint konten.
+# Fingerprint tahap = hash(input, parameter, kode tahap, fingerprint tahap upstream), sehingga
+# perubahan di hulu otomatis meng-invalidasi tahap di hilir.
+RAW_PATH = 'data/ratings_Electronics.csv'
+CACHE_DIR = '.cache/pipeline'
+STATE_PATH = os.path.join(CACHE_DIR, 'state.json')
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+STAGES = {
+    'preprocess': {
+        'upstream': None,
+        'sources': ['preprocessing.py', 'ratings_store.py', 'factorization.py'],
+        'outputs': ['data/preprocessed_features.pkl', REDUCED_PATH, STORE_DIR],
+    },
+    'train': {
+        'upstream': 'preprocess',
+        'sources': ['train_model.py', 'artifacts.py', 'clustering.py', 'popularity.py', 'ranking.py', 'ann_index.py'],
+        'outputs': [ARTIFACT_DIR],
+    },
+    'evaluate': {
+        'upstream': 'preprocess',
+        'sources': ['evaluate.py', 'factorization.py', 'popularity.py', 'shared_arrays.py', 'metrics.py',
+                    'fold_cache.py'],
+        'outputs': ['models/metrics.json'],
+    },
+}
+
+def _load_state():
+    if os.path.exists(STATE_PATH):
+        with open(STATE_PATH, 'r') as f:
+            return json.load(f)
+    return {'current': {}, 'file_hashes': {}}
+
+def _save_state(state):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(STATE_PATH, 'w') as f:
+        json.dump(state, f, indent=2)
+
+def record_incremental_update(update):
+    """Mencatat update inkremental (``incremental_update.py``) di state pipeline.
+
+    Update mengubah store rating & artefak di luar pipeline, jadi revisinya
+    ikut masuk fingerprint preprocess: run pipeline berikutnya membangun ulang
+    fitur dari store (berisi delta) dan train/evaluate tidak dianggap up to date.
+    """
+    state = _load_state()
+    incremental = state.setdefault('incremental', {'revision': 0, 'updates': []})
+    incremental['revision'] += 1
+    incremental['updates'].append(update)
+    _save_state(state)
+    return incremental['revision']
+
+def file_hash(path, state=None, chunk_size=8 * 1024 * 1024):
+    """SHA-256 isi file; di-memo per (ukuran, mtime) agar CSV besar tidak di-hash ulang tiap run."""
+    stat = os.stat(path)
+    key = f'{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}'
+    if state is not None and key in state['file_hashes']:
+        return state['file_hashes'][key]
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    if state is not None:
+        state['file_hashes'][key] = digest.hexdigest()
+    return digest.hexdigest()
+
+def stage_fingerprint(stage, params, inputs, upstream_fingerprint, state):
+    """Fingerprint tahap dari parameter, hash input, hash kode sumber & fingerprint upstream."""
+    payload = {
+        'stage': stage,
+        'params': params,
+        'inputs': {path: file_hash(path, state) for path in inputs},
+        'sources': {name: file_hash(os.path.join(SRC_DIR, name), state) for name in STAGES[stage]['sources']},
+        'upstream': upstream_fingerprint,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()[:16]
+
+def _copy_path(src, dst):
+    if os.path.islink(dst):
+        os.remove(dst)
+    elif os.path.isdir(dst):
+        shutil.rmtree(dst)
+    elif os.path.exists(dst):
+        os.remove(dst)
+    os.makedirs(os.path.dirname(dst) or '.', exist_ok=True)
+    if os.path.isdir(src):
+        shutil.copytree(src, dst)
+    else:
+        shutil.copy2(src, dst)
+
+def _entry_dir(stage, fingerprint):
+    return os.path.join(CACHE_DIR, stage, fingerprint)
+
+def _store_outputs(stage, fingerprint):
+    entry = _entry_dir(stage, fingerprint)
+    tmp_entry = entry + '.tmp'
+    if os.path.exists(tmp_entry):
+        shutil.rmtree(tmp_entry)
+    for index, path in enumerate(STAGES[stage]['outputs']):
+        _copy_path(path, os.path.join(tmp_entry, str(index)))
+    if os.path.exists(entry):
+        shutil.rmtree(entry)
+    os.replace(tmp_entry, entry)
+
+def _restore_outputs(stage, fingerprint):
+    entry = _entry_dir(stage, fingerprint)
+    for index, path in enumerate(STAGES[stage]['outputs']):
+        _copy_path(os.path.join(entry, str(index)), path)
+
+def _newest_mtime(path):
+    """mtime (ns) terbaru dari file atau isi direktori (rekursif, mengikuti symlink direktori artefak)."""
+    if not os.path.isdir(path):
+        return os.stat(path).st_mtime_ns
+    newest = os.stat(path).st_mtime_ns
+    for root, _, files in os.walk(path):
+        for name in files:
+            newest = max(newest, os.stat(os.path.join(root, name)).st_mtime_ns)
+    return newest
+
+def _start_marker(stage):
+    """Waktu mulai tahap menurut jam filesystem (mtime file penanda), agar sebanding dengan mtime output."""
+    marker = os.path.join(CACHE_DIR, f'{stage}.started')
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(marker, 'w'):
+        pass
+    return os.stat(marker).st_mtime_ns
+
+def run_stage(stage, params, inputs, runner, fingerprints, state, force=False):
+    """Menjalankan satu tahap, atau melewatinya bila fingerprint sama dengan cache.
+
+    Tahap dianggap berhasil hanya bila runner tidak mengembalikan status gagal
+    (False/None) dan semua output ditulis ulang setelah tahap dimulai; output
+    lama yang masih tertinggal di disk tidak pernah disimpan ke cache.
+    """
+    upstream = STAGES[stage]['upstream']
+    fingerprint = stage_fingerprint(stage, params, inputs, fingerprints.get(upstream), state)
+    fingerprints[stage] = fingerprint
+    outputs_present = all(os.path.exists(path) for path in STAGES[stage]['outputs'])
+
+    if not force and state['current'].get(stage) == fingerprint and outputs_present:
+        print(f"⏭️  [{stage}] fingerprint {fingerprint} tidak berubah, output saat ini dipakai ulang.")
+        return False
+    if not force and os.path.exists(_entry_dir(stage, fingerprint)):
+        print(f"♻️  [{stage}] fingerprint {fingerprint} ada di cache, output dipulihkan.")
+        _restore_outputs(stage, fingerprint)
+    else:
+        print(f"▶️  [{stage}] fingerprint {fingerprint} berubah, tahap dijalankan...")
+        started = _start_marker(stage)
+        if not runner():
+            raise RuntimeError(f"Tahap {stage} gagal (lihat pesan error di atas).")
+        stale = [path for path in STAGES[stage]['outputs']
+                 if not os.path.exists(path) or _newest_mtime(path) < started]
+        if stale:
+            raise RuntimeError(f"Tahap {stage} tidak menulis ulang output {stale}")
+        _store_outputs(stage, fingerprint)
+
+    state['current'][stage] = fingerprint
+    _save_state(state)
+    return True
+
+def run_pipeline(min_ratings=MIN_USER_RATINGS, min_product_ratings=MIN_PRODUCT_RATINGS, k_core=False,
+                 streaming=False, n_components=50, svd_backend='truncated', n_iter=5, n_clusters=10,
+                 eval_n_components=30, eval_n_clusters=8, force=False, discard_incremental=False):
+    """Menjalankan preprocess -> train -> evaluate dengan melewati tahap yang tidak berubah.
+
+    Setelah update inkremental, preprocess dibangun dari store rating (berisi
+    delta) alih-alih CSV raw. ``discard_incremental`` membuang catatan update
+    sehingga preprocess kembali dari CSV raw (delta yang tidak ada di CSV hilang).
+    """
+    print("🧩 Memulai Pipeline (preprocess → train → evaluate)...")
+    if not os.path.exists(RAW_PATH):
+        print(f"❌ Error: File {RAW_PATH} tidak ditemukan.")
+        return
+
+    state = _load_state()
+    fingerprints = {}
+
+    if discard_incremental and 'incremental' in state:
+        print(f"🗑️  Catatan {len(state.pop('incremental')['updates'])} update inkremental dibuang, "
+              f"preprocess kembali dari {RAW_PATH}.")
+        # Store & artefak di disk masih memuat delta: tidak ada tahap yang boleh dianggap up to date
+        state['current'] = {}
+        _save_state(state)
+    revision = state.get('incremental', {}).get('revision', 0)
+
+    # streaming hanya mempengaruhi memori, bukan hasil, sehingga tidak masuk fingerprint
+    preprocess_params = {
+        'min_ratings': min_ratings, 'min_product_ratings': min_product_ratings, 'k_core': k_core,
+        'n_components': n_components, 'svd_backend': svd_backend, 'n_iter': n_iter,
+    }
+    if revision:
+        # Store rating sudah memuat delta yang tidak ada di CSV raw
+        print(f"🔁 Store rating memuat {revision} update inkremental, preprocess memakai store (bukan CSV raw).")
+        preprocess_params['incremental_revision'] = revision
+    run_stage('preprocess', preprocess_params, [RAW_PATH], lambda: process_data(
+        streaming=streaming, k_core=k_core, from_cache=bool(revision), n_components=n_components,
+        svd_backend=svd_backend, n_iter=n_iter, min_ratings=min_ratings, min_product_ratings=min_product_ratings
+    ), fingerprints, state, force)
+
+    # Publikasi ke registry dilakukan di sini agar output yang dipulihkan dari cache juga ikut dilayani
+    if run_stage('train', {'n_clusters': n_clusters}, [], lambda: train_model(n_clusters=n_clusters, publish=False),
+                 fingerprints, state, force):
+        publish_version(ARTIFACT_DIR)
+
+    evaluate_params = {'n_components': eval_n_components, 'n_clusters': eval_n_clusters,
+                       'svd_backend': svd_backend, 'n_iter': n_iter}
+    run_stage('evaluate', evaluate_params, [], lambda: evaluate_model_cv(
+        svd_backend=svd_backend, n_iter=n_iter, n_components=eval_n_components, n_clusters=eval_n_clusters
+    ), fingerprints, state, force)
+
+    print("✅ Pipeline selesai.")
+    return fingerprints
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pipeline preprocess → train → evaluate dengan stage cache")
+    parser.add_argument('--min-user-ratings', type=int, default=MIN_USER_RATINGS)
+    parser.add_argument('--min-product-ratings', type=int, default=MIN_PRODUCT_RATINGS)
+    parser.add_argument('--k-core', action='store_true')
+    parser.add_argument('--streaming', action='store_true')
+    parser.add_argument('--n-components', type=int, default=50)
+    parser.add_argument('--svd-backend', choices=SVD_BACKENDS, default='truncated')
+    parser.add_argument('--n-iter', type=int, default=5)
+    parser.add_argument('--n-clusters', default=10, type=lambda value: value if value == 'auto' else int(value))
+    parser.add_argument('--eval-n-components', type=int, default=30)
+    parser.add_argument('--eval-n-clusters', type=int, default=8)
+    parser.add_argument('--force', action='store_true', help="Jalankan semua tahap tanpa memakai cache")
+    parser.add_argument('--discard-incremental', action='store_true',
+                        help="Buang catatan update inkremental & preprocess ulang dari CSV raw")
+    args = parser.parse_args()
+    try:
+        run_pipeline(args.min_user_ratings, args.min_product_ratings, args.k_core, args.streaming,
+                     args.n_components, args.svd_backend, args.n_iter, args.n_clusters,
+                     args.eval_n_components, args.eval_n_clusters, args.force, args.discard_incremental)
+    except RuntimeError as error:
+        print(f"❌ Pipeline berhenti: {error}")
+        sys.exit(1)
@@ -0,0 +1,82 @@
+import numpy as np
+from scipy.sparse import csr_matrix, issparse
+
+# Popularitas per cluster & seleksi Top-K tanpa loop per cluster.
+# Biaya didominasi nnz matrix user-item, bukan jumlah cluster.
+TOP_K = 50
+
+def cluster_indicator(labels, n_clusters, dtype=np.float64):
+    """Matrix indikator sparse (n_clusters x n_user) dari label cluster."""
+    labels = np.asarray(labels)
+    return csr_matrix((np.ones(len(labels), dtype=dtype), (labels, np.arange(len(labels)))),
+                      shape=(n_clusters, len(labels)))
+
+def cluster_popularity(user_item_matrix, labels, n_clusters):
+    """Total rating per (cluster, produk) untuk semua cluster dalam satu perkalian sparse.
+
+    Hasilnya CSR (n_clusters x n_produk): hanya produk yang pernah dirating
+    anggota cluster yang disimpan, sehingga ribuan cluster tetap muat di memori.
+    """
+    indicator = cluster_indicator(labels, n_clusters, dtype=user_item_matrix.dtype)
+    popularity = (indicator @ user_item_matrix).tocsr()
+    popularity.eliminate_zeros()
+    return popularity
+
+def _dense_top_k(scores, k):
+    k = min(k, scores.shape[1])
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1)
+    return np.take_along_axis(top, order, axis=1).astype(np.int32)
+
+def _sparse_top_k(scores, k):
+    # Seleksi parsial: argpartition pada slice CSR tiap baris yang punya > K entri (O(nnz baris)),
+    # lalu lexsort hanya atas kandidat terpilih untuk urutan skor menurun & tie-break per kolom
+    scores = scores.tocsr()
+    k = min(k, scores.shape[1])
+    lengths = np.diff(scores.indptr)
+    selected = np.ones(scores.nnz, dtype=bool)
+    for row in np.flatnonzero(lengths > k):
+        start, stop = scores.indptr[row], scores.indptr[row + 1]
+        data = scores.data[start:stop]
+        # Semua entri yang setara dengan skor ke-K ikut jadi kandidat agar tie-break tetap per kolom
+        threshold = data[np.argpartition(-data, k - 1)[k - 1]]
+        selected[start:stop] = data >= threshold
+
+    rows = np.repeat(np.arange(scores.shape[0]), lengths)[selected]
+    cols, values = scores.indices[selected], scores.data[selected]
+    order = np.lexsort((cols, -values, rows))
+    rows, cols = rows[order], cols[order]
+    rank = np.arange(len(rows)) - np.searchsorted(rows, rows)
+    keep = rank < k
+    table = np.full((scores.shape[0], k), -1, dtype=np.int32)
+    table[rows[keep], rank[keep]] = cols[keep]
+    return table
+
+def top_k(scores, k):
+    """Kode kolom Top-K per baris (terurut skor menurun) sebagai array int32.
+
+    Untuk input sparse, baris dengan kurang dari K entri diisi padding -1.
+    """
+    if issparse(scores):
+        return _sparse_top_k(scores, k)
+    return _dense_top_k(np.asarray(scores), k)
+
+def top_k_scores(scores, codes):
+    """Skor untuk tabel kode Top-K (padding -1 -> 0) sebagai float32."""
+    rows = np.repeat(np.arange(codes.shape[0]), codes.shape[1])
+    cols = np.maximum(codes, 0).ravel()
+    if issparse(scores):
+        values = np.asarray(scores.tocsr()[rows, cols]).ravel()
+    else:
+        values = np.asarray(scores)[rows, cols]
+    return np.where(codes >= 0, values.reshape(codes.shape), 0).astype(np.float32)
+
+def seen_mask(user_rows, candidates):
+    """Mask (n_baris x K): kandidat yang sudah dirating user pada baris yang sama.
+
+    Dicek lewat kunci (baris, produk) terhadap nnz CSR, tanpa membentuk matrix dense.
+    """
+    n_products = user_rows.shape[1]
+    local_rows = np.arange(user_rows.shape[0], dtype=np.int64)
+    seen_keys = np.repeat(local_rows, np.diff(user_rows.indptr)) * n_products + user_rows.indices
+    return np.isin(local_rows[:, None] * n_products + candidates, seen_keys)
@@ -1,71 +1,369 @@
 import pandas as pd
 import numpy as np
 import os
+import sys
+import argparse
 import joblib
-from scipy.sparse import csr_matrix
-from sklearn.decomposition import TruncatedSVD
+from scipy.sparse import coo_matrix
 
-def process_data():
-    print("🔄 [1/2] Memuat dataset raw...")
-    input_path = 'data/ratings_Electronics.csv'
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.ratings_store import (STORE_DIR, TIMESTAMP_COLUMN, save_ratings_store, load_ratings_store,
+                               load_pending_ratings, save_pending_ratings, read_store_filters)
+from src.factorization import SVD_BACKENDS, factorize, log_factorization_run
+from src.profiling import PipelineProfiler, describe_matrix
+from src.clustering import REDUCED_PATH
+
+RAW_PATH = 'data/ratings_Electronics.csv'
+RAW_COLUMNS = ['userId', 'productId', 'rating', 'timestamp']
+MIN_USER_RATINGS = 50
+MIN_PRODUCT_RATINGS = 5
+RATING_RANGE = (1.0, 5.0)  # Skala bintang Amazon
+
+def matrix_from_codes(user_codes, product_codes, ratings, shape):
+    """Membangun CSR dari kode integer; rating duplikat per sel dirata-rata."""
+    ratings = np.asarray(ratings, dtype='float32')
+    rating_sum = coo_matrix((ratings, (user_codes, product_codes)), shape=shape).tocsr()
+    rating_count = coo_matrix((np.ones_like(ratings), (user_codes, product_codes)), shape=shape).tocsr()
+    rating_sum.data /= rating_count.data
+    rating_sum.eliminate_zeros()
+    return rating_sum
+
+def encode_ratings(df):
+    """Kode kategori int32 per baris + tabel ID terurut untuk userId & productId."""
+    user_cat = df['userId'].astype('category')
+    product_cat = df['productId'].astype('category')
+    user_codes = user_cat.cat.codes.values.astype(np.int32)
+    product_codes = product_cat.cat.codes.values.astype(np.int32)
+    user_ids = np.asarray(user_cat.cat.categories, dtype=object)
+    product_ids = np.asarray(product_cat.cat.categories, dtype=object)
+    return user_codes, product_codes, user_ids, product_ids
+
+def build_user_item_matrix(df):
+    """Membangun matrix CSR user-item langsung dari rating (tanpa pivot dense).
+
+    Rating duplikat untuk pasangan (user, produk) yang sama dirata-rata,
+    sama seperti perilaku default ``pivot_table`` (aggfunc='mean').
+    Mengembalikan (matrix, user_ids, product_ids) dengan urutan index
+    terurut seperti index/kolom ``pivot_table``.
+    """
+    user_codes, product_codes, user_ids, product_ids = encode_ratings(df)
+    matrix = matrix_from_codes(user_codes, product_codes, df['rating'].values, (len(user_ids), len(product_ids)))
+    return matrix, user_ids, product_ids
+
+def drop_invalid_ratings(df):
+    """Membuang baris tanpa userId/productId atau dengan rating di luar ``RATING_RANGE`` (termasuk NaN)."""
+    valid = (df['userId'].notna() & df['productId'].notna()
+             & df['rating'].between(*RATING_RANGE))
+    return df if valid.all() else df[valid]
+
+def filter_active(df, min_ratings=MIN_USER_RATINGS, min_product_ratings=MIN_PRODUCT_RATINGS, k_core=False):
+    """Filter user aktif lalu produk aktif (in-memory).
+
+    Dengan ``k_core=True`` filter diulang sampai tidak ada baris yang terbuang lagi,
+    sehingga semua user tersisa punya >= min_ratings dan semua produk >= min_product_ratings.
+    """
+    while True:
+        n_before = len(df)
+
+        # Filter User (Minimal 50 interaksi)
+        user_counts = df['userId'].value_counts()
+        active_users = user_counts[user_counts >= min_ratings].index
+        df = df[df['userId'].isin(active_users)]
+
+        # Filter Produk (Minimal 5 interaksi)
+        product_counts = df['productId'].value_counts()
+        active_products = product_counts[product_counts >= min_product_ratings].index
+        df = df[df['productId'].isin(active_products)]
+
+        if not k_core or len(df) == n_before:
+            return df
+
+def _encode_ids(values, vocab):
+    """Dictionary-encode ID string ke int32; ID baru ditambahkan ke vocab."""
+    chunk_codes, chunk_uniques = pd.factorize(values)
+    global_codes = np.fromiter(
+        (vocab.setdefault(key, len(vocab)) for key in chunk_uniques),
+        dtype=np.int32, count=len(chunk_uniques)
+    )
+    return global_codes[chunk_codes]
+
+def _add_counts(counts, codes, mask=None):
+    """Menambahkan bincount kode ke array hitungan (array diperbesar bila vocab tumbuh)."""
+    if mask is not None:
+        codes = codes[mask]
+    binc = np.bincount(codes, minlength=len(counts))
+    if len(binc) > len(counts):
+        counts = np.concatenate([counts, np.zeros(len(binc) - len(counts), dtype=counts.dtype)])
+    counts += binc
+    return counts
+
+def _sorted_remap(vocab, mask):
+    """Kode lama -> kode baru yang padat & terurut per ID (-1 untuk ID yang terbuang)."""
+    ids = np.array(list(vocab), dtype=object)[mask]
+    old_codes = np.flatnonzero(mask)
+    order = np.argsort(ids)
+    remap = np.full(len(mask), -1, dtype=np.int32)
+    remap[old_codes[order]] = np.arange(len(ids), dtype=np.int32)
+    return remap, ids[order]
+
+def load_ratings_streaming(input_path, min_ratings=MIN_USER_RATINGS, min_product_ratings=MIN_PRODUCT_RATINGS,
+                           k_core=False, chunksize=1_000_000):
+    """Ingestion CSV per-chunk dengan memori terbatas.
+
+    userId/productId di-encode ke int32 sambil membaca. Filtering hanya memakai
+    array hitungan per ID (satu pass CSV per iterasi), sehingga memori puncak
+    bergantung pada jumlah ID unik, bukan jumlah baris. Baris yang lolos baru
+    dikumpulkan pada pass terakhir.
+
+    Mengembalikan (user_codes, product_codes, ratings, user_ids, product_ids, timestamps)
+    dengan kode padat mengikuti urutan ID terurut (sama seperti ``build_user_item_matrix``).
+    """
+    user_vocab, product_vocab = {}, {}
+
+    def read_chunks():
+        for chunk in pd.read_csv(input_path, names=RAW_COLUMNS,
+                                 dtype={'userId': str, 'productId': str, 'rating': 'float32', 'timestamp': 'int64'},
+                                 chunksize=chunksize):
+            chunk = drop_invalid_ratings(chunk)
+            users = _encode_ids(chunk['userId'].values, user_vocab)
+            products = _encode_ids(chunk['productId'].values, product_vocab)
+            yield users, products, chunk['rating'].values, chunk['timestamp'].values
+
+    def count_pass(user_mask, product_mask):
+        user_counts = np.zeros(len(user_mask), dtype=np.int64)
+        product_counts = np.zeros(len(product_mask), dtype=np.int64)
+        for users, products, _, _ in read_chunks():
+            keep = user_mask[users] & product_mask[products]
+            user_counts = _add_counts(user_counts, users, keep)
+            product_counts = _add_counts(product_counts, products, keep)
+        return user_counts, product_counts
+
+    # Pass 1: encoding + hitung rating per user (semua baris)
+    user_counts = np.zeros(0, dtype=np.int64)
+    for users, _, _, _ in read_chunks():
+        user_counts = _add_counts(user_counts, users)
+    user_mask = user_counts >= min_ratings
+    product_mask = np.ones(len(product_vocab), dtype=bool)
+
+    # Pass 2: hitung produk di antara user aktif (setara filter single-pass)
+    _, product_counts = count_pass(user_mask, product_mask)
+    product_mask = product_counts >= min_product_ratings
+
+    # Pass k-core: ulangi sampai mask tidak berubah lagi
+    n_pass = 2
+    while k_core:
+        user_counts, product_counts = count_pass(user_mask, product_mask)
+        n_pass += 1
+        new_user_mask = user_mask & (user_counts >= min_ratings)
+        new_product_mask = product_mask & (product_counts >= min_product_ratings)
+        if (new_user_mask == user_mask).all() and (new_product_mask == product_mask).all():
+            break
+        user_mask, product_mask = new_user_mask, new_product_mask
+    print(f"   ↳ Filtering selesai setelah {n_pass} pass ({user_mask.sum():,} user, {product_mask.sum():,} produk)")
+
+    # Pass terakhir: kumpulkan baris yang lolos dengan kode padat
+    user_remap, user_ids = _sorted_remap(user_vocab, user_mask)
+    product_remap, product_ids = _sorted_remap(product_vocab, product_mask)
+    parts_user, parts_product, parts_rating, parts_timestamp = [], [], [], []
+    for users, products, ratings, timestamps in read_chunks():
+        keep = user_mask[users] & product_mask[products]
+        parts_user.append(user_remap[users[keep]])
+        parts_product.append(product_remap[products[keep]])
+        parts_rating.append(ratings[keep])
+        parts_timestamp.append(timestamps[keep])
+
+    return (np.concatenate(parts_user), np.concatenate(parts_product), np.concatenate(parts_rating),
+            user_ids, product_ids, np.concatenate(parts_timestamp))
+
+def merge_ids(ids, values):
+    """Encode ID terhadap tabel lama; ID baru ditambahkan di akhir tabel.
+
+    Mengembalikan (kode int32, tabel ID gabungan, jumlah ID baru).
+    """
+    codes = pd.Index(ids).get_indexer(values)
+    missing = codes < 0
+    new_ids = pd.unique(values[missing])
+    codes[missing] = len(ids) + pd.Index(new_ids).get_indexer(values[missing])
+    merged = np.concatenate([np.asarray(ids, dtype=object), np.asarray(new_ids, dtype=object)])
+    return codes.astype(np.int32), merged, len(new_ids)
+
+def merge_into_store(delta=None, store_dir=STORE_DIR, min_ratings=MIN_USER_RATINGS,
+                     min_product_ratings=MIN_PRODUCT_RATINGS, k_core=False):
+    """Menggabungkan rating ``delta`` + rating tertunda ke store lalu menerapkan ``filter_active``.
+
+    Filter dijalankan atas seluruh store + rating tertunda + delta, jadi baris
+    yang user/produknya belum lolos threshold tidak dibuang melainkan disimpan
+    sebagai rating tertunda (``pending_ratings.csv``) dan dihitung ulang pada
+    penggabungan berikutnya, sampai aktivitasnya cukup. Baris store lama hanya
+    difilter ulang bila store dibangun dengan threshold berbeda. Tabel ID
+    ditulis ulang terurut & padat. Bila tidak ada baris yang lolos, store tidak diubah.
+    Mengembalikan (jumlah baris store, jumlah baris tertunda).
+    """
+    store = load_ratings_store(store_dir, mmap_mode=None)
+    extra = [load_pending_ratings(store_dir)] + ([delta[RAW_COLUMNS]] if delta is not None else [])
+    extra = drop_invalid_ratings(pd.concat(extra, ignore_index=True))
+    user_codes, user_ids, _ = merge_ids(store['user_ids'], extra['userId'].values)
+    product_codes, product_ids, _ = merge_ids(store['product_ids'], extra['productId'].values)
+    user_codes = np.concatenate([store['user_codes'], user_codes])
+    product_codes = np.concatenate([store['product_codes'], product_codes])
+    ratings = np.concatenate([store['ratings'], extra['rating'].values])
+    # Store tanpa kolom waktu: waktu baris lama dicatat 0 bila baris itu menjadi tertunda
+    store_timestamps = store[TIMESTAMP_COLUMN] if TIMESTAMP_COLUMN in store else np.zeros(len(store['ratings']), np.int64)
+    timestamps = np.concatenate([store_timestamps, extra['timestamp'].values])
+
+    filters = {'min_ratings': min_ratings, 'min_product_ratings': min_product_ratings, 'k_core': k_core}
+    keep = np.zeros(len(ratings), dtype=bool)
+    keep[filter_active(pd.DataFrame({'userId': user_codes, 'productId': product_codes}),
+                       min_ratings, min_product_ratings, k_core=k_core).index.values] = True
+    # Filter satu pass tidak idempoten: baris store yang sudah lolos dengan threshold yang sama tetap
+    # dipertahankan; store hanya difilter ulang bila threshold-nya tercatat berbeda
+    recorded = read_store_filters(store_dir)
+    if recorded is None or recorded == filters:
+        keep[:len(store['ratings'])] = True
+    if not keep.any():
+        return 0, int(len(ratings))
+
+    user_remap, kept_user_ids = _sorted_remap(user_ids, np.bincount(user_codes[keep], minlength=len(user_ids)) > 0)
+    product_remap, kept_product_ids = _sorted_remap(
+        product_ids, np.bincount(product_codes[keep], minlength=len(product_ids)) > 0)
+    save_ratings_store(user_remap[user_codes[keep]], product_remap[product_codes[keep]], ratings[keep],
+                       kept_user_ids, kept_product_ids, store_dir,
+                       timestamps=timestamps[keep] if TIMESTAMP_COLUMN in store else None,
+                       filters=filters)
+    save_pending_ratings(pd.DataFrame({
+        'userId': user_ids[user_codes[~keep]],
+        'productId': product_ids[product_codes[~keep]],
+        'rating': ratings[~keep],
+        'timestamp': timestamps[~keep],
+    }), store_dir)
+    return int(keep.sum()), int((~keep).sum())
+
+def process_data(streaming=False, k_core=False, chunksize=1_000_000, from_cache=False,
+                 n_components=50, svd_backend='truncated', n_iter=5, block_size=50_000,
+                 min_ratings=MIN_USER_RATINGS, min_product_ratings=MIN_PRODUCT_RATINGS,
+                 input_path=RAW_PATH):
     
     # Cek folder data dan models
     if not os.path.exists('data'): os.makedirs('data')
     if not os.path.exists('models'): os.makedirs('models')
 
-    if not os.path.exists(input_path):
-        print(f"❌ Error: File {input_path} tidak ditemukan. Pastikan file ada di folder data/.")
-        return
+    profiler = PipelineProfiler('preprocessing')
 
-    # 1. Load Data
-    # Menggunakan tipe data hemat memori
-    df = pd.read_csv(
-        input_path, 
-        names=['userId', 'productId', 'rating', 'timestamp'],
-        dtype={'rating': 'float32', 'timestamp': 'int64'}
-    )
-    df.drop('timestamp', axis=1, inplace=True)
+    with profiler.stage('load_filter') as record:
+        if from_cache:
+            # 1-2. Pakai store biner hasil preprocessing sebelumnya (memory-mapped, tanpa parse CSV)
+            print(f"⚡ [1/1] Memuat rating bersih dari store biner {STORE_DIR}/ ...")
+            # Rating tertunda (delta inkremental yang belum lolos threshold) ikut difilter ulang
+            n_rows, n_pending = merge_into_store(None, STORE_DIR, min_ratings, min_product_ratings, k_core)
+            if n_pending:
+                print(f"   ↳ {n_pending:,} rating tertunda (user/produk belum lolos threshold)")
+            if n_rows == 0:
+                print("❌ Error: Tidak ada rating yang lolos filter. Periksa threshold user/produk.")
+                return False
+            store = load_ratings_store()
+            user_codes, product_codes, ratings = store['user_codes'], store['product_codes'], store['ratings']
+            user_ids, product_ids = store['user_ids'], store['product_ids']
+            timestamps = store.get('timestamps')
+        else:
+            print("🔄 [1/2] Memuat dataset raw...")
+            if not os.path.exists(input_path):
+                print(f"❌ Error: File {input_path} tidak ditemukan. Pastikan file ada di folder data/.")
+                return False
 
-    # 2. Filtering (Data Cleaning)
-    print("🧹 [2/2] Filtering Active Users & Products...")
-    
-    # Filter User (Minimal 50 interaksi)
-    min_ratings = 50
-    user_counts = df['userId'].value_counts()
-    active_users = user_counts[user_counts >= min_ratings].index
-    df_filtered = df[df['userId'].isin(active_users)]
-    
-    # Filter Produk (Minimal 5 interaksi)
-    min_product_ratings = 5
-    product_counts = df_filtered['productId'].value_counts()
-    active_products = product_counts[product_counts >= min_product_ratings].index
-    df_final = df_filtered[df_filtered['productId'].isin(active_products)]
-    
-    # Simpan CSV bersih (untuk keperluan Evaluate nanti)
-    df_final.to_csv('data/clean_ratings.csv', index=False)
-    print(f"✅ Data Bersih: {len(df_final):,} baris tersimpan di data/clean_ratings.csv")
+            if streaming:
+                # 1-2. Load + Filtering per-chunk (memori terbatas)
+                print(f"🧹 [2/2] Streaming & Filtering Active Users & Products (chunk {chunksize:,} baris)...")
+                user_codes, product_codes, ratings, user_ids, product_ids, timestamps = load_ratings_streaming(
+                    input_path, min_ratings, min_product_ratings, k_core=k_core, chunksize=chunksize
+                )
+            else:
+                # 1. Load Data
+                # Menggunakan tipe data hemat memori; timestamp disimpan sebagai kolom int ringkas
+                # agar trafik bisa di-replay berurutan waktu (src/replay.py)
+                df = pd.read_csv(
+                    input_path, 
+                    names=RAW_COLUMNS,
+                    dtype={'userId': str, 'productId': str, 'rating': 'float32', 'timestamp': 'int64'}
+                )
+                record['raw_rows'] = len(df)
+
+                # 2. Filtering (Data Cleaning)
+                print("🧹 [2/2] Filtering Active Users & Products...")
+                df_final = filter_active(drop_invalid_ratings(df), min_ratings, min_product_ratings, k_core=k_core)
+                del df
+                user_codes, product_codes, user_ids, product_ids = encode_ratings(df_final)
+                ratings = df_final['rating'].values
+                timestamps = df_final['timestamp'].values
+                del df_final
+
+            if len(ratings) == 0:
+                print("❌ Error: Tidak ada rating yang lolos filter. Periksa threshold user/produk.")
+                return False
+
+            # Simpan store biner bersih (untuk keperluan Evaluate & retraining nanti)
+            save_ratings_store(user_codes, product_codes, ratings, user_ids, product_ids, timestamps=timestamps,
+                               filters={'min_ratings': min_ratings, 'min_product_ratings': min_product_ratings,
+                                        'k_core': k_core})
+            # Store dibangun ulang dari CSV raw: rating tertunda dari delta inkremental tidak berlaku lagi
+            save_pending_ratings(None)
+            print(f"✅ Data Bersih: {len(ratings):,} baris tersimpan di {STORE_DIR}/")
+        record['mode'] = 'cache' if from_cache else ('streaming' if streaming else 'in_memory')
+        record['clean_rows'] = int(len(ratings))
     
-    # 3. Pivot Table & Sparse Matrix
+    # 3. Sparse Matrix User-Item (langsung dari kode kategori, tanpa pivot dense)
     print("📊 Membuat Matrix User-Item...")
-    user_item_pivot = df_final.pivot_table(index='userId', columns='productId', values='rating').fillna(0)
-    user_item_matrix = csr_matrix(user_item_pivot.values)
+    with profiler.stage('build_matrix') as record:
+        user_item_matrix = matrix_from_codes(user_codes, product_codes, ratings, (len(user_ids), len(product_ids)))
+        user_ids = np.asarray(user_ids, dtype=object)
+        product_ids = np.asarray(product_ids, dtype=object)
+        record.update(describe_matrix(user_item_matrix))
     
     # 4. SVD (DIMENSIONALITY REDUCTION) - Dipindah ke sini sebagai preprocessing
-    print("📉 Menjalankan SVD (Feature Extraction)...")
-    svd = TruncatedSVD(n_components=50, random_state=42)
-    matrix_reduced = svd.fit_transform(user_item_matrix)
+    print(f"📉 Menjalankan SVD (Feature Extraction, backend: {svd_backend})...")
+    with profiler.stage('svd') as record:
+        svd, matrix_reduced, svd_stats = factorize(
+            user_item_matrix, n_components=n_components, backend=svd_backend, n_iter=n_iter, block_size=block_size
+        )
+        record.update(describe_matrix(user_item_matrix))
+        record.update(describe_matrix(matrix_reduced, 'reduced'))
+        record['backend'] = svd_backend
+    log_factorization_run(svd_stats)
+    print(f"   ↳ {svd_stats['wall_time_s']:.2f}s | peak {svd_stats['peak_memory_mb']:.1f} MB | "
+          f"explained variance {svd_stats['explained_variance_ratio']:.2%}")
     
     # 5. Simpan Hasil Preprocessing (Fitur Siap Pakai)
     print("💾 Menyimpan Fitur SVD & Matrix...")
-    preprocessed_data = {
-        'user_item_pivot': user_item_pivot,
-        'user_item_matrix': user_item_matrix, # Disimpan untuk hitung popularity nanti
-        'matrix_reduced': matrix_reduced,     # Ini input untuk K-Means
-        'svd_model': svd                      # Disimpan untuk inferensi di Dashboard
-    }
-    
-    joblib.dump(preprocessed_data, 'data/preprocessed_features.pkl')
+    with profiler.stage('save_features'):
+        preprocessed_data = {
+            'user_ids': user_ids,                 # Index baris matrix -> userId
+            'product_ids': product_ids,           # Index kolom matrix -> productId (ASIN)
+            'user_item_matrix': user_item_matrix, # Disimpan untuk hitung popularity nanti
+            'svd_model': svd,                     # Disimpan untuk inferensi di Dashboard
+            'svd_stats': svd_stats                # Waktu, memori puncak & explained variance SVD
+        }
+        
+        joblib.dump(preprocessed_data, 'data/preprocessed_features.pkl')
+        # Input K-Means disimpan terpisah sebagai .npy agar bisa dibuka memory-mapped saat training
+        np.save(REDUCED_PATH, matrix_reduced)
+    profiler.save()
     print("✅ Preprocessing & SVD Selesai! File tersimpan di 'data/preprocessed_features.pkl'")
+    return True
 
 if __name__ == "__main__":
-    process_data()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Preprocessing rating Amazon Electronics")
+    parser.add_argument('--streaming', action='store_true', help="Baca CSV per-chunk dengan memori terbatas")
+    parser.add_argument('--k-core', action='store_true', help="Ulangi filter user/produk sampai stabil")
+    parser.add_argument('--min-user-ratings', type=int, default=MIN_USER_RATINGS, help="Minimal rating per user")
+    parser.add_argument('--min-product-ratings', type=int, default=MIN_PRODUCT_RATINGS, help="Minimal rating per produk")
+    parser.add_argument('--chunksize', type=int, default=1_000_000, help="Jumlah baris per chunk (mode streaming)")
+    parser.add_argument('--from-cache', action='store_true', help="Pakai store biner rating bersih, lewati CSV raw")
+    parser.add_argument('--n-components', type=int, default=50, help="Jumlah komponen laten SVD")
+    parser.add_argument('--svd-backend', choices=SVD_BACKENDS, default='truncated', help="Solver SVD")
+    parser.add_argument('--n-iter', type=int, default=5, help="Jumlah power iteration (randomized/out_of_core)")
+    parser.add_argument('--block-size', type=int, default=50_000, help="Baris per blok (out_of_core)")
+    parser.add_argument('--input', default=RAW_PATH, help="CSV rating raw (mis. hasil generate_synthetic.py)")
+    args = parser.parse_args()
+    process_data(streaming=args.streaming, k_core=args.k_core, chunksize=args.chunksize, from_cache=args.from_cache,
+                 n_components=args.n_components, svd_backend=args.svd_backend, n_iter=args.n_iter,
+                 block_size=args.block_size, min_ratings=args.min_user_ratings,
+                 min_product_ratings=args.min_product_ratings, input_path=args.input)
\ No newline at end of file
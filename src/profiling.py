@@ -0,0 +1,94 @@
+import os
+import json
+import time
+import resource
+from contextlib import contextmanager
+
+# Profil biaya per tahap pipeline (wall time, CPU time, peak RSS, shape & nnz matrix)
+PROFILE_PATH = 'models/pipeline_profile.json'
+MAX_HISTORY = 200
+
+def reset_peak_rss():
+    """Reset high-water mark RSS proses (Linux). Mengembalikan False bila tidak didukung."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+def peak_rss_mb(resettable):
+    if resettable:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    # Fallback: puncak RSS sepanjang umur proses
+    return _maxrss_mb(resource.getrusage(resource.RUSAGE_SELF))
+
+def _maxrss_mb(usage):
+    # ru_maxrss dalam KB di Linux, byte di macOS
+    return usage.ru_maxrss / 1024 ** 2 if os.uname().sysname == 'Darwin' else usage.ru_maxrss / 1024
+
+def describe_matrix(matrix, name='matrix'):
+    """Shape & nnz matrix (sparse maupun dense) untuk dicatat di profil."""
+    nnz = matrix.nnz if hasattr(matrix, 'nnz') else int(matrix.size)
+    return {f'{name}_shape': list(matrix.shape), f'{name}_nnz': int(nnz)}
+
+class PipelineProfiler:
+    """Mengumpulkan profil tiap tahap dalam satu run script lalu menambahkannya ke history."""
+
+    def __init__(self, script):
+        self.run = {
+            'script': script,
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'stages': [],
+        }
+
+    @contextmanager
+    def stage(self, name):
+        """Context manager per tahap; dict yang di-yield bisa diisi info tambahan (mis. shape/nnz).
+
+        CPU time & peak RSS mencakup proses anak (process pool) yang selesai di
+        dalam tahap, lewat ``RUSAGE_CHILDREN``: ``cpu_time_s`` = proses utama +
+        anak, ``child_cpu_time_s`` bagian anak. ``child_peak_rss_mb`` adalah
+        RSS terbesar satu proses anak; karena kernel hanya menyimpan maksimum
+        sepanjang umur proses utama, nilainya tepat per tahap bila naik di tahap
+        ini (``child_peak_rss_scope='stage'``), selain itu batas atas
+        (``'process'``).
+        """
+        record = {'stage': name}
+        resettable = reset_peak_rss()
+        children_start = resource.getrusage(resource.RUSAGE_CHILDREN)
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        finally:
+            children = resource.getrusage(resource.RUSAGE_CHILDREN)
+            child_cpu = (children.ru_utime + children.ru_stime) - (children_start.ru_utime + children_start.ru_stime)
+            peak_rss = peak_rss_mb(resettable)
+            record['wall_time_s'] = round(time.perf_counter() - wall_start, 4)
+            record['cpu_time_s'] = round(time.process_time() - cpu_start + child_cpu, 4)
+            record['child_cpu_time_s'] = round(child_cpu, 4)
+            if child_cpu > 0 or children.ru_maxrss > children_start.ru_maxrss:
+                child_peak = _maxrss_mb(children)
+                record['child_peak_rss_mb'] = round(child_peak, 1)
+                record['child_peak_rss_scope'] = 'stage' if children.ru_maxrss > children_start.ru_maxrss else 'process'
+                peak_rss = max(peak_rss, child_peak)
+            record['peak_rss_mb'] = round(peak_rss, 1)
+            record['peak_rss_scope'] = 'stage' if resettable else 'process'
+            self.run['stages'].append(record)
+
+    def save(self, profile_path=PROFILE_PATH):
+        history = load_profile_history(profile_path)
+        history.append(self.run)
+        os.makedirs(os.path.dirname(profile_path) or '.', exist_ok=True)
+        with open(profile_path, 'w') as f:
+            json.dump(history[-MAX_HISTORY:], f, indent=2)
+
+def load_profile_history(profile_path=PROFILE_PATH):
+    try:
+        with open(profile_path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
@@ -0,0 +1,63 @@
+import os
+import sys
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.popularity import seen_mask
+
+# Re-ranking personal di dalam cluster: kandidat = top-list popularitas cluster user,
+# skor = alpha * afinitas laten (vektor SVD user . faktor item) + (1 - alpha) * popularitas cluster.
+# Kedua komponen dinormalisasi min-max per user atas kandidat yang valid, jadi skor berada di [0, 1].
+BLEND_ALPHA = 0.5
+USER_TOP_N = 20
+
+def _minmax(values, valid):
+    """Normalisasi min-max per baris hanya atas entri valid; baris konstan -> 1."""
+    low = np.where(valid, values, np.inf).min(axis=1, keepdims=True)
+    high = np.where(valid, values, -np.inf).max(axis=1, keepdims=True)
+    span = high - low
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(span > 0, (values - low) / np.where(span > 0, span, 1), 1.0)
+
+def rank_candidates(user_rows, labels, top_items, top_scores, projector, n, alpha=BLEND_ALPHA):
+    """Re-rank kandidat cluster untuk satu batch user sekaligus (operasi matrix).
+
+    ``user_rows`` adalah baris CSR rating user (b x n_produk) dan ``labels``
+    cluster-nya. ``projector`` adalah ``LatentProjector`` (faktor SVD, boleh
+    terkuantisasi). Produk yang sudah dirating dibuang. Mengembalikan (kode, skor)
+    berukuran (b x n); slot kosong berisi kode -1 dan skor 0.
+    """
+    labels = np.asarray(labels)
+    top_items = np.asarray(top_items)
+    candidates = np.where(labels[:, None] >= 0, top_items[np.maximum(labels, 0)], -1)
+    popularity = np.asarray(top_scores)[np.maximum(labels, 0)]
+    valid = (candidates >= 0) & ~seen_mask(user_rows, candidates)
+
+    # Afinitas laten; produk baru di luar ruang SVD tidak punya faktor (afinitas 0)
+    vectors = projector.transform(user_rows)
+    in_space = (candidates >= 0) & (candidates < projector.n_features)
+    item_factors = projector.item_factors(np.where(in_space, candidates, 0))
+    affinity = np.where(in_space, np.einsum('bkr,br->bk', item_factors, vectors), 0.0)
+
+    scores = alpha * _minmax(affinity, valid) + (1 - alpha) * _minmax(popularity, valid)
+    scores = np.where(valid, scores, -np.inf)
+    order = np.argsort(-scores, axis=1, kind='stable')[:, :n]
+    codes = np.take_along_axis(candidates, order, axis=1)
+    scores = np.take_along_axis(scores, order, axis=1)
+    finite = np.isfinite(scores)
+    return np.where(finite, codes, -1).astype(np.int32), np.where(finite, scores, 0).astype(np.float32)
+
+def rank_users(user_item_matrix, user_clusters, top_items, top_scores, projector, n=USER_TOP_N,
+               alpha=BLEND_ALPHA, batch_size=2_000):
+    """``rank_candidates`` untuk seluruh user per batch; dipakai saat training untuk tabel lookup."""
+    n_users = user_item_matrix.shape[0]
+    n = min(n, np.asarray(top_items).shape[1])
+    codes = np.full((n_users, n), -1, dtype=np.int32)
+    scores = np.zeros((n_users, n), dtype=np.float32)
+    for start in range(0, n_users, batch_size):
+        end = min(start + batch_size, n_users)
+        codes[start:end], scores[start:end] = rank_candidates(
+            user_item_matrix[start:end], np.asarray(user_clusters[start:end]), top_items, top_scores,
+            projector, n, alpha
+        )
+    return codes, scores
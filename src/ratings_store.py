@@ -0,0 +1,126 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+
+# Cache biner rating bersih: satu file .npy per kolom (dictionary-encoded)
+STORE_DIR = 'data/clean_ratings'
+LEGACY_CSV_PATH = 'data/clean_ratings.csv'
+
+COLUMN_DTYPES = {
+    'user_codes': np.int32,
+    'product_codes': np.int32,
+    'ratings': np.float32,
+}
+# Kolom opsional: waktu rating (Unix detik). int32 cukup sampai 2038; di luar itu disimpan int64.
+TIMESTAMP_COLUMN = 'timestamps'
+# Threshold filter yang dipakai saat store dibangun (dipakai ulang saat delta ditambahkan)
+FILTERS_NAME = 'filters.json'
+# Rating valid yang user/produknya belum lolos threshold (ID string, format CSV raw); ikut dihitung ulang
+# setiap kali store digabung dengan delta baru, sehingga aktivitas user baru terakumulasi antar delta
+PENDING_NAME = 'pending_ratings.csv'
+PENDING_COLUMNS = ['userId', 'productId', 'rating', 'timestamp']
+
+def _timestamp_dtype(timestamps):
+    info = np.iinfo(np.int32)
+    if len(timestamps) and (timestamps.min() < info.min or timestamps.max() > info.max):
+        return np.int64
+    return np.int32
+
+def save_ratings_store(user_codes, product_codes, ratings, user_ids, product_ids, store_dir=STORE_DIR,
+                       timestamps=None, filters=None):
+    """Menyimpan interaksi bersih sebagai kolom .npy (kode int32, rating float32, waktu int32, tabel ID).
+
+    ``filters`` (dict threshold preprocessing) ditulis ke ``filters.json``; bila
+    None, catatan filter yang sudah ada dibiarkan.
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    columns = {'user_codes': user_codes, 'product_codes': product_codes, 'ratings': ratings}
+    for name, values in columns.items():
+        np.save(os.path.join(store_dir, f'{name}.npy'), np.asarray(values, dtype=COLUMN_DTYPES[name]))
+
+    timestamp_path = os.path.join(store_dir, f'{TIMESTAMP_COLUMN}.npy')
+    if timestamps is not None:
+        timestamps = np.asarray(timestamps)
+        np.save(timestamp_path, timestamps.astype(_timestamp_dtype(timestamps)))
+    elif os.path.exists(timestamp_path):
+        # Kolom waktu lama tidak lagi sejajar dengan baris baru
+        os.remove(timestamp_path)
+
+    # Tabel ID disimpan sebagai string fixed-width agar bisa di-mmap (tanpa pickle)
+    np.save(os.path.join(store_dir, 'user_ids.npy'), np.asarray(user_ids, dtype=str))
+    np.save(os.path.join(store_dir, 'product_ids.npy'), np.asarray(product_ids, dtype=str))
+    if filters is not None:
+        with open(os.path.join(store_dir, FILTERS_NAME), 'w') as f:
+            json.dump(filters, f, indent=2)
+
+def read_store_filters(store_dir=STORE_DIR):
+    """Threshold filter yang tercatat saat store dibangun, atau None untuk store lama."""
+    try:
+        with open(os.path.join(store_dir, FILTERS_NAME), 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def load_pending_ratings(store_dir=STORE_DIR):
+    """Rating tertunda (DataFrame ID string), kosong bila tidak ada."""
+    path = os.path.join(store_dir, PENDING_NAME)
+    if not os.path.exists(path):
+        return pd.DataFrame({name: pd.Series(dtype=dtype) for name, dtype in
+                             zip(PENDING_COLUMNS, (str, str, 'float32', 'int64'))})
+    return pd.read_csv(path, names=PENDING_COLUMNS,
+                       dtype={'userId': str, 'productId': str, 'rating': 'float32', 'timestamp': 'int64'})
+
+def save_pending_ratings(pending, store_dir=STORE_DIR):
+    """Menulis ulang rating tertunda secara atomik; ``pending`` kosong/None menghapus file."""
+    path = os.path.join(store_dir, PENDING_NAME)
+    if pending is None or not len(pending):
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    pending[PENDING_COLUMNS].to_csv(path + '.tmp', header=False, index=False)
+    os.replace(path + '.tmp', path)
+
+def load_ratings_store(store_dir=STORE_DIR, mmap_mode='r'):
+    """Memuat store rating bersih (default memory-mapped). Mengembalikan dict array.
+
+    Kolom ``timestamps`` hanya ada bila store ditulis dengan waktu rating.
+    """
+    names = list(COLUMN_DTYPES) + ['user_ids', 'product_ids']
+    if os.path.exists(os.path.join(store_dir, f'{TIMESTAMP_COLUMN}.npy')):
+        names.append(TIMESTAMP_COLUMN)
+    return {name: np.load(os.path.join(store_dir, f'{name}.npy'), mmap_mode=mmap_mode) for name in names}
+
+def store_exists(store_dir=STORE_DIR):
+    return os.path.exists(os.path.join(store_dir, 'ratings.npy'))
+
+def load_clean_ratings(store_dir=STORE_DIR, legacy_csv=LEGACY_CSV_PATH):
+    """Memuat rating bersih sebagai DataFrame kode integer (userId, productId, rating[, timestamp]).
+
+    Kolom userId/productId berisi kode int32 yang menunjuk ke tabel ``user_ids`` /
+    ``product_ids`` (terurut). Bila store belum ada tetapi CSV lama tersedia,
+    CSV dikonversi sekali ke store biner.
+    Mengembalikan (df, user_ids, product_ids).
+    """
+    if not store_exists(store_dir):
+        if not os.path.exists(legacy_csv):
+            raise FileNotFoundError(f"Store {store_dir} maupun {legacy_csv} tidak ditemukan.")
+        print(f"   ↳ Mengonversi {legacy_csv} ke store biner {store_dir}/ ...")
+        df = pd.read_csv(legacy_csv, dtype={'userId': str, 'productId': str, 'rating': 'float32'})
+        user_cat = df['userId'].astype('category')
+        product_cat = df['productId'].astype('category')
+        save_ratings_store(
+            user_cat.cat.codes.values, product_cat.cat.codes.values, df['rating'].values,
+            user_cat.cat.categories, product_cat.cat.categories, store_dir
+        )
+
+    store = load_ratings_store(store_dir)
+    columns = {
+        'userId': store['user_codes'],
+        'productId': store['product_codes'],
+        'rating': store['ratings'],
+    }
+    if TIMESTAMP_COLUMN in store:
+        columns['timestamp'] = store[TIMESTAMP_COLUMN]
+    df = pd.DataFrame(columns, copy=False)
+    return df, store['user_ids'], store['product_ids']
@@ -0,0 +1,137 @@
+import os
+import json
+import time
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+from src.ranking import BLEND_ALPHA, rank_candidates
+from src.ann_index import ANN_ARRAYS, N_PROBE, IVFIndex
+
+# Jalur serving rekomendasi dari artefak model (dipakai Dashboard & API).
+# User yang dikenal dijawab dengan lookup tabel hasil training; SVD + K-Means
+# hanya dijalankan untuk user baru yang belum ada di artefak.
+# Setiap inferensi dicatat (JSON lines) bersama ID versi model yang melayaninya.
+INFERENCE_LOG_PATH = 'models/inference_log.jsonl'
+# Log dirotasi ke <path>.1 (satu cadangan) begitu melewati ukuran ini
+INFERENCE_LOG_MAX_BYTES = 10 * 1024 ** 2
+
+def model_version(artifacts):
+    return artifacts['manifest'].get('version_id', 'local')
+
+def log_inference(artifacts, record, log_path=INFERENCE_LOG_PATH, max_bytes=INFERENCE_LOG_MAX_BYTES):
+    """Menambahkan satu baris log inferensi (dengan ID versi model) ke file JSON lines.
+
+    Bila file melewati ``max_bytes`` ia dipindah ke ``<log_path>.1`` (menimpa
+    cadangan sebelumnya), jadi total log dibatasi ~2x ``max_bytes``.
+    """
+    record = dict(timestamp=time.strftime('%Y-%m-%d %H:%M:%S'), model_version=model_version(artifacts), **record)
+    os.makedirs(os.path.dirname(log_path) or '.', exist_ok=True)
+    if max_bytes and os.path.exists(log_path) and os.path.getsize(log_path) >= max_bytes:
+        os.replace(log_path, log_path + '.1')
+    with open(log_path, 'a') as f:
+        f.write(json.dumps(record) + '\n')
+
+def _index(artifacts, name):
+    """pd.Index ID (hash lookup) dibangun sekali per artefak yang dimuat lalu di-memo."""
+    key = f'{name}_index'
+    if key not in artifacts:
+        artifacts[key] = pd.Index(artifacts[name])
+    return artifacts[key]
+
+def lookup_user(artifacts, user_id):
+    """Kode baris user di artefak, atau None untuk user baru."""
+    index = _index(artifacts, 'user_ids')
+    return index.get_loc(user_id) if user_id in index else None
+
+def ratings_row(artifacts, ratings):
+    """Dict {ASIN: rating} user baru -> baris CSR (1 x n_produk); ASIN tak dikenal diabaikan."""
+    codes = _index(artifacts, 'product_ids').get_indexer(list(ratings))
+    values = np.asarray(list(ratings.values()), dtype=np.float32)
+    known = codes >= 0
+    return csr_matrix((values[known], (np.zeros(known.sum(), dtype=np.int32), codes[known])),
+                      shape=(1, len(artifacts['product_ids'])))
+
+def infer_cluster(artifacts, row):
+    """Jalur inferensi penuh: proyeksi SVD lalu centroid K-Means terdekat."""
+    user_vector = artifacts['svd'].transform(row)
+    return int(artifacts['kmeans'].predict(user_vector)[0])
+
+def _rank(artifacts, rows, labels, top_n):
+    """Re-ranking personal on-the-fly (user baru / artefak tanpa tabel lookup)."""
+    top_items = np.asarray(artifacts['top_items'])
+    if 'top_scores' in artifacts:
+        top_scores = artifacts['top_scores']
+    else:
+        # Artefak lama tanpa skor popularitas: peringkat di top-list dipakai sebagai proksi
+        top_scores = np.tile(np.arange(top_items.shape[1], 0, -1, dtype=np.float32), (len(top_items), 1))
+    alpha = artifacts['manifest'].get('ranking', {}).get('blend_alpha', BLEND_ALPHA)
+    return rank_candidates(rows, labels, top_items, top_scores, artifacts['svd'], top_n, alpha)
+
+def recommend(artifacts, user_id=None, ratings=None, top_n=10, log=True):
+    """Top-N rekomendasi (lihat ``_recommend``) + catatan inferensi berisi ID versi model."""
+    start = time.perf_counter()
+    result = _recommend(artifacts, user_id, ratings, top_n)
+    result['model_version'] = model_version(artifacts)
+    if log:
+        log_inference(artifacts, {
+            'kind': 'recommend',
+            'user_id': None if user_id is None else str(user_id),
+            'source': result['source'],
+            'cluster_id': result['cluster_id'],
+            'n_items': int(len(result['items'])),
+            'latency_ms': round((time.perf_counter() - start) * 1000, 3),
+        })
+    return result
+
+def _recommend(artifacts, user_id=None, ratings=None, top_n=10):
+    """Top-N rekomendasi untuk user yang dikenal (``user_id``) atau user baru (``ratings``).
+
+    Mengembalikan dict ``cluster_id``, ``items`` (kode produk; decode dengan
+    ``artifacts.decode_products``), ``scores`` (skor relevansi 0-1 hasil
+    re-ranking) dan ``source`` ('lookup' atau 'inference').
+    """
+    user_code = lookup_user(artifacts, user_id) if user_id is not None else None
+    if user_code is not None and 'user_clusters' in artifacts:
+        cluster_id = int(artifacts['user_clusters'][user_code])
+        if 'user_top_items' in artifacts and top_n <= artifacts['user_top_items'].shape[1]:
+            items = np.asarray(artifacts['user_top_items'][user_code])
+            scores = np.asarray(artifacts['user_top_scores'][user_code]) if 'user_top_scores' in artifacts \
+                else np.full(items.shape, np.nan, dtype=np.float32)
+            keep = items >= 0
+            return {'cluster_id': cluster_id, 'items': items[keep][:top_n], 'scores': scores[keep][:top_n],
+                    'source': 'lookup'}
+        row = artifacts['user_item_matrix'][user_code]
+        source = 'lookup'
+    else:
+        # User baru (atau artefak lama tanpa tabel cluster per user): SVD + K-Means
+        if user_code is not None:
+            row = artifacts['user_item_matrix'][user_code]
+        else:
+            row = ratings_row(artifacts, ratings or {})
+        cluster_id = infer_cluster(artifacts, row)
+        source = 'inference'
+
+    items, scores = _rank(artifacts, row, np.array([cluster_id]), top_n)
+    keep = items[0] >= 0
+    return {'cluster_id': cluster_id, 'items': items[0][keep], 'scores': scores[0][keep], 'source': source}
+
+def similar_items(artifacts, asin, k=10, log=True):
+    """Produk serupa (cosine faktor item SVD) lewat index ANN: list (ASIN, skor).
+
+    Kosong bila ASIN tidak dikenal, berada di luar ruang SVD, atau artefak belum punya index.
+    """
+    if not all(name in artifacts for name in ANN_ARRAYS):
+        return []
+    if 'ann_index' not in artifacts:
+        artifacts['ann_index'] = IVFIndex.from_arrays(artifacts)
+    index = artifacts['ann_index']
+    product_index = _index(artifacts, 'product_ids')
+    if asin not in product_index or product_index.get_loc(asin) >= index.n_items:
+        return []
+    n_probe = artifacts['manifest'].get('ann', {}).get('n_probe', N_PROBE)
+    start = time.perf_counter()
+    codes, scores = index.similar(product_index.get_loc(asin), k, n_probe)
+    if log:
+        log_inference(artifacts, {'kind': 'similar_items', 'asin': str(asin), 'n_items': int(len(codes)),
+                                  'latency_ms': round((time.perf_counter() - start) * 1000, 3)})
+    return [(str(artifacts['product_ids'][code]), float(score)) for code, score in zip(codes, scores)]
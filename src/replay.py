@@ -0,0 +1,186 @@
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scipy.sparse import csr_matrix
+from src.artifacts import LatentProjector, load_artifacts, save_artifacts
+from src.evaluate import fit_fold
+from src.model_registry import resolve_model_dir
+from src.popularity import TOP_K, cluster_popularity, top_k, top_k_scores
+from src.ranking import BLEND_ALPHA, USER_TOP_N, rank_users
+from src.ratings_store import STORE_DIR, TIMESTAMP_COLUMN, load_ratings_store
+from src.recommender import recommend
+
+# Replay trafik berurutan waktu terhadap jalur serving (recommender.recommend) untuk capacity planning.
+# Tiap rating di jendela replay menjadi satu request "rekomendasikan untuk user ini sekarang"; riwayat
+# user = rating sebelumnya (urutan waktu), dan hit = produk yang benar-benar dirating user saat itu.
+REPLAY_REPORT_PATH = 'models/replay_report.json'
+REPLAY_PATHS = ('inference', 'lookup')
+# Model yang di-replay: 'cutoff' = dilatih ulang hanya dari rating sebelum jendela replay (tanpa
+# kebocoran); 'served' = model yang sedang dilayani (dilatih dengan rating di jendela replay juga)
+REPLAY_MODELS = ('cutoff', 'served')
+CUTOFF_MODEL_DIR = 'models/replay_cutoff_model'
+
+def build_request_stream(store, n_requests):
+    """(event request terurut waktu, fungsi riwayat) dari store rating dengan kolom waktu.
+
+    Request adalah ``n_requests`` rating terakhir menurut waktu. Riwayat event
+    ``e`` adalah rating user yang sama yang terjadi sebelum ``e`` (tie waktu
+    dipecah menurut urutan baris di store).
+    """
+    user_codes = np.asarray(store['user_codes'])
+    time_order = np.argsort(np.asarray(store[TIMESTAMP_COLUMN]), kind='stable')
+    time_rank = np.empty(len(time_order), dtype=np.int64)
+    time_rank[time_order] = np.arange(len(time_order))
+
+    # Event per user terurut waktu: riwayat sebuah event adalah prefiks slice user-nya
+    by_user = np.lexsort((time_rank, user_codes))
+    user_start = np.searchsorted(user_codes[by_user], np.arange(user_codes.max() + 1))
+    rank_in_user = np.empty(len(by_user), dtype=np.int64)
+    rank_in_user[by_user] = np.arange(len(by_user)) - user_start[user_codes[by_user]]
+
+    def history(event):
+        start = user_start[user_codes[event]]
+        return by_user[start:start + rank_in_user[event]]
+
+    return time_order[-n_requests:], history
+
+def train_cutoff_model(store, train_events, n_components, n_clusters, blend_alpha=BLEND_ALPHA,
+                       output_dir=CUTOFF_MODEL_DIR):
+    """Melatih SVD + K-Means + top-list cluster + tabel lookup hanya dari ``train_events``.
+
+    Kode user/produk sama dengan store (user tanpa rating sebelum cutoff berbaris
+    kosong), jadi ID di request tetap bisa di-decode dan di-lookup.
+    """
+    user_ids, product_ids = store['user_ids'], store['product_ids']
+    matrix = csr_matrix((np.asarray(store['ratings'])[train_events].astype(np.float64),
+                         (np.asarray(store['user_codes'])[train_events], np.asarray(store['product_codes'])[train_events])),
+                        shape=(len(user_ids), len(product_ids)))
+    models = fit_fold(matrix, n_components=n_components, n_clusters=n_clusters)
+    labels = models['kmeans'].labels_.astype(np.int32)
+    popularity = cluster_popularity(matrix, labels, n_clusters)
+    top_items = top_k(popularity, TOP_K)
+    top_scores = top_k_scores(popularity, top_items)
+    user_top_items, user_top_scores = rank_users(matrix, labels, top_items, top_scores,
+                                                 LatentProjector(models['svd'].components_), USER_TOP_N, blend_alpha)
+    save_artifacts(output_dir, svd_components=models['svd'].components_, cluster_centers=models['kmeans'].cluster_centers_,
+                   user_item_matrix=matrix, user_ids=user_ids, product_ids=product_ids, top_items_per_cluster=top_items,
+                   extra_arrays={'user_clusters': labels, 'top_scores': top_scores, 'user_top_items': user_top_items,
+                                 'user_top_scores': user_top_scores},
+                   metadata={'ranking': {'blend_alpha': blend_alpha}, 'n_train_ratings': int(len(train_events))})
+    return load_artifacts(output_dir)
+
+def replay(n_requests=2_000, top_n=10, path='inference', model='cutoff', store_dir=STORE_DIR,
+           output_path=REPLAY_REPORT_PATH):
+    """Memutar ulang ``n_requests`` rating terakhir sebagai stream request ke jalur serving.
+
+    ``path='inference'`` mengirim riwayat rating sebelum waktu request (SVD +
+    K-Means + re-ranking on-the-fly). ``path='lookup'`` mengirim user ID
+    sehingga user yang dikenal dijawab dari tabel lookup.
+
+    ``model='cutoff'`` (default) melatih ulang model dengan hiperparameter
+    model yang dilayani tetapi hanya dari rating sebelum jendela replay, jadi
+    hit rate kedua jalur bebas kebocoran data masa depan. ``model='served'``
+    memakai model yang sedang dilayani; model itu dilatih dengan rating di
+    jendela replay, sehingga laporan ditandai ``leakage: true``: hit rate
+    jalur inference terlalu optimis, dan hit rate jalur lookup tidak dilaporkan
+    karena tabelnya sudah membuang item yang di-replay sebagai item terlihat.
+    """
+    print(f"⏯️ Memulai Replay Trafik ({n_requests:,} request terakhir, jalur {path}, model {model})...")
+    store = load_ratings_store(store_dir)
+    if TIMESTAMP_COLUMN not in store:
+        print("❌ Store rating belum menyimpan waktu rating. Jalankan 'python src/preprocessing.py' ulang.")
+        return
+
+    version_id, model_dir = resolve_model_dir()
+    artifacts = load_artifacts(model_dir)
+    user_ids, product_ids = store['user_ids'], store['product_ids']
+    ratings, timestamps = np.asarray(store['ratings']), np.asarray(store[TIMESTAMP_COLUMN])
+    requests, history = build_request_stream(store, n_requests)
+    if model == 'cutoff':
+        manifest = artifacts['manifest']
+        print(f"   ↳ Melatih ulang model dari rating sebelum jendela replay ({manifest['n_components']} komponen, "
+              f"{manifest['n_clusters']} cluster)...")
+        before_window = np.ones(len(ratings), dtype=bool)
+        before_window[requests] = False
+        train_events = np.flatnonzero(before_window)
+        artifacts = train_cutoff_model(store, train_events, manifest['n_components'], manifest['n_clusters'],
+                                       manifest.get('ranking', {}).get('blend_alpha', BLEND_ALPHA))
+        version_id = f'cutoff@{version_id}'
+    artifacts['manifest'].setdefault('version_id', version_id)
+
+    # Pemanasan: index ID di-memo pada request pertama, tidak ikut diukur
+    recommend(artifacts, ratings={}, top_n=top_n, log=False)
+
+    latencies, hits, sources, cold_start = [], [], {}, 0
+    wall_start = time.perf_counter()
+    for event in requests:
+        past = history(event)
+        cold_start += len(past) == 0
+        user_ratings = {str(product_ids[code]): float(rating)
+                        for code, rating in zip(store['product_codes'][past], ratings[past])}
+        user_id = str(user_ids[store['user_codes'][event]]) if path == 'lookup' else None
+
+        start = time.perf_counter()
+        result = recommend(artifacts, user_id=user_id, ratings=user_ratings, top_n=top_n, log=False)
+        latencies.append(time.perf_counter() - start)
+
+        sources[result['source']] = sources.get(result['source'], 0) + 1
+        target = str(product_ids[store['product_codes'][event]])
+        recommended = artifacts['product_ids'][np.asarray(result['items'], dtype=np.int64)]
+        hits.append(target in recommended)
+    wall_time = time.perf_counter() - wall_start
+
+    latencies = np.array(latencies) * 1000
+    report = {
+        'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'model_version': version_id,
+        'model': model,
+        'leakage': model == 'served',
+        'path': path,
+        'n_requests': int(len(requests)),
+        'top_n': int(top_n),
+        'window_start': int(timestamps[requests[0]]),
+        'window_end': int(timestamps[requests[-1]]),
+        'throughput_rps': float(len(requests) / (latencies.sum() / 1000)),
+        'wall_throughput_rps': float(len(requests) / wall_time),
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p95_ms': float(np.percentile(latencies, 95)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+        'max_ms': float(latencies.max()),
+        # Tabel lookup model served sudah membuang item yang di-replay sebagai 'sudah dirating'
+        'hit_rate': None if model == 'served' and path == 'lookup' else float(np.mean(hits)),
+        'cold_start_share': cold_start / len(requests),
+        'sources': sources,
+    }
+
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    with open(output_path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    window = [time.strftime('%Y-%m-%d', time.gmtime(report[key])) for key in ('window_start', 'window_end')]
+    print(f"   ↳ Jendela {window[0]} s.d. {window[1]} | model {version_id}")
+    print(f"   ↳ Throughput {report['throughput_rps']:,.0f} req/s (serving) | "
+          f"{report['wall_throughput_rps']:,.0f} req/s (termasuk harness)")
+    print(f"   ↳ Latensi p50 {report['p50_ms']:.2f} ms | p95 {report['p95_ms']:.2f} ms | p99 {report['p99_ms']:.2f} ms")
+    if report['hit_rate'] is not None:
+        leak_note = " ⚠️ bocor: model dilatih dengan rating di jendela replay" if report['leakage'] else ""
+        print(f"   ↳ Hit rate@{top_n} {report['hit_rate']:.2%} (cold start {report['cold_start_share']:.1%}){leak_note}")
+    print(f"✅ Laporan replay tersimpan di {output_path}")
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay rating berurutan waktu ke jalur serving rekomendasi")
+    parser.add_argument('--n-requests', type=int, default=2_000, help="Jumlah rating terakhir yang di-replay")
+    parser.add_argument('--top-n', type=int, default=10, help="Panjang daftar rekomendasi per request")
+    parser.add_argument('--path', choices=REPLAY_PATHS, default='inference',
+                        help="inference = kirim riwayat rating; lookup = kirim user ID (tabel lookup)")
+    parser.add_argument('--model', choices=REPLAY_MODELS, default='cutoff',
+                        help="cutoff = latih ulang dari rating sebelum jendela replay (tanpa kebocoran); "
+                             "served = model yang dilayani (hit rate bocor)")
+    args = parser.parse_args()
+    replay(n_requests=args.n_requests, top_n=args.top_n, path=args.path, model=args.model)
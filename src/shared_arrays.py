@@ -0,0 +1,57 @@
+import numpy as np
+import multiprocessing
+from multiprocessing import resource_tracker, shared_memory
+from scipy.sparse import csr_matrix
+
+# Berbagi array NumPy antar proses worker lewat shared memory (tanpa pickle per worker)
+
+def share_arrays(arrays):
+    """Menyalin dict array ke blok shared memory.
+
+    Mengembalikan (handles, spec); ``spec`` kecil dan aman di-pickle ke worker,
+    ``handles`` harus dilepas dengan ``release`` oleh proses pemilik.
+    """
+    handles, spec = [], {}
+    for name, values in arrays.items():
+        values = np.ascontiguousarray(values)
+        shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        np.ndarray(values.shape, dtype=values.dtype, buffer=shm.buf)[...] = values
+        handles.append(shm)
+        spec[name] = (shm.name, values.shape, values.dtype.str)
+    return handles, spec
+
+def _attach(shm_name):
+    """Membuka blok yang sudah ada tanpa ikut mendaftarkannya ke resource tracker."""
+    try:
+        return shared_memory.SharedMemory(name=shm_name, track=False)  # Python 3.13+
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=shm_name)
+        # Dengan 'fork' tracker dipakai bersama pemilik; selain itu worker punya tracker
+        # sendiri yang akan meng-unlink blok saat worker keluar
+        if multiprocessing.get_start_method() != 'fork':
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        return shm
+
+def attach_arrays(spec):
+    """Membuka array dari ``spec`` di proses worker (view, tanpa salinan)."""
+    handles, arrays = [], {}
+    for name, (shm_name, shape, dtype) in spec.items():
+        shm = _attach(shm_name)
+        handles.append(shm)
+        arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+    return handles, arrays
+
+def share_csr(matrix, prefix='matrix'):
+    """Komponen CSR (data, indices, indptr) sebagai dict array untuk ``share_arrays``."""
+    return {f'{prefix}_data': matrix.data, f'{prefix}_indices': matrix.indices, f'{prefix}_indptr': matrix.indptr}
+
+def csr_from_arrays(arrays, shape, prefix='matrix'):
+    """Membangun csr_matrix dari array shared memory tanpa menyalin."""
+    return csr_matrix((arrays[f'{prefix}_data'], arrays[f'{prefix}_indices'], arrays[f'{prefix}_indptr']),
+                      shape=shape, copy=False)
+
+def release(handles, unlink=False):
+    for shm in handles:
+        shm.close()
+        if unlink:
+            shm.unlink()
@@ -0,0 +1,151 @@
+import os
+import sys
+import time
+import argparse
+import itertools
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from sklearn.model_selection import KFold
+from threadpoolctl import threadpool_limits
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.preprocessing import (MIN_USER_RATINGS, MIN_PRODUCT_RATINGS, build_user_item_matrix,
+                               filter_active, load_ratings_streaming)
+from src.ratings_store import load_clean_ratings
+from src.evaluate import sample_users, evaluate_fold
+from src.shared_arrays import share_arrays, attach_arrays, share_csr, csr_from_arrays, release
+from src.profiling import reset_peak_rss, peak_rss_mb
+
+RAW_PATH = 'data/ratings_Electronics.csv'
+SWEEP_RESULTS_PATH = 'models/sweep_results.csv'
+
+def load_sweep_ratings():
+    """Rating ter-encode untuk sweep: seluruh CSV raw bila ada, jika tidak store rating bersih.
+
+    Dengan store bersih, threshold di bawah 50/5 tidak bisa mengembalikan baris
+    yang sudah terbuang saat preprocessing.
+    """
+    if os.path.exists(RAW_PATH):
+        print(f"📥 Memuat seluruh rating dari {RAW_PATH} (streaming)...")
+        user_codes, product_codes, ratings, _, _, _ = load_ratings_streaming(RAW_PATH, min_ratings=1, min_product_ratings=1)
+        return pd.DataFrame({'userId': user_codes, 'productId': product_codes, 'rating': ratings})
+    print("📥 CSV raw tidak ada, memakai store rating bersih...")
+    df, _, _ = load_clean_ratings()
+    return df
+
+def _evaluate_shared(arrays, shape, params):
+    matrix_train = csr_from_arrays(arrays, shape)
+    test_data = pd.DataFrame({
+        'userId': arrays['test_users'],
+        'productId': arrays['test_products'],
+        'rating': arrays['test_ratings'],
+    })
+    start = time.perf_counter()
+    result = evaluate_fold(matrix_train, arrays['train_user_ids'], arrays['train_product_ids'], test_data,
+                           n_components=params['n_components'], n_clusters=params['n_clusters'],
+                           svd_backend=params['svd_backend'])
+    result['fit_time_s'] = round(time.perf_counter() - start, 4)
+    result.update(result.pop('metrics'))  # Metrik ranking @K menjadi kolom tabel sweep
+    return result
+
+def _run_config(spec, shape, params):
+    """Worker: buka matrix train dari shared memory lalu evaluasi satu konfigurasi.
+
+    Worker pool dipakai ulang antar konfigurasi, jadi high-water mark RSS
+    di-reset di awal agar ``worker_max_rss_mb`` adalah puncak konfigurasi ini
+    (``rss_scope='config'``). Tanpa dukungan reset (non-Linux) nilainya puncak
+    sepanjang umur worker (``rss_scope='worker_lifetime'``).
+    """
+    resettable = reset_peak_rss()
+    handles, arrays = attach_arrays(spec)
+    try:
+        # Satu thread BLAS/OpenMP per worker agar tidak oversubscribe core
+        with threadpool_limits(limits=1):
+            result = _evaluate_shared(arrays, shape, params)
+    finally:
+        del arrays
+        release(handles)
+    result['worker_max_rss_mb'] = round(peak_rss_mb(resettable), 1)
+    result['rss_scope'] = 'config' if resettable else 'worker_lifetime'
+    return dict(params, **result)
+
+def run_sweep(user_thresholds=(MIN_USER_RATINGS,), product_thresholds=(MIN_PRODUCT_RATINGS,),
+              n_components_grid=(30, 50), n_clusters_grid=(8, 10), svd_backend='truncated',
+              max_users=1000, workers=None, output_path=SWEEP_RESULTS_PATH):
+    """Sweep grid threshold filter x rank SVD x jumlah cluster secara paralel.
+
+    Tiap kombinasi threshold menghasilkan satu split train/test (fold pertama
+    KFold seperti evaluate.py); matrix train-nya dibagikan ke worker lewat
+    shared memory. Hasil semua konfigurasi dikumpulkan dalam satu tabel.
+    """
+    print("🧪 Memulai Hyperparameter Sweep...")
+    df = load_sweep_ratings()
+    workers = workers or os.cpu_count()
+
+    handles, futures = [], []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for min_ratings, min_product_ratings in itertools.product(user_thresholds, product_thresholds):
+            df_filtered = filter_active(df, min_ratings, min_product_ratings)
+            df_sample = sample_users(df_filtered, max_users)
+            if df_sample['userId'].nunique() < max(n_clusters_grid):
+                print(f"   ⚠️ Threshold {min_ratings}/{min_product_ratings}: user terlalu sedikit, dilewati.")
+                continue
+
+            kf = KFold(n_splits=5, shuffle=True, random_state=42)
+            train_index, test_index = next(kf.split(df_sample))
+            train_data, test_data = df_sample.iloc[train_index], df_sample.iloc[test_index]
+            matrix_train, train_user_ids, train_product_ids = build_user_item_matrix(train_data)
+
+            group_handles, spec = share_arrays(dict(
+                share_csr(matrix_train),
+                train_user_ids=train_user_ids.astype('int64'),
+                train_product_ids=train_product_ids.astype('int64'),
+                test_users=test_data['userId'].values,
+                test_products=test_data['productId'].values,
+                test_ratings=test_data['rating'].values,
+            ))
+            handles.extend(group_handles)
+            print(f"   📦 Threshold {min_ratings}/{min_product_ratings}: matrix train {matrix_train.shape}, "
+                  f"nnz {matrix_train.nnz:,} dibagikan lewat shared memory")
+
+            for n_components, n_clusters in itertools.product(n_components_grid, n_clusters_grid):
+                if n_components >= matrix_train.shape[1]:
+                    continue
+                params = {
+                    'min_user_ratings': min_ratings,
+                    'min_product_ratings': min_product_ratings,
+                    'n_components': n_components,
+                    'n_clusters': n_clusters,
+                    'svd_backend': svd_backend,
+                    'n_users': matrix_train.shape[0],
+                    'n_products': matrix_train.shape[1],
+                }
+                futures.append(pool.submit(_run_config, spec, matrix_train.shape, params))
+
+        print(f"⚙️ Menjalankan {len(futures)} konfigurasi pada {workers} worker...")
+        try:
+            results = [future.result() for future in futures]
+        finally:
+            release(handles, unlink=True)
+
+    table = pd.DataFrame(results).sort_values('f1_score', ascending=False)
+    if not os.path.exists('models'):
+        os.makedirs('models')
+    table.to_csv(output_path, index=False)
+    print(table[['min_user_ratings', 'min_product_ratings', 'n_components', 'n_clusters',
+                 'precision', 'recall', 'f1_score', 'fit_time_s', 'svd_peak_memory_mb']].to_string(index=False))
+    print(f"✅ Sweep selesai. Tabel hasil tersimpan di {output_path}")
+    return table
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep paralel rank SVD, jumlah cluster & threshold filter")
+    parser.add_argument('--min-user-ratings', type=int, nargs='+', default=[MIN_USER_RATINGS])
+    parser.add_argument('--min-product-ratings', type=int, nargs='+', default=[MIN_PRODUCT_RATINGS])
+    parser.add_argument('--n-components', type=int, nargs='+', default=[30, 50])
+    parser.add_argument('--n-clusters', type=int, nargs='+', default=[8, 10])
+    parser.add_argument('--svd-backend', default='truncated', help="Backend SVD (lihat factorization.SVD_BACKENDS)")
+    parser.add_argument('--max-users', type=int, default=1000, help="Jumlah user sampel per threshold")
+    parser.add_argument('--workers', type=int, default=None, help="Jumlah proses worker (default: semua core)")
+    args = parser.parse_args()
+    run_sweep(args.min_user_ratings, args.min_product_ratings, args.n_components, args.n_clusters,
+              svd_backend=args.svd_backend, max_users=args.max_users, workers=args.workers)
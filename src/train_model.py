@@ -1,79 +1,159 @@
 import joblib
 import os
+import sys
+import argparse
 import numpy as np
-from sklearn.cluster import KMeans
-import pandas as pd
 
-def train_model():
-    print("🚀 Memulai Training Model (K-Means Clustering Only)...")
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.artifacts import ARTIFACT_DIR, PRECISIONS, LatentProjector, save_artifacts
+from src.profiling import PipelineProfiler, describe_matrix
+from src.popularity import TOP_K, cluster_popularity, top_k, top_k_scores
+from src.ranking import BLEND_ALPHA, USER_TOP_N, rank_users
+from src.ann_index import N_PROBE, build_ivf_index, recall_report
+from src.model_registry import publish_version
+from src.clustering import (CLUSTER_MODES, CHECKPOINT_PATH, K_RANGE, load_reduced_features, fit_clusters,
+                            select_n_clusters)
+
+def train_model(n_clusters=10, mode='full', batch_size=10_000, n_epochs=3, resume=False, user_top_n=USER_TOP_N,
+                blend_alpha=BLEND_ALPHA, k_range=K_RANGE, publish=True, precision='float64'):
+    print(f"🚀 Memulai Training Model (K-Means Clustering Only, mode: {mode})...")
     
     feature_path = 'data/preprocessed_features.pkl'
     if not os.path.exists(feature_path):
         print("❌ File fitur tidak ditemukan. Jalankan 'python src/preprocessing.py' terlebih dahulu!")
-        return
+        return False
+
+    profiler = PipelineProfiler('train_model')
 
     # 1. Load Data Hasil Preprocessing
     print("📥 Memuat Fitur SVD dari Preprocessing...")
-    data = joblib.load(feature_path)
-    
-    matrix_reduced = data['matrix_reduced']     # Data hasil SVD (Fitur Laten)
-    user_item_matrix = data['user_item_matrix'] # Data asli (sparse) untuk hitung rating
-    user_item_pivot = data['user_item_pivot']   # Untuk nama kolom/produk
-    svd_model = data['svd_model']               # Untuk dashboard nanti
+    with profiler.stage('load_features') as record:
+        data = joblib.load(feature_path)
+        
+        # Data hasil SVD (Fitur Laten), dibuka memory-mapped; fitur versi lama masih ada di pickle
+        matrix_reduced = data['matrix_reduced'] if 'matrix_reduced' in data else load_reduced_features()
+        user_item_matrix = data['user_item_matrix'] # Data asli (sparse) untuk hitung rating
+        user_ids = data['user_ids']                 # Index baris -> userId
+        product_ids = data['product_ids']           # Index kolom -> productId (ASIN)
+        svd_model = data['svd_model']               # Untuk dashboard nanti
+        record.update(describe_matrix(user_item_matrix))
     
-    # 2. Training K-Means
+    # 2a. Pemilihan jumlah cluster (scan k paralel dengan silhouette tersampel)
+    model_selection = None
+    if n_clusters == 'auto':
+        print(f"🔎 Memilih jumlah cluster dari k = {list(k_range)} (silhouette tersampel, paralel)...")
+        with profiler.stage('select_k') as record:
+            n_clusters, model_selection = select_n_clusters(matrix_reduced, k_range)
+            record['chosen_k'] = n_clusters
+        for point in model_selection['curve']:
+            marker = '⬅️' if point['k'] == n_clusters else ''
+            print(f"   k={point['k']:<3} silhouette {point['silhouette']:.4f} | "
+                  f"inertia/user {point['inertia_per_user']:.4f} {marker}")
+
+    # 2b. Training K-Means
     print(f"🧠 Melatih K-Means pada {matrix_reduced.shape[0]} user...")
-    n_clusters = 10 
-    kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
-    
-    # Training hanya menggunakan data yang SUDAH di-SVD (preprocessing)
-    kmeans.fit(matrix_reduced) 
-    
-    cluster_labels = kmeans.labels_
+    with profiler.stage('kmeans') as record:
+        # Training hanya menggunakan data yang SUDAH di-SVD (preprocessing)
+        kmeans, cluster_labels, inertia = fit_clusters(
+            matrix_reduced, n_clusters, mode,
+            **({'batch_size': batch_size, 'n_epochs': n_epochs, 'checkpoint_path': CHECKPOINT_PATH,
+                'resume': resume} if mode == 'minibatch' else {})
+        )
+        record.update(describe_matrix(matrix_reduced, 'reduced'))
+        record['n_clusters'] = n_clusters
+        record['mode'] = mode
+        record['inertia'] = inertia
     
     # 3. Hitung Rekomendasi (Popularity per Cluster)
+    # Semua cluster sekaligus: indikator cluster (k x n_user) @ matrix user-item -> total rating
+    # per (cluster, produk). Semakin tinggi jumlah rating, semakin populer barang di komunitas itu.
     print("⚡ Menghitung Top Items per Cluster (Popularity Based)...")
-    top_items_per_cluster = {}
-    
-    # Helper dataframe untuk mapping User -> Cluster
-    user_cluster_map = pd.DataFrame({
-        'user_idx': range(len(user_item_pivot)),
-        'cluster': cluster_labels
-    })
+    with profiler.stage('cluster_popularity') as record:
+        popularity = cluster_popularity(user_item_matrix, cluster_labels, n_clusters)
 
-    for cluster_id in range(n_clusters):
-        # Ambil index user yang masuk ke dalam cluster ini
-        u_indices = user_cluster_map[user_cluster_map['cluster'] == cluster_id]['user_idx'].values
-        
-        # Ambil data rating asli mereka (dari matrix sparse agar cepat)
-        cluster_submatrix = user_item_matrix[u_indices]
-        
-        # Hitung Popularitas: Total Rating (SUM) per produk dalam cluster
-        # Semakin tinggi jumlah rating, semakin populer barang tersebut di komunitas ini
-        cluster_scores = np.array(cluster_submatrix.sum(axis=0)).flatten()
-        
-        # Ambil Top 50 Produk dengan skor tertinggi
-        top_indices = cluster_scores.argsort()[::-1][:50]
-        
-        # Translate index kembali ke ID Produk (ASIN)
-        top_products = [user_item_pivot.columns[i] for i in top_indices]
-        
-        top_items_per_cluster[cluster_id] = top_products
+        # Top 50 produk per cluster via partial selection; disimpan sebagai kode produk
+        top_items = top_k(popularity, TOP_K)
+        top_scores = top_k_scores(popularity, top_items)
+        record.update(describe_matrix(popularity, 'popularity'))
 
-    # 4. Simpan Model Akhir untuk Aplikasi
-    print("💾 Menyimpan Model Akhir...")
-    final_artifacts = {
-        'kmeans': kmeans,
-        'svd': svd_model, # SVD tetap disimpan untuk memproses input user baru di Dashboard
-        'user_item_pivot': user_item_pivot,
-        'top_items_per_cluster': top_items_per_cluster
+    # 3b. Tabel lookup per user: top-list cluster di-re-rank personal (afinitas SVD + popularitas)
+    # tanpa produk yang sudah dirating, sehingga Dashboard tidak perlu inferensi untuk user yang dikenal
+    extra_arrays = {
+        'user_clusters': cluster_labels.astype(np.int32),  # Cluster tiap user (lookup & update inkremental)
+        'cluster_popularity': popularity,                   # Jumlah rating per (cluster, produk), sparse
+        'top_scores': top_scores                            # Skor popularitas tiap item di top-list cluster
     }
-    
+    if user_top_n:
+        print(f"📋 Menyusun Top-{user_top_n} personal per user (re-ranking, alpha {blend_alpha})...")
+        with profiler.stage('user_top_items') as record:
+            extra_arrays['user_top_items'], extra_arrays['user_top_scores'] = rank_users(
+                user_item_matrix, cluster_labels, top_items, top_scores, LatentProjector(svd_model.components_),
+                user_top_n, blend_alpha
+            )
+            record.update(describe_matrix(extra_arrays['user_top_items'], 'user_top_items'))
+
+    # 3c. Index ANN (IVF) atas faktor item SVD untuk fitur "produk serupa"
+    print("🧭 Membangun Index ANN Produk Serupa (IVF)...")
+    with profiler.stage('ann_index') as record:
+        ann_index = build_ivf_index(svd_model.components_.T)
+        extra_arrays.update(ann_index.to_arrays())
+        ann_report = recall_report(ann_index, n_probe=N_PROBE)
+        record.update(ann_report)
+    print(f"   ↳ {ann_report['n_lists']} list | recall@{ann_report['k']} {ann_report['recall_at_k']:.3f} vs brute force | "
+          f"{ann_report['mean_query_ms']:.3f} ms/query")
+
+    # 4. Simpan Model Akhir untuk Aplikasi (direktori array .npy + manifest, dibuka mmap oleh app)
+    print("💾 Menyimpan Model Akhir...")
     if not os.path.exists('models'):
         os.makedirs('models')
-        
-    joblib.dump(final_artifacts, 'models/recsys_model.pkl')
-    print("✅ Model K-Means berhasil dilatih dan disimpan di 'models/recsys_model.pkl'!")
+
+    with profiler.stage('save_artifacts'):
+        save_artifacts(
+            ARTIFACT_DIR,
+            svd_components=svd_model.components_,   # SVD tetap disimpan untuk memproses input user baru di Dashboard
+            cluster_centers=kmeans.cluster_centers_,
+            user_item_matrix=user_item_matrix,
+            user_ids=user_ids,
+            product_ids=product_ids,
+            top_items_per_cluster=top_items,
+            extra_arrays=extra_arrays,
+            precision=precision,
+            metadata={
+                'svd_stats': data.get('svd_stats'),
+                'cluster_mode': mode,
+                'ranking': {'blend_alpha': blend_alpha},
+                'ann': ann_report,
+                'model_selection': model_selection,
+                'baseline_inertia_per_user': inertia / len(user_ids)
+            }
+        )
+    profiler.save()
+    print(f"✅ Model K-Means berhasil dilatih dan disimpan di '{ARTIFACT_DIR}/'!")
+    if publish:
+        # Versi baru di registry; aplikasi yang sedang berjalan memuatnya tanpa restart
+        publish_version(ARTIFACT_DIR)
+    return True
 
 if __name__ == "__main__":
-    train_model()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Training K-Means & popularitas per cluster")
+    parser.add_argument('--n-clusters', default=10,
+                        type=lambda value: value if value == 'auto' else int(value),
+                        help="Jumlah cluster K-Means, atau 'auto' untuk dipilih otomatis (scan silhouette)")
+    parser.add_argument('--k-range', type=int, nargs='+', default=list(K_RANGE),
+                        help="Kandidat k untuk --n-clusters auto")
+    parser.add_argument('--mode', choices=CLUSTER_MODES, default='full', help="full-batch atau mini-batch streaming")
+    parser.add_argument('--batch-size', type=int, default=10_000, help="Baris per batch (mode minibatch)")
+    parser.add_argument('--epochs', type=int, default=3, help="Jumlah pass atas seluruh user (mode minibatch)")
+    parser.add_argument('--resume', action='store_true', help="Lanjutkan dari checkpoint mini-batch terakhir")
+    parser.add_argument('--user-top-n', type=int, default=USER_TOP_N,
+                        help="Panjang daftar rekomendasi per user yang disimpan (0 = tidak disimpan)")
+    parser.add_argument('--blend-alpha', type=float, default=BLEND_ALPHA,
+                        help="Bobot afinitas SVD vs popularitas cluster saat re-ranking (0-1)")
+    parser.add_argument('--precision', choices=PRECISIONS, default='float64',
+                        help="Presisi faktor laten di artefak (float32/float16/int8 = artefak ringkas)")
+    parser.add_argument('--no-publish', action='store_true', help="Jangan publikasikan ke registry model")
+    args = parser.parse_args()
+    train_model(n_clusters=args.n_clusters, mode=args.mode, batch_size=args.batch_size,
+                n_epochs=args.epochs, resume=args.resume, user_top_n=args.user_top_n,
+                blend_alpha=args.blend_alpha, k_range=args.k_range, publish=not args.no_publish,
+                precision=args.precision)
\ No newline at end of file
@@ -1,3 +1,4 @@
+import html
 import streamlit as st
 
 def inject_custom_css():
@@ -274,7 +275,7 @@ def inject_custom_css():
     </style>
     """, unsafe_allow_html=True)
 
-def render_sidebar():
+def render_sidebar(model_version=None):
     """Render Ultra Premium Sidebar dengan Enhanced Styling"""
     with st.sidebar:
         # Premium Header Area
@@ -306,8 +307,9 @@ def render_sidebar():
         st.markdown("<div style='height: 35vh'></div>", unsafe_allow_html=True)
         st.markdown("---")
         
-        # Enhanced System Health Footer
-        st.markdown("""
+        # Enhanced System Health Footer (versi model di-escape karena ditanam di HTML)
+        version = html.escape(model_version or 'local')
+        st.markdown(f"""
         <div class="status-container">
             <div style="display: flex; align-items: center; margin-bottom: 14px; gap: 10px;">
                 <i class="ph-duotone ph-cpu" style="color: #FF9900; font-size: 22px;"></i>
@@ -327,6 +329,13 @@ def render_sidebar():
                 </span>
                 <span style="color: #10B981; font-family: monospace; font-weight: 700;">~24ms</span>
             </div>
+            <div style="display: flex; justify-content: space-between; align-items: center; font-size: 11px; color: #848991; margin-top: 8px; padding: 8px; background: rgba(0,0,0,0.2); border-radius: 6px;">
+                <span style="display: flex; align-items: center; gap: 6px;">
+                    <i class="ph-fill ph-tag" style="color: #8b5cf6;"></i>
+                    Model Version
+                </span>
+                <span style="color: #8b5cf6; font-family: monospace; font-weight: 700;">{version}</span>
+            </div>
         </div>
         """, unsafe_allow_html=True)
         